@@ -1,11 +1,51 @@
+import os
+
 from flask import Flask
 from flask_socketio import SocketIO
+from message_queue import BrokerManager
+from state_store import open_store
 
 
 socketio = SocketIO()
 app = Flask(__name__)
 app.debug = False
 app.config['SECRET_KEY'] = 'ouh432q8t9ew8ofnuodhuver8'
+# which card hand chamber implementation to use: 'llist' or 'matrix'
+app.config['CARD_HAND_CHAMBER'] = 'llist'
+# batch the emits of each socket event into one message per client
+app.config['BUFFER_EMITS'] = True
+# the socket url of every worker in shard order, e.g.
+# PRESIDENTS_SHARDS=http://host:5001,http://host:5002; each room is owned by
+# one of them (see sharding) and PRESIDENTS_SHARD is this worker's index;
+# shards.py starts a worker per shard with both set
+app.config['SHARDS'] = [url for url in
+                        os.environ.get('PRESIDENTS_SHARDS', '').split(',')
+                        if url]
+app.config['SHARD'] = int(os.environ.get('PRESIDENTS_SHARD', 0))
+# shared by the workers for emits to clients of other workers: redis://...
+# or broker://host:port for the stand-in in message_queue
+app.config['MESSAGE_QUEUE'] = os.environ.get('PRESIDENTS_MESSAGE_QUEUE', '')
+# where the rooms are written after every action besides this worker's
+# memory: '' for nowhere, memory://, shm://name, or sqlite:///presidents.db
+# (see state_store)
+app.config['STATE_STORE'] = os.environ.get('PRESIDENTS_STATE_STORE', '')
+state_store = open_store(app.config['STATE_STORE'])
+# where every room is written when the worker is stopped and read back
+# from when it starts (see app.main.events.save_snapshot), with .SHARD
+# appended when there are SHARDS; '' for nowhere
+app.config['SNAPSHOT'] = os.environ.get('PRESIDENTS_SNAPSHOT', '')
+# seconds restored players have to join again before their seats go
+app.config['REJOIN_GRACE'] = 60
 from .main import main as main_blueprint
 app.register_blueprint(main_blueprint)
-socketio.init_app(app)
+socketio_options = dict()
+if app.config['MESSAGE_QUEUE'].startswith('broker://'):
+    socketio_options['client_manager'] = BrokerManager(app.config['MESSAGE_QUEUE'])
+elif app.config['MESSAGE_QUEUE']:
+    socketio_options['message_queue'] = app.config['MESSAGE_QUEUE']
+if app.config['SHARDS']:
+    # pages are served by any worker but sockets go to the owner
+    socketio_options['cors_allowed_origins'] = app.config['SHARDS']
+socketio.init_app(app, **socketio_options)
+from .main.events import restore_rooms
+restore_rooms()
@@ -1,10 +1,18 @@
 from flask_wtf import FlaskForm
 from wtforms.fields import StringField, SubmitField
-from wtforms.validators import Required
+from wtforms.validators import Required, ValidationError
+from state_store import KEY_SIZE
+
+
+def fits_in_the_state_store(form, field):
+    # room names are the keys of the state store
+    if len(field.data.encode()) > KEY_SIZE:
+        raise ValidationError(f"At most {KEY_SIZE} bytes.")
 
 
 class LoginForm(FlaskForm):
     """Accepts a nickname and a room."""
     name = StringField('Name', validators=[Required()])
-    room = StringField('Room', validators=[Required()])
+    room = StringField('Room',
+                       validators=[Required(), fits_in_the_state_store])
     submit = SubmitField('Enter Game')
\ No newline at end of file
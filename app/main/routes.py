@@ -1,4 +1,5 @@
-from flask import render_template, session, redirect, url_for, request
+from flask import render_template, session, redirect, url_for, request, current_app
+from sharding import owner_url
 from . import main
 from .forms import LoginForm
 
@@ -26,4 +27,6 @@ def presidents():
     room = session.get('room', '')
     if name == '' or room == '':
         return redirect(url_for('main.index'))
-    return render_template('presidents.html', name=name, room=room)
+    socket_url = owner_url(room, current_app.config['SHARDS'])
+    return render_template('presidents.html', name=name, room=room,
+                           socket_url=socket_url)
@@ -0,0 +1,156 @@
+import numpy as np
+
+import hand_trie
+
+from hand import card_names, ComparableHand, DuplicateCardError, FullHandError
+from typing import Dict, Iterator, Tuple, Union
+from json import dumps, loads
+
+
+class BitmaskHand(ComparableHand):
+    """
+    Drop-in alternative to Hand that stores its cards in a single 52-bit
+    python int where card c is bit c - 1. The number of cards and the id
+    are cached and updated on every add and remove, so membership,
+    intersection, and identification (see hand_trie) are just bit
+    operations instead of numpy array shifting, np.where lookups, and
+    double loops.
+
+    Iterating over the mask always yields the cards in ascending order,
+    so the hash (and therefore the id) is the same as that of the
+    equivalent Hand.
+
+    No support for hands with more than 5 cards.
+    """
+
+    __slots__ = ('_mask', '_num_cards', '_id', '_rank')
+
+    def __init__(self, _cards=None) -> None:
+        self._mask = 0
+        self._num_cards = 0
+        self._id = 0
+        self._rank = 0
+        if _cards is not None:  # only used for testing and debugging
+            for card in _cards:
+                if card != 0:
+                    self._mask |= 1 << (int(card) - 1)
+                    self._num_cards += 1
+            assert self._num_cards <= 5
+            self._identify()
+
+    @classmethod
+    def from_json(cls, json_hand: str):
+        # hd = hand dict
+        hd: Dict[str, Union[np.ndarray, int]] = loads(json_hand)
+        return cls(hd['_cards'])
+
+    @classmethod
+    def from_bytes(cls, packed: bytes):
+        # see Hand.to_bytes
+        return cls(packed[:5])
+
+    @classmethod
+    def copy(cls, hand: "BitmaskHand") -> "BitmaskHand":
+        hand_copy = cls.__new__(cls)
+        hand_copy._mask = hand._mask
+        hand_copy._num_cards = hand._num_cards
+        hand_copy._id = hand._id
+        hand_copy._rank = hand._rank
+        return hand_copy
+
+    def __getitem__(self, key: Union[int, slice]) -> int:
+        return self._cards[key]
+
+    def __hash__(self) -> int:
+        h = 0
+        for card in self:
+            h = h * 53 + card
+        return h * 53
+
+    def __contains__(self, card: int) -> bool:
+        assert 1 <= card <= 52, "Bug: invalid card cannot be in hand."
+        return bool(self._mask >> (card - 1) & 1)
+
+    def __iter__(self) -> Iterator[int]:
+        mask = self._mask
+        while mask:
+            lowest_bit = mask & -mask
+            yield lowest_bit.bit_length()
+            mask ^= lowest_bit
+
+    def __str__(self) -> str:
+        to_join = [card_names[card] for card in self]
+        return " ".join(to_join) + f": {self.id_desc}"
+
+    def __repr__(self) -> str:
+        return f"mask: {self._mask:#015x}; id: {self._id}; n: " + \
+               f"{self._num_cards}"
+
+    def __eq__(self, other: object) -> bool:
+        return self._mask == other._mask  # type: ignore
+
+    @property
+    def _cards(self) -> Tuple[int, ...]:
+        # the same zero-padded layout as Hand._cards
+        return (0,) * (5 - self._num_cards) + tuple(self)
+
+    @property
+    def _insertion_index(self) -> int:
+        return 4 - self._num_cards
+
+    @property
+    def is_full(self) -> bool:
+        return self._num_cards == 5
+
+    @property
+    def _number_of_cards(self) -> int:
+        return self._num_cards
+
+    @property
+    def is_completable(self) -> bool:
+        """
+        whether or not more cards can still make this a valid hand
+        """
+        return hand_trie.is_completable(self._mask)
+
+    def reset(self) -> None:
+        self._mask = 0
+        self._num_cards = 0
+        self._id = 0
+        self._rank = 0
+
+    def intersects(self, other: "BitmaskHand") -> bool:
+        return self._mask & other._mask != 0
+
+    def to_json(self) -> str:
+        # same payload as Hand.to_json so the two are interchangeable
+        return dumps({'_cards': list(self._cards), '_id': self._id,
+                      '_insertion_index': self._insertion_index,
+                      '_rank': self._rank})
+
+    def to_bytes(self) -> bytes:
+        # same 6 bytes as Hand.to_bytes
+        return bytes(self._cards) + bytes((self._id,))
+
+    def _identify(self) -> None:
+        self._id, self._rank = hand_trie.identify(self._mask, self._num_cards)
+
+    def add(self, card: int) -> None:
+        assert 1 <= card <= 52, "Bug: attempting to add invalid card."
+        bit = 1 << (card - 1)
+        if self._mask & bit:
+            raise DuplicateCardError("Attempting to add duplicate card.")
+        if self._num_cards == 5:
+            raise FullHandError("Cannot add any more cards to this hand.")
+        self._mask |= bit
+        self._num_cards += 1
+        self._identify()
+
+    def remove(self, card: int) -> None:
+        assert self._id != 0, "Bug: attempting to remove from an empty hand."
+        bit = 1 << (card - 1)
+        assert self._mask & bit, \
+            f"Bug: attempting to remove card ({card}) which is not in hand."
+        self._mask ^= bit
+        self._num_cards -= 1
+        self._identify()
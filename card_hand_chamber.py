@@ -1,8 +1,12 @@
 import numpy as np
 from llist import sllist, sllistnode, dllist, dllistnode
-from typing import List, Union, Generator
+from typing import Dict, Iterable, List, NamedTuple, Tuple, Union, Generator
 from hand import Hand
-from flask_socketio import emit
+from frozen_hand import FrozenHand
+from combo_index import ComboIndex
+from hand_list import pack_hands, unpack_hands
+from hand_trie import cards_of, mask_of
+from emit_buffer import emit
 
 
 # TODO: use del for hand?
@@ -12,19 +16,172 @@ from flask_socketio import emit
 #       card nodes
 
 
-class CardHandChamber:
+def pack_snapshot(card_mask: int, selected_mask: int,
+                  hands: Iterable) -> bytes:
+    """
+    the snapshot of a chamber: the mask of its cards and the mask of its
+    selected cards as 7 bytes each and then its stored hands packed with
+    pack_hands; chambers of either implementation restore from it
+    """
+    return (card_mask.to_bytes(7, 'little') +
+            selected_mask.to_bytes(7, 'little') + pack_hands(hands))
+
+
+def unpack_snapshot(snapshot: bytes) -> Tuple[int, int, List[FrozenHand]]:
+    return (int.from_bytes(snapshot[:7], 'little'),
+            int.from_bytes(snapshot[7:14], 'little'),
+            unpack_hands(snapshot[14:]))
+
+
+class BaseCardHandChamber:
+    """
+    what CardHandChamber and MatrixCardHandChamber have in common: the
+    cards as a card mask, which the questions about ranks are answered
+    from, and the slots of the stored hands, which the hands of cards are
+    found with; subclasses keep _card_slots and _slot_hands up to date as
+    they store and remove hands
+    """
+    def __init__(self, cards: np.ndarray, player_sid: str) -> None:
+        self._card_mask = mask_of(cards)
+        self._selected_mask = 0
+        # every stored hand has a slot; card -> bitmask of the slots of the
+        # stored hands with the card, so conflicts are just ors of these
+        self._card_slots: List[int] = [0] * 53
+        self._slot_hands: List[FrozenHand] = list()  # None for a free slot
+        self._combos: ComboIndex = None  # built on first use
+        self._player_sid = player_sid
+
+    @property
+    def combos(self) -> ComboIndex:
+        """
+        every valid hand that can be made from the cards in the chamber
+        """
+        if self._combos is None:
+            self._combos = ComboIndex(self.iter_cards())
+        return self._combos
+
+    @property
+    def card_mask(self) -> int:
+        """
+        the cards in the chamber as a card mask (card c is bit c - 1)
+        """
+        return self._card_mask
+
+    def lowest_of_rank(self, rank: int) -> int:
+        """
+        the lowest card of a rank (0 through 12) in the chamber or 0
+        """
+        nibble = (self._card_mask >> 4 * rank) & 0xF
+        return (nibble & -nibble).bit_length() + 4 * rank if nibble else 0
+
+    def highest_of_rank(self, rank: int) -> int:
+        nibble = (self._card_mask >> 4 * rank) & 0xF
+        return nibble.bit_length() + 4 * rank if nibble else 0
+
+    def count_rank(self, rank: int) -> int:
+        """
+        the number of cards of a rank (0 through 12) in the chamber
+        """
+        return bin((self._card_mask >> 4 * rank) & 0xF).count('1')
+
+    def set_selected_mask(self, selected_mask: int
+                          ) -> Tuple[List[FrozenHand], List[FrozenHand]]:
+        """
+        selects and deselects cards until exactly the cards of
+        selected_mask are selected, without emitting; returns the stored
+        hands this newly selects and the ones it newly deselects
+        """
+        assert not selected_mask & ~self._card_mask, \
+            "Bug: attempting to select a card that is not in the chamber."
+        slots_before = self._slots_of(self._selected_mask)
+        self._count_selected_cards(self._selected_mask & ~selected_mask,
+                                   selected_mask & ~self._selected_mask)
+        self._selected_mask = selected_mask
+        slots_after = self._slots_of(selected_mask)
+        return (self._hands_in_slots(slots_after & ~slots_before),
+                self._hands_in_slots(slots_before & ~slots_after))
+
+    def _count_selected_cards(self, deselected_mask: int,
+                              selected_mask: int) -> None:
+        """
+        updates the number of selected cards of every stored hand with a
+        card of deselected_mask or selected_mask
+        """
+        raise NotImplementedError
+
+    def _slots_of(self, mask: int) -> int:
+        slots = 0
+        for card in cards_of(mask):
+            slots |= self._card_slots[card]
+        return slots
+
+    def _hands_in_slots(self, slots: int) -> List[FrozenHand]:
+        hands: List[FrozenHand] = list()
+        while slots:
+            lowest_bit = slots & -slots
+            hands.append(self._slot_hands[lowest_bit.bit_length() - 1])
+            slots ^= lowest_bit
+        return hands
+
+    def conflicting_hands(self, cards) -> List[FrozenHand]:
+        """
+        the stored hands that share a card with cards, i.e. the ones that
+        playing cards would remove, in the order of their slots
+        """
+        slots = 0
+        for card in cards:
+            slots |= self._card_slots[card]
+        return self._hands_in_slots(slots)
+
+
+class CardHandChamber(BaseCardHandChamber):
     """
     storage for cards and hands specifically designed for fast runtimes
     in context of front end interaction
     """
     def __init__(self, cards: np.ndarray, player_sid: str) -> None:
+        super().__init__(cards, player_sid)
         self._num_cards = 0
         self._cards = np.empty(shape=53, dtype=np.object)
         for card in cards:
             self[card] = dllist()  # a dllist of HandPointerNodes
             self._num_cards += 1
         self._hands: dllist = dllist()  # a dllist of ConsciousHandNodes
-        self._player_sid = player_sid
+        # hand hash -> the hand_dllnode of the stored hand
+        self._hand_index: Dict[int, dllistnode] = dict()
+        # clearing the hands starts a new generation; the dllist of a card
+        # last used in an older generation only points to cleared hands
+        self._generation = 0
+        self._card_generations: List[int] = [0] * 53
+        self._free_slots: List[int] = list()
+        # detached hand_dllnodes and hand_pointer_dllnodes of removed hands
+        # for reuse, and the hand dllists dropped by clear_hands whose nodes
+        # have not been taken apart for reuse yet
+        self._hand_dllnode_pool: List[dllistnode] = list()
+        self._hand_pointer_dllnode_pool: List[dllistnode] = list()
+        self._retired_hands: List[dllist] = list()
+
+    def snapshot(self) -> bytes:
+        """
+        the cards, stored hands, and selected cards of the chamber (see
+        pack_snapshot)
+        """
+        return pack_snapshot(self._card_mask, self._selected_mask,
+                             [hand_node.hand for hand_node in self._hands])
+
+    @classmethod
+    def restore(cls, snapshot: bytes, player_sid: str) -> "CardHandChamber":
+        """
+        rebuilds a chamber from a snapshot without emitting anything
+        """
+        card_mask, selected_mask, hands = unpack_snapshot(snapshot)
+        chamber = cls(cards_of(card_mask), player_sid)
+        chamber._selected_mask = selected_mask
+        for hand in hands:
+            hand_node = chamber._insert_hand(hand)
+            hand_node._num_cards_selected = bin(hand._mask &
+                                                selected_mask).count('1')
+        return chamber
 
     def __getitem__(self, key: Union[int, slice]) -> dllist:
         return self._cards[key]
@@ -32,79 +189,179 @@ class CardHandChamber:
     def __setitem__(self, key: Union[int, slice], value: dllist) -> None:
         self._cards[key] = value
 
+    def _hand_pointers(self, card: int) -> Iterable:
+        """
+        the dllist of HandPointerNodes of card, lazily emptied if the hands
+        have been cleared since it was last used, or no pointers if the
+        card is not held
+        """
+        if not self._card_mask >> (int(card) - 1) & 1:
+            return ()
+        if self._card_generations[card] != self._generation:
+            self[card] = dllist()
+            self._card_generations[card] = self._generation
+        return self[card]
+
     def add_hand(self, hand: Hand) -> None:
+        self._insert_hand(hand).store_hand()
+
+    def _recycle_retired_hand(self) -> None:
+        """
+        takes apart one hand of the oldest dllist dropped by clear_hands
+        and pools its nodes
+        """
+        retired_hands = self._retired_hands[0]
+        hand_dllnode = retired_hands.first
+        retired_hands.remove(hand_dllnode)
+        if retired_hands.size == 0:
+            self._retired_hands.pop(0)
+        for card_node in hand_dllnode.value:
+            hand_pointer_dllnode = card_node.hand_pointer_dllnode
+            # still in the card's dllist if the card is untouched since
+            owner = hand_pointer_dllnode.owner
+            if owner is not None and owner() is not None:
+                owner().remove(hand_pointer_dllnode)
+            self._hand_pointer_dllnode_pool.append(hand_pointer_dllnode)
+        self._hand_dllnode_pool.append(hand_dllnode)
+
+    def _insert_hand(self, hand: Hand) -> "ConsciousHandNode":
         cards: List[int] = list()
-        hand_pointer_nodes: List[dllistnode] = list()
+        hand_pointer_nodes: List[HandPointerNode] = list()
         for card in hand:
             cards.append(card)
-            hand_pointer_dllnode = self[card].append(None)
-            hand_pointer_node = HandPointerNode(hand_pointer_dllnode)
-            hand_pointer_dllnode.value = hand_pointer_node
-            hand_pointer_nodes.append(hand_pointer_node)
-        hand_dllnode = self._hands.append(None)
-        hand_dllnode.value = ConsciousHandNode(hand, hand_dllnode, hand_pointer_nodes)
+            if (not self._hand_pointer_dllnode_pool and
+                    self._retired_hands):
+                self._recycle_retired_hand()
+            if self._hand_pointer_dllnode_pool:
+                hand_pointer_dllnode = self._hand_pointer_dllnode_pool.pop()
+            else:
+                hand_pointer_dllnode = dllistnode()
+                hand_pointer_dllnode.value = HandPointerNode(
+                    hand_pointer_dllnode)
+            self._hand_pointers(card).appendnode(hand_pointer_dllnode)
+            hand_pointer_nodes.append(hand_pointer_dllnode.value)
+        if not self._hand_dllnode_pool and self._retired_hands:
+            self._recycle_retired_hand()
+        if self._hand_dllnode_pool:
+            hand_dllnode = self._hand_dllnode_pool.pop()
+            hand_node = hand_dllnode.value
+            hand_node.reuse(hand, hand_dllnode, cards, hand_pointer_nodes)
+        else:
+            hand_dllnode = dllistnode()
+            hand_node = ConsciousHandNode(hand, hand_dllnode, cards,
+                                          hand_pointer_nodes)
+            hand_dllnode.value = hand_node
+        self._hands.appendnode(hand_dllnode)
+        self._hand_index[hash(hand_node.hand)] = hand_dllnode
+        if self._free_slots:
+            hand_node.slot = self._free_slots.pop()
+            self._slot_hands[hand_node.slot] = hand_node.hand
+        else:
+            hand_node.slot = len(self._slot_hands)
+            self._slot_hands.append(hand_node.hand)
+        for card in cards:
+            self._card_slots[card] |= 1 << hand_node.slot
+        return hand_node
 
     def select_card(self, card: int):
         emit('select card', {'card': int(card)}, room=self._player_sid)
-        for hand_pointer_node in self[card]:
+        self._selected_mask |= 1 << (int(card) - 1)
+        for hand_pointer_node in self._hand_pointers(card):
             hand_node = hand_pointer_node.hand_dllnode.value
             hand_node.increment_num_selected_cards()
 
     def deselect_card(self, card: int):
         emit('deselect card', {'card': int(card)}, room=self._player_sid)
-        for hand_pointer_node in self[card]:
+        self._selected_mask &= ~(1 << (int(card) - 1))
+        for hand_pointer_node in self._hand_pointers(card):
             hand_node = hand_pointer_node.hand_dllnode.value
             hand_node.decrement_num_selected_cards()
 
+    def _remove_hand_dllnode(self, hand_dllnode: dllistnode) -> None:
+        hand_node = hand_dllnode.value
+        for card_node in hand_node:
+            self._card_slots[card_node.card] &= ~(1 << hand_node.slot)
+            self[card_node.card].remove(card_node.hand_pointer_dllnode)
+            self._hand_pointer_dllnode_pool.append(
+                card_node.hand_pointer_dllnode)
+        self._slot_hands[hand_node.slot] = None
+        self._free_slots.append(hand_node.slot)
+        hand_node.remove_hand()
+        self._hands.remove(hand_dllnode)
+        self._hand_dllnode_pool.append(hand_dllnode)
+        del self._hand_index[hash(hand_node.hand)]
+
+    def remove_hand(self, hand: Hand) -> bool:
+        """
+        removes a single stored hand; returns whether or not it was stored
+        """
+        hand_dllnode = self._hand_index.get(hash(hand))
+        if hand_dllnode is None:
+            return False
+        self._remove_hand_dllnode(hand_dllnode)
+        return True
+
     def remove_card(self, card: int) -> None:
-        for hand_pointer_node in self[card]:
-            hand_pointer_dllnode = hand_pointer_node.hand_pointer_dllnode
-            hand_dllnode = hand_pointer_node.hand_dllnode
-            hand_node = hand_dllnode.value
-            for card_node in hand_node:
-                if card_node.hand_pointer_dllnode is hand_pointer_dllnode:
-                    continue
-                self[card_node.card].remove(card_node.hand_pointer_dllnode)
-            hand_node.remove_hand()
-            self._hands.remove(hand_dllnode)
+        hand_dllnodes = [hand_pointer_node.hand_dllnode
+                         for hand_pointer_node in self._hand_pointers(card)]
+        for hand_dllnode in hand_dllnodes:
+            self._remove_hand_dllnode(hand_dllnode)
         emit('remove card', {'card': int(card)}, room=self._player_sid)
         self[card] = None
+        self._card_mask ^= 1 << (int(card) - 1)
+        self._selected_mask &= ~(1 << (int(card) - 1))
+        if self._combos is not None:
+            self._combos.remove_card(int(card))
         self._num_cards -= 1
         if self._num_cards == 0:
             emit('finished')
 
     def add_card(self, card: int) -> None:
         self[card] = dllist()
+        self._card_generations[card] = self._generation
+        self._card_mask |= 1 << (int(card) - 1)
+        if self._combos is not None:
+            self._combos.add_card(int(card))
         self._num_cards += 1
         emit('add card', {'card': int(card)}, room=self._player_sid)
 
     def clear_hands(self) -> None:
-        for hand_node in self._hands:
-            hand_node.remove_hand()
-        self._hands.clear()
-        self._reset_card_dllists()
+        self._generation += 1
+        if self._hands.size:
+            self._retired_hands.append(self._hands)
+            self._hands = dllist()
+        self._hand_index = dict()
+        self._card_slots = [0] * 53
+        self._slot_hands = list()
+        self._free_slots = list()
+        emit('clear stored hands', broadcast=False)
 
-    def _reset_card_dllists(self) -> None:  # TODO: can be done better
-        for card, dll in enumerate(self._cards):
-            if dll is not None:
-                self[card].clear()
+    def _count_selected_cards(self, deselected_mask: int,
+                              selected_mask: int) -> None:
+        for card in cards_of(deselected_mask):
+            for hand_pointer_node in self._hand_pointers(card):
+                hand_pointer_node.hand_dllnode.value._num_cards_selected -= 1
+        for card in cards_of(selected_mask):
+            for hand_pointer_node in self._hand_pointers(card):
+                hand_pointer_node.hand_dllnode.value._num_cards_selected += 1
 
     def contains_card(self, card: int) -> bool:
         return self._cards[card] is not None
 
     def contains_hand(self, hand: Hand) -> bool:
-        for hand_node in self._hands:
-            if hand_node.hand == hand:
-                return True
-        return False
+        return hash(hand) in self._hand_index
 
     def iter_cards(self) -> Generator[int, None, None]:
-        for card in range(1, 53):
-            if self.contains_card(card):
-                yield card
+        mask = self._card_mask
+        while mask:
+            lowest_bit = mask & -mask
+            yield lowest_bit.bit_length()
+            mask ^= lowest_bit
 
 
 class HandPointerNode:  # contained by a hand_pointer_dllnode
+    __slots__ = ('hand_dllnode', 'hand_pointer_dllnode')
+
     def __init__(self, hand_pointer_dllnode: dllistnode) -> None:
         self.hand_dllnode = None
         self.hand_pointer_dllnode = hand_pointer_dllnode
@@ -117,16 +374,23 @@ class HandPointerNode:  # contained by a hand_pointer_dllnode
 
 
 class ConsciousHandNode:  # contained by a hand_dllnode
+    __slots__ = ('hand', 'slot', '_num_cards_selected', '_card_nodes')
+
     def __init__(self, hand: Hand, hand_dllnode: dllistnode,
+                 cards: List[int],
                  hand_pointer_nodes: List[HandPointerNode]) -> None:
-        self.hand = Hand.copy(hand)
+        self.reuse(hand, hand_dllnode, cards, hand_pointer_nodes)
+
+    def reuse(self, hand: Hand, hand_dllnode: dllistnode, cards: List[int],
+              hand_pointer_nodes: List[HandPointerNode]) -> None:
+        self.hand = FrozenHand.of(hand)
+        self.slot = 0  # set by the chamber
         self._num_cards_selected = 0
-        self._card_nodes: List[CardNode] = list()
-        for card, hand_pointer_node in zip(hand, hand_pointer_nodes):
+        for hand_pointer_node in hand_pointer_nodes:
             hand_pointer_node.set_hand_dllnode(hand_dllnode)
-            card_node = CardNode(card, hand_pointer_node.hand_pointer_dllnode)
-            self._card_nodes.append(card_node)
-        self.store_hand()
+        self._card_nodes: Tuple[CardNode, ...] = tuple(
+            [CardNode(card, hand_pointer_node.hand_pointer_dllnode)
+             for card, hand_pointer_node in zip(cards, hand_pointer_nodes)])
 
     def __iter__(self):
         return self._card_nodes.__iter__()
@@ -151,10 +415,9 @@ class ConsciousHandNode:  # contained by a hand_dllnode
         emit('remove hand', {'hand': str(self)}, broadcast=False)
 
 
-class CardNode:
-    def __init__(self, card: int, hand_pointer_dllnode: dllistnode) -> None:
-        self.card = card
-        self.hand_pointer_dllnode = hand_pointer_dllnode
+class CardNode(NamedTuple):
+    card: int
+    hand_pointer_dllnode: dllistnode
 
     def __repr__(self) -> str:
         return f"CardNode({str(self.card)})"
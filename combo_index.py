@@ -0,0 +1,92 @@
+"""
+incremental index of every valid hand a player's cards can make
+
+hands are bucketed by id and then by rank, so iterating over the buckets
+of an id visits its hands from the weakest to the strongest and finding
+the hands that beat a hand only looks at the buckets above its rank.
+every card also knows the hands it is part of: removing a card drops
+just those hands and adding one builds just the hands it completes (see
+legal_hands.hand_masks_with), so the index never rescans the holding.
+"""
+from typing import Dict, Iterable, Iterator, List, Set
+from frozen_hand import FrozenHand
+from hand_trie import mask_of
+from legal_hands import hand_masks, hand_masks_with
+
+
+class ComboIndex:
+
+    def __init__(self, cards: Iterable[int]=()) -> None:
+        self._mask = mask_of(cards)
+        # hand mask -> hand
+        self._hands: Dict[int, FrozenHand] = dict()
+        # card -> masks of the hands the card is part of
+        self._hands_with: List[Set[int]] = [set() for _ in range(53)]
+        # id -> rank -> hand mask -> hand
+        self._buckets: Dict[int, List[Dict[int, FrozenHand]]] = {
+            id: [dict() for _ in range(53)] for id in hand_masks_with
+        }
+        for masks in hand_masks.values():
+            for hand_mask in masks(self._mask):
+                self._insert(hand_mask)
+
+    def __len__(self) -> int:
+        return len(self._hands)
+
+    def __contains__(self, hand) -> bool:
+        return mask_of(hand) in self._hands
+
+    def __iter__(self) -> Iterator[FrozenHand]:
+        for id in self._buckets:
+            yield from self.hands(id)
+
+    def hands(self, id: int) -> Iterator[FrozenHand]:
+        """
+        the hands of an id from the weakest to the strongest
+        """
+        for bucket in self._buckets[id]:
+            yield from bucket.values()
+
+    def _insert(self, hand_mask: int) -> None:
+        hand = FrozenHand.from_mask(hand_mask)
+        self._hands[hand_mask] = hand
+        self._buckets[hand._id][hand._rank][hand_mask] = hand
+        for hand_card in hand:
+            self._hands_with[hand_card].add(hand_mask)
+
+    def add_card(self, card: int) -> None:
+        bit = 1 << (card - 1)
+        assert not self._mask & bit, f"Bug: card ({card}) already indexed."
+        self._mask |= bit
+        for masks_with in hand_masks_with.values():
+            for hand_mask in masks_with(self._mask, card):
+                self._insert(hand_mask)
+
+    def remove_card(self, card: int) -> None:
+        bit = 1 << (card - 1)
+        assert self._mask & bit, f"Bug: card ({card}) is not indexed."
+        self._mask ^= bit
+        for hand_mask in self._hands_with[card]:
+            hand = self._hands.pop(hand_mask)
+            del self._buckets[hand._id][hand._rank][hand_mask]
+            for hand_card in hand:
+                if hand_card != card:
+                    self._hands_with[hand_card].discard(hand_mask)
+        self._hands_with[card] = set()
+
+    def _beating_buckets(self, hand) -> Iterator[Dict[int, FrozenHand]]:
+        # the same order as legal_hands.strength
+        yield from self._buckets[hand._id][hand._rank + 1:]
+        if hand._id != 53:  # bombs can be played on anything
+            yield from self._buckets[53]
+
+    def hands_beating(self, hand) -> List[FrozenHand]:
+        """
+        every indexed hand that can be played on hand, from the weakest to
+        the strongest
+        """
+        return [beating for bucket in self._beating_buckets(hand)
+                for beating in bucket.values()]
+
+    def can_beat(self, hand) -> bool:
+        return any(self._beating_buckets(hand))
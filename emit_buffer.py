@@ -0,0 +1,98 @@
+"""
+batched client updates
+
+while an inbound socket event is handled by a buffered handler, emit
+only records the client updates it is asked to send; when the handler
+returns they are flushed as a single 'state delta' message per
+recipient holding that recipient's events in order, e.g.
+
+    {'events': [['select card', {'card': 3}], ['clear display']]}
+
+rooms are resolved to the session ids in them at emit time, so the
+sender of an event that is also sent to their room gets everything in
+one message in the order it was emitted; a recipient with a single
+event gets it as is
+
+emits made inside captured() (see game_engine) are only collected and
+need neither Flask nor Socket.IO
+"""
+from contextlib import contextmanager
+from flask import current_app, g, request
+from flask_socketio import emit as socketio_emit
+from functools import wraps
+from typing import Callable, Dict, Iterator, List, Tuple
+
+# the innermost captured() collects the emits
+_outboxes: List[List[Tuple[str, tuple, str]]] = list()
+
+
+def emit(event: str, *args, room: str=None, broadcast: bool=False,
+         **kwargs) -> None:
+    if _outboxes:
+        assert not kwargs and not broadcast, \
+            "Bug: only room can be captured."
+        _outboxes[-1].append((event, args, room))
+        return
+    buffer: Dict[str, List[list]] = g.get('emit_buffer')
+    if buffer is None:
+        socketio_emit(event, *args, room=room, broadcast=broadcast, **kwargs)
+        return
+    assert not kwargs, "Bug: only room and broadcast can be buffered."
+    if room is None and not broadcast:
+        sids = [request.sid]
+    else:
+        # every session is in the room None of its namespace
+        manager = current_app.extensions['socketio'].server.manager
+        sids = [sid for sid, _ in
+                manager.get_participants(request.namespace, room)]
+    update = [event, *args]
+    for sid in sids:
+        buffer.setdefault(sid, list()).append(update)
+
+
+@contextmanager
+def captured() -> Iterator[List[Tuple[str, tuple, str]]]:
+    """
+    collects the (event, args, room) of every emit made inside the with
+    block instead of sending it; room is None for the sender
+
+    nothing inside may yield to another greenlet, which the game rules
+    never do
+    """
+    outbox: List[Tuple[str, tuple, str]] = list()
+    _outboxes.append(outbox)
+    try:
+        yield outbox
+    finally:
+        _outboxes.pop()
+
+
+def flush() -> None:
+    buffer: Dict[str, List[list]] = g.pop('emit_buffer')
+    # every sid was found in this worker's rooms, so no other worker has
+    # to hear about it through the message queue
+    for sid, updates in buffer.items():
+        if len(updates) == 1:
+            socketio_emit(*updates[0], room=sid, ignore_queue=True)
+        else:
+            socketio_emit('state delta', {'events': updates}, room=sid,
+                          ignore_queue=True)
+
+
+def buffered(handler: Callable) -> Callable:
+    """
+    decorator for socket event handlers that batches the emits made while
+    handling the event; handlers called from a buffered handler share
+    its buffer
+    """
+    @wraps(handler)
+    def wrapper(*args, **kwargs):
+        if (not current_app.config.get('BUFFER_EMITS') or
+                'emit_buffer' in g):
+            return handler(*args, **kwargs)
+        g.emit_buffer = dict()
+        try:
+            return handler(*args, **kwargs)
+        finally:
+            flush()
+    return wrapper
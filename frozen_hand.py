@@ -0,0 +1,142 @@
+import hand_trie
+
+from hand import card_names, ComparableHand
+from typing import Dict, Iterator, Tuple, Union
+from json import dumps
+
+
+# hand hash -> the one FrozenHand of every valid hand seen so far
+intern_table: Dict[int, "FrozenHand"] = dict()
+
+
+class FrozenHand(ComparableHand):
+    """
+    Immutable snapshot of a Hand (or BitmaskHand) for hands that are
+    stored or played and never change again. Valid hands are interned by
+    their hand hash, so there is at most one FrozenHand per valid hand
+    (~14k of them), copying one is free, and identity comparison is
+    equality. The string, json, and hash of every interned hand are
+    computed once and cached.
+
+    Use FrozenHand.of instead of the constructor.
+    """
+
+    __slots__ = ('_cards', '_id', '_rank', '_mask', '_hash', '_str', '_json')
+
+    def __init__(self, _cards: Tuple[int, ...], _id: int, _rank: int,
+                 _hash: int) -> None:
+        self._cards = _cards
+        self._id = _id
+        self._rank = _rank
+        self._hash = _hash
+        self._mask = 0
+        for card in _cards:
+            if card:
+                self._mask |= 1 << (card - 1)
+        self._str = " ".join([card_names[card] for card in self]) + \
+            f": {self.id_desc}"
+        self._json = dumps({'_cards': list(_cards), '_id': _id,
+                            '_insertion_index': self._insertion_index,
+                            '_rank': _rank})
+
+    @classmethod
+    def of(cls, hand) -> "FrozenHand":
+        """
+        the interned FrozenHand of a valid hand, or a new one if the hand
+        is invalid
+        """
+        if type(hand) is cls:
+            return hand
+        h = hash(hand)
+        try:
+            return intern_table[h]
+        except KeyError:
+            frozen_hand = cls(tuple(map(int, hand._cards)), hand._id,
+                              hand._rank, h)
+            if frozen_hand.is_valid:
+                intern_table[h] = frozen_hand
+            return frozen_hand
+
+    @classmethod
+    def from_mask(cls, mask: int) -> "FrozenHand":
+        """
+        the (interned, if valid) FrozenHand of a card mask
+        """
+        cards = list()
+        h = 0
+        remaining = mask
+        while remaining:
+            bit = remaining & -remaining
+            card = bit.bit_length()
+            cards.append(card)
+            h = h * 53 + card
+            remaining ^= bit
+        h *= 53
+        try:
+            return intern_table[h]
+        except KeyError:
+            id, rank = hand_trie.identify(mask, len(cards))
+            frozen_hand = cls((0,) * (5 - len(cards)) + tuple(cards), id,
+                              rank, h)
+            if frozen_hand.is_valid:
+                intern_table[h] = frozen_hand
+            return frozen_hand
+
+    @classmethod
+    def from_bytes(cls, packed: bytes) -> "FrozenHand":
+        # see Hand.to_bytes
+        return cls.from_mask(hand_trie.mask_of(card for card in packed[:5]
+                                               if card))
+
+    @classmethod
+    def copy(cls, hand: "FrozenHand") -> "FrozenHand":
+        return hand
+
+    def __getitem__(self, key: Union[int, slice]) -> int:
+        return self._cards[key]
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __contains__(self, card: int) -> bool:
+        assert 1 <= card <= 52, "Bug: invalid card cannot be in hand."
+        return bool(self._mask >> (card - 1) & 1)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._cards[self._insertion_index + 1:])
+
+    def __str__(self) -> str:
+        return self._str
+
+    def __repr__(self) -> str:
+        return f"cards: {self._cards}; id: {self._id}; rank: {self._rank}"
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is FrozenHand:
+            return self._hash == other._hash  # type: ignore
+        return (self._id == other._id and  # type: ignore
+                self._cards == tuple(other._cards))  # type: ignore
+
+    @property
+    def _insertion_index(self) -> int:
+        return 4 - self._number_of_cards
+
+    @property
+    def _number_of_cards(self) -> int:
+        return 5 - self._cards.count(0)
+
+    @property
+    def is_full(self) -> bool:
+        return self._cards[0] != 0
+
+    def intersects(self, other) -> bool:
+        if type(other) is FrozenHand:
+            return self._mask & other._mask != 0
+        return any(card in self for card in other)
+
+    def to_json(self) -> str:
+        return self._json
+
+    def to_bytes(self) -> bytes:
+        # same 6 bytes as Hand.to_bytes
+        return bytes(self._cards) + bytes((self._id,))
@@ -0,0 +1,866 @@
+"""
+the rules of presidents without a transport
+
+a GameEngine holds every room and seat and is driven by actions, one
+method per thing a player can do, each taking the acting player's sid;
+an action returns the events it caused as Events addressed to a sid or
+a room name, which is all app.main.events needs to send them over
+Socket.IO, and which simulations, tests, and benchmarks can use as is
+without Flask
+
+the card hand chambers and the helpers below still call emit, which
+the engine collects with emit_buffer.captured
+
+given a state store (see state_store), the engine also writes the room
+an action touched to the store after the action, in one commit
+
+snapshot and restore carry every room over a restart of the worker;
+restored seats wait for their players, who get them back by joining the
+same room under the same name, since their sids are new
+"""
+import gc
+import logging
+import struct
+import numpy as np
+
+from hand import Hand, DuplicateCardError, FullHandError, STRONGER, WEAKER
+from frozen_hand import FrozenHand
+from card_hand_chamber import CardHandChamber, unpack_snapshot
+from hand_trie import mask_of, cards_of, completing_cards
+from room import (Room, Seat, Start, pack_room, packed_room_name,
+                  unpack_room)
+from state_store import DoesNotFitError, StateStore
+from emit_buffer import emit, captured
+from bidict import bidict
+from functools import wraps
+from itertools import cycle
+from numbers import Integral
+from random import shuffle
+from typing import Callable, Dict, Iterable, List, NamedTuple, Set
+
+
+logger = logging.getLogger(__name__)
+
+
+class Event(NamedTuple):
+    name: str
+    args: tuple  # empty or the event's data
+    to: str  # a sid or a room name
+
+
+# magic, version, and number of rooms, followed by the length and then
+# the pack_room of each room
+_snapshot_header = struct.Struct('<4sBI')
+_room_length = struct.Struct('<I')
+SNAPSHOT_MAGIC = b'PRES'
+SNAPSHOT_VERSION = 1
+
+
+# this is from number of unfinished players to position
+position_dict: Dict[int, str] = {
+    1: 'asshole',
+    2: 'vice asshole',
+    3: 'vice president',
+    4: 'president'
+}
+
+
+def action(method: Callable) -> Callable:
+    """
+    decorator for the actions of GameEngine: runs the action and returns
+    the events emitted meanwhile, the ones without a room being for the
+    acting player; the acting player's room is then written to the state
+    store
+    """
+    @wraps(method)
+    def wrapper(self, player_sid: str, *args) -> List[Event]:
+        if self.state_store is None:
+            with captured() as outbox:
+                method(self, player_sid, *args)
+        else:
+            seat = self.seats.get(player_sid)
+            with captured() as outbox:
+                method(self, player_sid, *args)
+            # the seat is made by join and gone after leave
+            seat = seat or self.seats.get(player_sid)
+            if seat is not None:
+                self._write_room(seat.room)
+        return [Event(event, args, player_sid if room is None else room)
+                for event, args, room in outbox]
+    return wrapper
+
+
+class GameEngine:
+
+    def __init__(self, new_card_hand_chamber: Callable=CardHandChamber,
+                 restore_card_hand_chamber: Callable=CardHandChamber.restore,
+                 state_store: StateStore=None) -> None:
+        # called with the cards and the sid of a player when dealing
+        self.new_card_hand_chamber = new_card_hand_chamber
+        # called with a chamber snapshot and the sid when loading a room
+        self.restore_card_hand_chamber = restore_card_hand_chamber
+        self.state_store = state_store
+        # the rooms in use and the seats of the players in them; see leave
+        self.rooms: Dict[str, Room] = dict()
+        # TODO: should not be a dict from sid so another player can take over
+        self.seats: Dict[str, Seat] = dict()
+        # the sids of restored seats whose players have not joined again
+        self.unclaimed_sids: Set[str] = set()
+
+    def load(self, owned: Callable[[str], bool]=lambda room: True) -> None:
+        """
+        takes over every room in the store that owned says is this
+        worker's, other than rooms it already holds, with every seat
+        unclaimed
+        """
+        for room in self.state_store.rooms():
+            if room in self.rooms or not owned(room):
+                continue
+            packed = self.state_store.read(room)
+            if packed is not None:  # unless deleted in the meantime
+                self._load_room(packed)
+                self.unclaimed_sids.update(self.rooms[room].player_sids)
+
+    def snapshot(self) -> bytes:
+        """
+        every room as bytes, e.g. to be restored after a restart
+        """
+        parts = [_snapshot_header.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION,
+                                       len(self.rooms))]
+        for room in self.rooms:
+            packed = self._pack_room(room)
+            parts += (_room_length.pack(len(packed)), packed)
+        return b"".join(parts)
+
+    def restore(self, snapshot: bytes,
+                owned: Callable[[str], bool]=lambda room: True) -> None:
+        """
+        takes over every room of a snapshot that owned says is this
+        worker's, with every seat unclaimed
+        """
+        magic, version, num_rooms = _snapshot_header.unpack_from(snapshot)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            raise ValueError("Not a snapshot of this version.")
+        offset = _snapshot_header.size
+        # every object made here is kept, so the collector scanning them
+        # over and over while they are made would find nothing
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for _ in range(num_rooms):
+                length, = _room_length.unpack_from(snapshot, offset)
+                offset += _room_length.size
+                packed = snapshot[offset:offset + length]
+                offset += length
+                if owned(packed_room_name(packed)):
+                    room = self._load_room(packed)
+                    self.unclaimed_sids.update(self.rooms[room].player_sids)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+    def release_unclaimed_seats(self) -> List[Event]:
+        """
+        lets every restored player who has not joined again leave
+        """
+        events = list()
+        for player_sid in list(self.unclaimed_sids):
+            events += self.leave(player_sid)
+        return events
+
+    def _load_room(self, packed: bytes) -> str:
+        room, seats = unpack_room(packed, self.restore_card_hand_chamber)
+        self.rooms[room.name] = room
+        for seat in seats:
+            self.seats[seat.sid] = seat
+        self._resume_turns(room.name)
+        return room.name
+
+    def _resume_turns(self, room: str) -> None:
+        # the generator of turns is not stored, only whose turn it is
+        room = self.rooms[room]
+        if room.current_player is not None:
+            room.player_cycler = self._turn_generator(
+                room.name, room.player_sids.index(room.current_player))
+            next(room.player_cycler)
+
+    def _pack_room(self, room: str) -> bytes:
+        return pack_room(self.rooms[room],
+                         [self.seats[player_sid]
+                          for player_sid in self.rooms[room].player_sids])
+
+    def _write_room(self, room: str) -> None:
+        if room in self.rooms:
+            try:
+                self.state_store.commit({room: self._pack_room(room)})
+                return
+            except DoesNotFitError:
+                # the action already happened, so the game goes on in
+                # memory; the copy in the store can no longer be kept up
+                # to date and must not be loaded instead
+                logger.warning("Room %r does not fit in the state store.",
+                               room)
+        self.state_store.commit({}, [room])
+
+    # the actions
+
+    @action
+    def join(self, player_sid: str, room: str, name: str) -> None:
+        if room in self.rooms:
+            for old_sid in self.rooms[room].player_sids:
+                if (old_sid in self.unclaimed_sids and
+                        self.seats[old_sid].name == name):
+                    self._rejoin(old_sid, player_sid)
+                    return
+        else:
+            self.rooms[room] = Room(room)
+        self.rooms[room].player_sids.append(player_sid)
+        self.seats[player_sid] = Seat(player_sid, name, room)
+        emit('status', {'msg': f"{name}" + ' has entered the room.'}, room=room)
+        if len(self.rooms[room].player_sids) == 4:
+            self._start_game(room)
+
+    @action
+    def leave(self, player_sid: str) -> None:
+        """
+        tears down the seat of a player who left or disconnected, ends the
+        game the player was in, and tears down the room once it is empty
+        """
+        seat = self.seats.pop(player_sid, None)
+        if seat is None:  # already removed, e.g. 'left' and then 'disconnect'
+            return
+        self.unclaimed_sids.discard(player_sid)
+        room = self.rooms[seat.room]
+        room.player_sids.remove(player_sid)
+        if room.is_empty:
+            del self.rooms[seat.room]
+        elif room.in_game:
+            self._end_game(seat.room)
+            message_game_ended(seat.room, seat.name)
+        seat.end_game()
+        emit('status', {'msg': f"{seat.name} has left the room."}, room=seat.room)
+
+    @action
+    def text(self, player_sid: str, msg: str) -> None:
+        seat = self.seats[player_sid]
+        emit('message', {'msg': f"{seat.name}: {msg}"}, room=seat.room)
+
+    @action
+    def play_current_hand(self, player_sid: str) -> None:
+        room = self.seats[player_sid].room
+        if self.rooms[room].currently_trading:
+            alert_trading_ongoing()
+            return
+        name = self.seats[player_sid].name
+        if player_sid != self.rooms[room].current_player:
+            alert_can_only_play_on_turn()
+            return
+        hand = self.seats[player_sid].current_hand
+        if not hand.is_valid:
+            alert_playing_invalid_hand()
+            return
+        hand_in_play = self.rooms[room].hand_in_play
+        if hand_in_play is Start:  # hand must contain the 3 of clubs
+            if 1 not in hand:
+                alert_3_of_clubs()
+                return
+            else:
+                self._play_hand(hand, room, player_sid, name)
+        elif hand_in_play is None:
+            self._play_hand(hand, room, player_sid, name)
+        else:
+            result = hand.compare(hand_in_play)
+            if result == STRONGER:
+                self._play_hand(hand, room, player_sid, name)
+                return
+            # tells the player when passing is all that is left
+            chamber = self.seats[player_sid].card_hand_chamber
+            can_beat = chamber.combos.can_beat(hand_in_play)
+            if result == WEAKER:
+                alert_weaker_hand(can_beat)
+            else:
+                alert_incomparable_hand(hand, hand_in_play, can_beat)
+
+    @action
+    def pass_current_hand(self, player_sid: str) -> None:
+        room = self.seats[player_sid].room
+        if self.rooms[room].currently_trading:
+            alert_trading_ongoing()
+            return
+        name = self.seats[player_sid].name
+        if player_sid != self.rooms[room].current_player:
+            alert_can_only_pass_on_turn()
+            return
+        hand_in_play = self.rooms[room].hand_in_play
+        if hand_in_play is Start:
+            alert_must_play_3_of_clubs()
+            return
+        if hand_in_play is None:
+            alert_can_play_any_hand()
+            return
+        self.rooms[room].consecutive_passes += 1
+        message_passed(room, name)
+        num_unfinished_players = self.rooms[room].num_unfinished_players
+        consecutive_passes = self.rooms[room].consecutive_passes
+        if self.rooms[room].winning_last:
+            if consecutive_passes == num_unfinished_players:
+                self.rooms[room].hand_in_play = None
+                client_clear_hand_in_play(room)
+                message_default_next_player(room)
+                self._next_player(room)
+                return
+        elif consecutive_passes == num_unfinished_players - 1:
+            self._next_player(room, hand_won=True)
+            self.rooms[room].hand_in_play = None
+            client_clear_hand_in_play(room)
+            return
+        self._next_player(room)
+
+    @action
+    def player_finish(self, player_sid: str) -> None:
+        room = self.seats[player_sid].room
+        name = self.seats[player_sid].name
+        self.rooms[room].finished_player_sids.append(player_sid)
+        num_unfinished_players = self.rooms[room].num_unfinished_players
+        self.rooms[room].positions.put(player_sid, 5 - num_unfinished_players)
+        if num_unfinished_players == 4:
+            self.seats[player_sid].takes_remaining = 2
+            self.seats[player_sid].gives_remaining = 2
+        elif num_unfinished_players == 3:
+            self.seats[player_sid].takes_remaining = 1
+            self.seats[player_sid].gives_remaining = 1
+        self.rooms[room].winning_last = True
+        message_player_finished(room, name, position_dict[num_unfinished_players])
+        self._decrement_unfinished_players(room, name)
+
+    # TODO: currently doesn't ask just takes the minimum matching
+    @action
+    def ask_for_card(self, asker: str, value: int) -> None:
+        if not is_value(value):
+            return
+        room = self.seats[asker].room
+        if self.seats[asker].takes_remaining == 0:
+            alert_no_more_takes()
+            return
+        position_bidict = self.rooms[room].positions
+        asker_position = position_bidict[asker]
+        asked = position_bidict.inv[5 - asker_position]
+        card_hand_chamber_asker = self.seats[asker].card_hand_chamber
+        card_hand_chamber_asked = self.seats[asked].card_hand_chamber
+        if not card_hand_chamber_asked.count_rank(value - 1):
+            alert_other_player_does_not_have_value()
+            return
+        card = card_hand_chamber_asked.lowest_of_rank(value - 1)
+        card_hand_chamber_asked.remove_card(card)
+        card_hand_chamber_asker.add_card(card)
+        self.seats[asker].takes_remaining -= 1
+        if self._finished_taking_and_giving(asker) and self._finished_taking_and_giving(position_bidict.inv[other_winner(asker_position)]):
+            self._end_trading_and_remove_trading_buttons_and_start_game(room)
+
+    @action
+    def give_current_card(self, giver: str) -> None:
+        room = self.seats[giver].room
+        if self.seats[giver].gives_remaining == 0:
+            alert_no_more_gives()
+            return
+        hand = self.seats[giver].current_hand
+        if not hand.is_single:
+            alert_can_only_give_singles()
+            return
+        position_bidict = self.rooms[room].positions
+        giver_position = position_bidict[giver]
+        givee = position_bidict.inv[5 - giver_position]
+        card_hand_chamber_giver = self.seats[giver].card_hand_chamber
+        card_hand_chamber_givee = self.seats[givee].card_hand_chamber
+        for card in hand:  # happens only once
+            self._client_clear_current_hand(giver)
+            card_hand_chamber_giver.remove_card(card)
+            card_hand_chamber_givee.add_card(card)
+            self.seats[giver].gives_remaining -= 1
+            if self._finished_taking_and_giving(giver) and self._finished_taking_and_giving(position_bidict.inv[other_winner(giver_position)]):
+                self._end_trading_and_remove_trading_buttons_and_start_game(room)
+            return
+
+    @action
+    def card_click(self, player_sid: str, card: int) -> None:
+        hand = self.seats[player_sid].current_hand
+        card_hand_chamber = self.seats[player_sid].card_hand_chamber
+        add_or_remove_card(card, hand, card_hand_chamber)
+        client_update_current_hand(hand, player_sid)
+        client_update_completing_cards(hand, card_hand_chamber, player_sid)
+        client_update_conflicting_hands(hand, card_hand_chamber, player_sid)
+
+    @action
+    def hand_click(self, player_sid: str, cards: Iterable[int]) -> None:
+        hand = self.seats[player_sid].current_hand
+        card_hand_chamber = self.seats[player_sid].card_hand_chamber
+        self._client_clear_current_hand(player_sid)
+        for card in cards:
+            add_or_remove_card(card, hand, card_hand_chamber)
+        client_update_current_hand(hand, player_sid)
+        client_update_completing_cards(hand, card_hand_chamber, player_sid)
+        client_update_conflicting_hands(hand, card_hand_chamber, player_sid)
+
+    @action
+    def set_selection(self, player_sid: str, cards: Iterable[int]) -> None:
+        """
+        selects exactly the given cards, whether one card was toggled or a
+        stored hand was clicked, and answers with a single 'selection'
+        """
+        hand = self.seats[player_sid].current_hand
+        card_hand_chamber = self.seats[player_sid].card_hand_chamber
+        # cards that were played or given away in the meantime are dropped
+        selected_mask = \
+            mask_of(cards_in_deck(cards)) & card_hand_chamber.card_mask
+        if bin(selected_mask).count('1') > 5:
+            alert_current_hand_full()
+            selected_mask = mask_of(hand)
+        hand.set_cards(cards_of(selected_mask))
+        selected_hands, deselected_hands = \
+            card_hand_chamber.set_selected_mask(selected_mask)
+        client_update_selection(hand, card_hand_chamber, selected_hands,
+                                deselected_hands, player_sid)
+
+    @action
+    def clear_current_hand(self, player_sid: str) -> None:
+        self._client_clear_current_hand(player_sid)
+        alert_current_hand_cleared()
+
+    @action
+    def store(self, player_sid: str) -> None:
+        """
+        stores currently selected cards in a hand
+        """
+        hand = FrozenHand.of(self.seats[player_sid].current_hand)
+        if not hand.is_valid:
+            alert_invalid_hand_storage()
+            return
+        elif hand.is_single:
+            alert_single_storage()
+            return
+        card_hand_chamber = self.seats[player_sid].card_hand_chamber
+        if card_hand_chamber.contains_hand(hand):
+            alert_hand_already_stored()
+            return
+        self._client_clear_current_hand(player_sid)
+        card_hand_chamber.add_hand(hand)
+
+    @action
+    def clear_stored_hands(self, player_sid: str) -> None:
+        self.seats[player_sid].card_hand_chamber.clear_hands()
+
+    @action
+    def remove_stored_hand(self, player_sid: str, cards: Iterable[int]) -> None:
+        mask = mask_of(cards_in_deck(cards))
+        if not mask or bin(mask).count('1') > 5:  # cannot be a stored hand
+            return
+        card_hand_chamber = self.seats[player_sid].card_hand_chamber
+        hand = FrozenHand.from_mask(mask)
+        if card_hand_chamber.contains_hand(hand):
+            card_hand_chamber.remove_hand(hand)
+
+    # the rules behind them
+
+    def _rejoin(self, old_sid: str, player_sid: str) -> None:
+        """
+        hands the restored seat of old_sid to player_sid, a new connection
+        of the same player, and shows the player the state of the game
+        """
+        self.unclaimed_sids.remove(old_sid)
+        seat = self.seats.pop(old_sid)
+        seat.sid = player_sid
+        self.seats[player_sid] = seat
+        room = self.rooms[seat.room]
+        room.player_sids[room.player_sids.index(old_sid)] = player_sid
+        room.finished_player_sids = [
+            player_sid if sid == old_sid else sid
+            for sid in room.finished_player_sids]
+        if old_sid in room.positions:
+            room.positions.put(player_sid, room.positions.pop(old_sid))
+        if room.current_player == old_sid:
+            room.current_player = player_sid
+        # the cycle behind the generator of turns holds the old sid
+        self._resume_turns(seat.room)
+        seat.current_hand.reset()
+        emit('status', {'msg': f"{seat.name} is back in the room."},
+             room=seat.room)
+        snapshot = seat.pack_card_hand_chamber()
+        if not snapshot:  # no cards were dealt
+            return
+        # the chamber emits to the sid it was made with, so it is restored
+        # again, for the new sid, if it was needed before the player came
+        seat.unpack_card_hand_chamber(snapshot, self.restore_card_hand_chamber)
+        chamber = seat.card_hand_chamber
+        chamber.set_selected_mask(0)
+        emit('assign cards', {'cards': list(chamber.iter_cards())},
+             room=player_sid)
+        for hand in unpack_snapshot(chamber.snapshot())[2]:
+            emit('store hand', {'hand': str(hand), 'cards': list(hand)},
+                 room=player_sid)
+        if isinstance(room.hand_in_play, FrozenHand):
+            client_update_hand_in_play(room.hand_in_play, player_sid)
+        if room.currently_trading and room.positions.get(player_sid) in [1, 2]:
+            client_add_trading_options(player_sid)
+            client_add_give_card_button(player_sid)
+        if room.current_player is not None and not room.currently_trading:
+            name = self.seats[room.current_player].name
+            emit('message', {'msg': f"SERVER: it's {name}'s turn!"},
+                 room=player_sid)
+
+    def _start_game(self, room):
+        self.rooms[room].end_game()
+        self._deal_cards_and_establish_turn_order(room)
+        self.rooms[room].hand_in_play = Start
+
+    def _end_game(self, room):
+        emit('clear hand in play', room=room)
+        emit('clear display', room=room)
+        emit('clear stored hands', room=room)
+        emit('clear cards', room=room)
+        if self.rooms[room].currently_trading:
+            client_remove_trading_options(room)
+            client_remove_give_card_button(room)
+        self.rooms[room].end_game()
+        for player_sid in self.rooms[room].player_sids:
+            self.seats[player_sid].end_game()
+
+    def _deal_cards_and_establish_turn_order(self, room):
+        deck = np.arange(1, 53)
+        np.random.shuffle(deck)
+        decks = deck.reshape(4, 13)
+        decks.sort(axis=1)  # sorts each deck
+        c3_index = np.where(decks == 1)[0][0]  # which deck has the 3 of clubs
+        player_cycler = self.rooms[room].player_cycler = self._turn_generator(room, c3_index)
+        self.rooms[room].current_player = next(player_cycler)
+        for player_sid, deck in zip(self.rooms[room].player_sids, decks):
+            emit('assign cards', {'cards': deck.tolist()}, room=player_sid)
+            self.seats[player_sid].card_hand_chamber = self.new_card_hand_chamber(deck, player_sid)
+
+    def _turn_generator(self, room, starting_player_index):
+        player_cycle = cycle(self.rooms[room].player_sids)
+        # iterates to the current player
+        for _ in range(starting_player_index):
+            next(player_cycle)
+        yield from player_cycle
+
+    def _next_player(self, room, hand_won=False):
+        player_cycler = self.rooms[room].player_cycler
+        current_player = next(player_cycler)
+        finished_player_sids = self.rooms[room].finished_player_sids
+        while current_player in finished_player_sids:
+            current_player = next(player_cycler)
+        self.rooms[room].current_player = current_player
+        name = self.seats[current_player].name
+        if hand_won:
+            message_hand_won(room, name)
+        emit('message', {'msg': f"SERVER: it's {name}'s turn!"}, room=room)
+
+    def _play_hand(self, hand: Hand, room: str, player_sid: str, name: str):
+        hand_copy = FrozenHand.of(hand)
+        self.rooms[room].hand_in_play = hand_copy
+        client_update_hand_in_play(hand_copy, room)
+        message_hand_played(hand_copy, room, name)
+        card_hand_chamber = self.seats[player_sid].card_hand_chamber
+        self._client_clear_current_hand(player_sid)
+        self.rooms[room].winning_last = False
+        # TODO: put this in a function called server clear current hand or something
+        for card in hand_copy:
+            card_hand_chamber.remove_card(card)
+        self.rooms[room].consecutive_passes = 0
+        self._next_player(room)
+
+    def _decrement_unfinished_players(self, room, name):
+        self.rooms[room].num_unfinished_players -= 1
+        num_unfinished_players = self.rooms[room].num_unfinished_players
+        if num_unfinished_players == 1:
+            # TODO: this is terrible
+            for player_sid in self.rooms[room].player_sids:
+                if player_sid not in self.rooms[room].finished_player_sids:
+                    self.rooms[room].positions.put(player_sid, 5 - num_unfinished_players)
+                    break
+            message_player_finished(room, self.seats[player_sid].name, position_dict[1])
+            self._end_game_due_diligence(room)
+
+    def _end_game_due_diligence(self, room):
+        # TODO: functionize this; it is currently a frankenstein's monster
+        emit('clear hand in play', room=room)
+        emit('clear current hands', room=room)
+        emit('clear stored hands', room=room)
+        emit('clear cards', room=room)
+        self.rooms[room].hand_in_play = Start
+        self.rooms[room].finished_player_sids = list()
+        self.rooms[room].num_unfinished_players = 4
+        self.rooms[room].consecutive_passes = 0
+        self.rooms[room].winning_last = False
+        deck = np.arange(1, 53)
+        np.random.shuffle(deck)
+        decks = deck.reshape(4, 13)
+        decks.sort(axis=1)  # sorts each deck
+        shuffle(self.rooms[room].player_sids)
+        for player_sid, deck in zip(self.rooms[room].player_sids, decks):
+            emit('assign cards', {'cards': deck.tolist()}, room=player_sid)
+            self.seats[player_sid].card_hand_chamber = self.new_card_hand_chamber(deck, player_sid)
+        message_round_over_trading_begins(room)
+        self._initiate_trading(room)
+
+    def _initiate_trading(self, room: str):
+        positions_bidict = self.rooms[room].positions
+        for player_sid in self.rooms[room].player_sids:
+            if positions_bidict[player_sid] in [1, 2]:
+                client_add_trading_options(player_sid)
+                client_add_give_card_button(player_sid)
+        self.rooms[room].currently_trading = True
+
+    def _end_trading_and_remove_trading_buttons_and_start_game(self, room: str):
+        self.rooms[room].currently_trading = False
+        client_remove_trading_options(room)
+        client_remove_give_card_button(room)
+        c3_index = self._holder_of_3_of_clubs_index(room)
+        player_cycler = self.rooms[room].player_cycler = self._turn_generator(room, c3_index)
+        self.rooms[room].current_player = next(player_cycler)
+        self.rooms[room].positions = bidict()
+        message_trading_concluded(room)
+
+    def _holder_of_3_of_clubs_index(self, room: str) -> int:
+        for index, player_sid in enumerate(self.rooms[room].player_sids):
+            if self.seats[player_sid].card_hand_chamber.card_mask & 1:
+                return index
+        raise AssertionError("Bug: nobody has the 3 of clubs.")
+
+    def _finished_taking_and_giving(self, player_sid: str):
+        return self.seats[player_sid].takes_remaining == 0 and self.seats[player_sid].gives_remaining == 0
+
+    def _client_clear_current_hand(self, player_sid):
+        hand = self.seats[player_sid].current_hand
+        if hand.is_empty:
+            return
+        card_hand_chamber = self.seats[player_sid].card_hand_chamber
+        for card in hand:
+            card_hand_chamber.deselect_card(card)
+        hand.reset()
+        emit('clear current hand', room=player_sid)
+
+
+def cards_in_deck(cards: Iterable) -> List[int]:
+    # what a client sends can be anything
+    return [int(card) for card in cards
+            if isinstance(card, Integral) and 1 <= card <= 52]
+
+
+def is_value(value) -> bool:
+    # what a client sends can be anything; 1 is a 3 and 13 a 2
+    return isinstance(value, Integral) and 1 <= value <= 13
+
+
+def other_winner(position):
+    return 3 - position
+
+
+def add_or_remove_card(card: int, hand: Hand, card_hand_chamber: CardHandChamber):
+    # here, we attempt to add a card that has just been clicked:
+    #   if the card is not in the current hand, it is added
+    #   else, it is remove
+    # particular order is to hopefully minimize exceptions but should be
+    # verified empirically TODO
+    try:
+        hand.add(card)
+        card_hand_chamber.select_card(card)
+    # TODO: should I just pass the error message through no matter the problem?
+    #       what is the point of having these separate errors?
+    except DuplicateCardError:
+        hand.remove(card)
+        card_hand_chamber.deselect_card(card)
+    except FullHandError:
+        alert_current_hand_full()
+        # TODO: why do i need the line below
+        # client_update_current_hand(hand)  # TODO: this one doesn't require changing the session
+        return
+    except Exception as e:
+        print("Bug: probably the card hand chamber freaking out.")
+        raise e
+
+
+def client_update_hand_in_play(hand, room):
+    emit('hand in play', {'hand': str(hand)}, room=room)
+
+
+def client_clear_hand_in_play(room):
+    emit('clear hand in play', room=room)
+
+
+def client_add_trading_options(player_sid: str):
+    emit('add trading options', room=player_sid)
+
+
+def client_remove_trading_options(room: str):
+    emit('remove trading options', room=room)
+
+
+# TODO: implement for a confirmation for asking
+def client_add_ask_for_card_button(player_sid: str):
+    ...
+
+
+def client_add_give_card_button(player_sid: str):
+    emit('add give card button', room=player_sid)
+
+
+def client_remove_give_card_button(room: str):
+    emit('remove give card button', room=room)
+
+
+def client_update_current_hand(hand, player_sid):
+    if hand.is_empty:
+        clear_display()
+        return
+    else:
+        emit('update current hand', {'hand': str(hand)}, room=player_sid)
+
+
+def client_update_completing_cards(hand, card_hand_chamber, player_sid):
+    # the cards that can still be added on the way to a valid hand
+    holding = mask_of(card_hand_chamber.iter_cards())
+    cards = completing_cards(mask_of(hand), holding)
+    emit('completing cards', {'cards': cards}, room=player_sid)
+
+
+def client_update_conflicting_hands(hand, card_hand_chamber, player_sid):
+    # the stored hands that playing the current hand would break up
+    hands = card_hand_chamber.conflicting_hands(hand)
+    emit('conflicting hands', {'hands': list(map(str, hands))},
+         room=player_sid)
+
+
+def client_update_selection(hand, card_hand_chamber, selected_hands,
+                            deselected_hands, player_sid):
+    # everything 'card click' sends spread over several events, in one
+    selected_mask = mask_of(hand)
+    cards = cards_of(selected_mask)
+    emit('selection', {
+        'cards': cards,
+        'hand': '' if hand.is_empty else str(hand),
+        'id': int(hand._id),
+        'valid': bool(hand.is_valid),
+        'select hands': list(map(str, selected_hands)),
+        'deselect hands': list(map(str, deselected_hands)),
+        'completing cards': completing_cards(selected_mask,
+                                             card_hand_chamber.card_mask),
+        'conflicting hands': list(map(str,
+                                      card_hand_chamber.conflicting_hands(cards))),
+    }, room=player_sid)
+
+
+def clear_display():
+    emit('clear display')
+
+
+def alert_current_hand_cleared():
+    emit('alert', {'alert': 'Current hand cleared.'}, broadcast=False)
+
+
+def alert_stored_hands_cleared():
+    emit('alert', {'alert': 'Stored hands cleared.'}, broadcast=False)
+
+
+def alert_current_hand_full():
+    emit('alert', {'alert': 'You cannot add any more cards to this hand.'}, broadcast=False)
+
+
+def alert_invalid_hand_storage():
+    emit('alert', {'alert': 'You can only store valid hands.'}, broadcast=False)
+
+
+def alert_single_storage():
+    emit('alert', {'alert': 'You cannot store singles; play them directly!'}, broadcast=False)
+
+
+def alert_playing_invalid_hand():
+    emit('alert', {'alert': 'You can only play valid hands.'}, broadcast=False)
+
+
+def alert_3_of_clubs():
+    emit('alert', {'alert': 'The first hand must contain the 3 of clubs.'}, broadcast=False)
+
+
+def alert_weaker_hand(can_beat):
+    emit('alert', {'alert': 'This hand is weaker than the hand in play.' + _no_beating_hand(can_beat)}, broadcast=False)
+
+
+def alert_incomparable_hand(hand, hand_in_play, can_beat):
+    emit('alert', {'alert': f"A {hand.id_desc} cannot be played on a {hand_in_play.id_desc}." + _no_beating_hand(can_beat)}, broadcast=False)
+
+
+def _no_beating_hand(can_beat):
+    return '' if can_beat else ' None of your cards can beat it, so pass instead.'
+
+
+def alert_can_only_play_on_turn():
+    emit('alert', {'alert': 'You can only play hands on your turn.'}, broadcast=False)
+
+
+def alert_can_only_pass_on_turn():
+    emit('alert', {'alert': 'You can only pass on your turn.'}, broadcast=False)
+
+
+def alert_can_play_any_hand():
+    emit('alert', {'alert': 'You can play any hand!'}, broadcast=False)
+
+
+def alert_must_play_3_of_clubs():
+    emit('alert', {'alert': 'You must play a hand containing the 3 of clubs.'}, broadcast=False)
+
+
+def alert_hand_already_stored():
+    emit('alert', {'alert': 'This hand is already stored.'}, broadcast=False)
+
+
+def alert_trading_ongoing():
+    emit('alert', {'alert': 'Trading has not concluded.'}, broadcast=False)
+
+
+def alert_no_more_takes():
+    emit('alert', {'alert': 'You have no more takes remaining.'}, broadcast=False)
+
+
+def alert_no_more_gives():
+    emit('alert', {'alert': 'You have no more gives remaining.'}, broadcast=False)
+
+
+def alert_other_player_does_not_have_value():
+    emit('alert', {'alert': 'The other player does not have a card of that value.'}, broadcast=False)
+
+
+def alert_can_only_give_singles():
+    emit('alert', {'alert': 'You can only give singles.'}, broadcast=False)
+
+
+def message_hand_played(hand, room, name):
+    emit('message', {'msg': f"SERVER: {name} played {str(hand)}!"}, room=room)
+
+
+def message_passed(room, name):
+    emit('message', {'msg': f"SERVER: {name} passed!"}, room=room)
+
+
+def message_hand_won(room, name):
+    emit('message', {'msg': f"SERVER: {name} won the hand! They can play any hand!"}, room=room)
+
+
+def message_player_finished(room, name, position):
+    emit('message', {'msg': f"SERVER: {name} is {position}!"}, room=room)
+
+
+def message_trading_concluded(room):
+    emit('message', {'msg': f"SERVER: Trading has concluded! The next round starts now!"}, room=room)
+
+
+def message_default_next_player(room):
+    emit('message', {'msg': f"SERVER: Everyone passed on a winning hand. The next player can play anything!"}, room=room)
+
+
+def message_game_ended(room, name):
+    emit('message', {'msg': f"SERVER: {name} left, so the game is over! It starts again when 4 players are here."}, room=room)
+
+
+def message_round_over_trading_begins(room):
+    emit('message', {'msg': f"SERVER: The round is over! Trading starts now!"}, room=room)
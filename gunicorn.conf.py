@@ -0,0 +1,8 @@
+# read by gunicorn from the working directory, see the Procfile
+
+
+def worker_exit(server, worker):
+    # runs in the worker once SIGTERM has stopped it, so no event is
+    # being handled while the rooms are saved
+    from app.main.events import save_snapshot
+    save_snapshot()
@@ -1,5 +1,4 @@
 # TODO: remove string annotations after getting python 3.7
-# TODO: test hand trie instead vs. hand hash table
 # TODO: where to put this file and general path design stuff
 # TODO: evaluate necessity of asserts
 # TODO: decide what exactly should be a runtime error and whether or not
@@ -8,11 +7,12 @@
 # TODO: normalize use of double or single quotes
 # TODO: change all uint8's to python ints
 
+import mmap
 import numpy as np
-import deepdish as dd
 
-from utils.utils import hand_hash
-from typing import Dict, Union
+from utils.utils import hand_hash, hand_hash_batch
+from hand_classifier import classify
+from typing import Dict, Iterable, Tuple, Union
 from json import dumps, loads
 from mypy_extensions import NoReturn
 
@@ -25,8 +25,58 @@ card_names = [
     'a♠', '2♣', '2♦', '2♥', '2♠',
 ]
 
-# hash table for identifying hands
-hand_table = dd.io.load("hand_table.h5")
+
+def _load_hand_table(path: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    memory-maps the table written by hand_hash_table._save_hand_table_bin
+    so that every worker process shares the same read-only pages instead
+    of building its own dict
+    """
+    with open(path, "rb") as f:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    n = int(np.frombuffer(buf, dtype=np.uint64, count=1)[0])
+    keys = np.frombuffer(buf, dtype=np.uint64, count=n, offset=8)
+    ids = np.frombuffer(buf, dtype=np.uint8, count=n, offset=8 + 8 * n)
+    ranks = np.frombuffer(buf, dtype=np.uint8, count=n, offset=8 + 9 * n)
+    return keys, ids, ranks
+
+
+# sorted hashes of all valid hands and their parallel ids and ranks (the
+# strength of hands within their category, see hand_hash_table.rank_index
+# for which card decides the strength)
+hand_table_keys, hand_table_ids, hand_table_ranks = \
+    _load_hand_table("hand_table.bin")
+_num_valid_hands = len(hand_table_keys)
+
+
+def lookup_hand(h: int) -> Tuple[int, int]:
+    """
+    returns the id and rank of the valid hand with hash h or (0, 0) if
+    there is no such hand
+    """
+    # the explicit uint64 avoids numpy casting both sides to float64
+    i = hand_table_keys.searchsorted(np.uint64(h))
+    if i < _num_valid_hands and hand_table_keys[i] == h:
+        return int(hand_table_ids[i]), int(hand_table_ranks[i])
+    return 0, 0
+
+
+def identify_hands(hands: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    vectorized Hand._identify: takes an (N, 5) uint8 array of sorted,
+    zero-padded hands (i.e. rows laid out like Hand._cards) and returns
+    the ids and ranks of all N hands as uint8 arrays
+    """
+    hashes = hand_hash_batch(hands)
+    i = hand_table_keys.searchsorted(hashes)
+    np.minimum(i, _num_valid_hands - 1, out=i)
+    found = hand_table_keys[i] == hashes
+    # invalid hands are identified by their number of cards
+    ids = np.where(found, hand_table_ids[i],
+                   np.count_nonzero(hands, axis=1) * 10).astype(np.uint8)
+    ranks = np.where(found, hand_table_ranks[i], 0).astype(np.uint8)
+    return ids, ranks
+
 
 # TODO: should this be in the class?
 id_desc_dict = {
@@ -43,6 +93,11 @@ id_desc_dict = {
     53: "bomb",  # e.g. [1, 49, 50, 51, 52]
 }
 
+# results of Hand.compare
+STRONGER = 1  # can be played on the other hand
+WEAKER = -1  # same kind of hand but not strong enough
+INCOMPARABLE = 0  # cannot be played on the other hand at all
+
 # TODO: where to put these errors
 # TODO: are these errors even necessary
 
@@ -55,7 +110,90 @@ class FullHandError(RuntimeError):
     pass
 
 
-class Hand(object):
+class ComparableHand(object):
+    """
+    what Hand, BitmaskHand, and FrozenHand share: the kind of a hand and
+    how it compares with others, all read from _id and _rank, which
+    every hand class keeps up to date however it stores its cards
+    """
+
+    __slots__ = ()
+
+    def __ne__(self, other: object) -> bool:
+        return not self == other
+
+    def __lt__(self, other: "ComparableHand") -> bool:
+        result = self.compare(other)
+        if result == INCOMPARABLE:
+            raise RuntimeError(
+                f"A {self.id_desc} cannot be played on a {other.id_desc}.")
+        return result == WEAKER
+
+    def __gt__(self, other: "ComparableHand") -> bool:
+        result = self.compare(other)
+        if result == INCOMPARABLE:
+            raise RuntimeError(
+                f"A {self.id_desc} cannot be played on a {other.id_desc}.")
+        return result == STRONGER
+
+    def __le__(self, other: "ComparableHand") -> NoReturn:
+        raise AssertionError('A <= call was made by a Hand.')
+
+    def __ge__(self, other: "ComparableHand") -> NoReturn:
+        raise AssertionError('A >= call was made by a Hand.')
+
+    @property
+    def is_empty(self) -> bool:
+        return self._id == 0
+
+    @property
+    def is_single(self) -> bool:
+        return self._id == 11
+
+    @property
+    def is_double(self) -> bool:
+        return self._id == 21
+
+    @property
+    def is_triple(self) -> bool:
+        return self._id == 31
+
+    @property
+    def is_fullhouse(self) -> bool:
+        return self._id == 51
+
+    @property
+    def is_straight(self) -> bool:
+        return self._id == 52
+
+    @property
+    def is_bomb(self) -> bool:
+        return self._id == 53
+
+    @property
+    def is_valid(self) -> bool:
+        return self._id % 10 > 0
+
+    @property
+    def id_desc(self) -> str:
+        return id_desc_dict[self._id]
+
+    def compare(self, other: "ComparableHand") -> int:
+        """
+        whether or not this hand can be played on other, i.e. STRONGER,
+        WEAKER, or INCOMPARABLE; never raises for incomparable hands
+        """
+        assert self.is_valid and other.is_valid, \
+            "Bug: attempting to compare 1 or more invalid hands."
+        if self._id == other._id:
+            return STRONGER if self._rank > other._rank else WEAKER
+        elif self._id == 53:  # bombs can be played on anything
+            return STRONGER
+        else:
+            return INCOMPARABLE
+
+
+class Hand(ComparableHand):
     """
     Base class for president's hands and the core data structure of
     Presidents. Refactoring from original Hand class found in class
@@ -81,17 +219,22 @@ class Hand(object):
     def __init__(self,
                  _cards: np.ndarray=None,
                  _id: int=None,
-                 _insertion_index: int=None) -> None:
+                 _insertion_index: int=None,
+                 _rank: int=None) -> None:
         if _cards is None:  # default empty hand
             self._cards = np.zeros(shape=5, dtype=np.uint8)
             self._id = 0
             self._insertion_index = 4
+            self._rank = 0
         else:
             assert len(_cards) == 5
             self._cards = np.array(_cards, dtype=np.uint8)
             if _id is not None and _insertion_index is not None:
                 self._id = _id
                 self._insertion_index = _insertion_index
+                if _rank is None:  # e.g. json from before ranks existed
+                    _rank = lookup_hand(hash(self))[1]
+                self._rank = _rank
             # this case should only be used for testing and debugging
             elif _id is None and _insertion_index is None:
                 self._identify()
@@ -104,11 +247,18 @@ class Hand(object):
     def from_json(cls, json_hand: str):
         # hd = hand dict
         hd: Dict[str, Union[np.ndarray, int]] = loads(json_hand)
-        return cls(hd['_cards'], hd['_id'], hd['_insertion_index'])
+        return cls(hd['_cards'], hd['_id'], hd['_insertion_index'],
+                   hd.get('_rank'))
+
+    @classmethod
+    def from_bytes(cls, packed: Union[bytes, memoryview]):
+        # see to_bytes
+        cards = np.frombuffer(packed, dtype=np.uint8, count=5)
+        return cls(cards, packed[5], 4 - int(np.count_nonzero(cards)))
 
     @classmethod
     def copy(cls, hand: "Hand") -> "Hand":
-        return cls(hand._cards, hand._id, hand._insertion_index)
+        return cls(hand._cards, hand._id, hand._insertion_index, hand._rank)
 
     def __getitem__(self, key: Union[int, slice]) -> int:
         return self._cards[key]
@@ -133,7 +283,7 @@ class Hand(object):
     def __repr__(self) -> str:
         # TODO: how to multiline f string plz
         return f"cards: {str(self._cards)}; id: {self._id}; ii: " + \
-               f"{self._insertion_index}"
+               f"{self._insertion_index}; rank: {self._rank}"
 
     def __eq__(self, other: object) -> bool:
         return (np.array_equal(self._cards, other._cards) and  # type: ignore
@@ -141,86 +291,10 @@ class Hand(object):
                 (self._insertion_index
                     == other._insertion_index))  # type: ignore
 
-    def __ne__(self, other: object) -> bool:
-        return not self == other
-
-    def __lt__(self, other: "Hand") -> bool:
-        if not self._is_comparable(other):
-            # TODO: should this be a runtime error?
-            raise RuntimeError(
-                f"A {self.id_desc} cannot be played on a {other.id_desc}.")
-        if self.is_bomb and other.is_bomb:
-            return self[1] < other[1]  # second card is always part of the quad
-        elif self.is_bomb:
-            return False
-        elif other.is_bomb:
-            return True
-        elif self.is_single or self.is_double or self.is_straight:
-            return self[4] < other[4]
-        elif self.is_triple or self.is_fullhouse:
-            return self[2] < other[2]
-        else:
-            raise AssertionError("Bug: unidentified hand.")
-
-    def __gt__(self, other: "Hand") -> bool:
-        if not self._is_comparable(other):
-            raise RuntimeError(
-                f"A {self.id_desc} cannot be played on a {other.id_desc}.")
-        if self.is_bomb and other.is_bomb:
-            return self[1] > other[1]  # second card is always part of the quad
-        elif self.is_bomb:
-            return True
-        elif other.is_bomb:
-            return False
-        elif self.is_single or self.is_double or self.is_straight:
-            return self[4] > other[4]
-        elif self.is_triple or self.is_fullhouse:
-            return self[2] > other[2]
-        else:
-            raise AssertionError("Bug: unidentified hand.")
-
-    def __le__(self, other: "Hand") -> NoReturn:
-        raise AssertionError('A <= call was made by a Hand.')
-
-    def __ge__(self, other: "Hand") -> NoReturn:
-        raise AssertionError('A >= call was made by a Hand.')
-
-    @property
-    def is_empty(self) -> bool:
-        return self._id == 0
-
     @property
     def is_full(self) -> bool:
         return self._insertion_index == -1
 
-    @property
-    def is_single(self) -> bool:
-        return self._id == 11
-
-    @property
-    def is_double(self) -> bool:
-        return self._id == 21
-
-    @property
-    def is_triple(self) -> bool:
-        return self._id == 31
-
-    @property
-    def is_fullhouse(self) -> bool:
-        return self._id == 51
-
-    @property
-    def is_straight(self) -> bool:
-        return self._id == 52
-
-    @property
-    def is_bomb(self) -> bool:
-        return self._id == 53
-
-    @property
-    def is_valid(self) -> bool:
-        return self._id % 10 > 0
-
     @property
     def _number_of_cards(self) -> int:
         try:
@@ -228,14 +302,11 @@ class Hand(object):
         except AttributeError:
             return 5 - np.argmax(self._cards)
 
-    @property
-    def id_desc(self) -> str:
-        return id_desc_dict[self._id]
-
     def reset(self) -> None:
         self._cards = np.zeros(shape=5, dtype=np.uint8)
         self._id = 0
         self._insertion_index = 4
+        self._rank = 0
 
     def intersects(self, other: "Hand") -> bool:  # TODO: refine this
         for card1 in self:
@@ -247,22 +318,23 @@ class Hand(object):
     def to_json(self) -> str:
         return dumps(self.__dict__, default=lambda x: x.tolist())
 
-    def _is_comparable(self, other: "Hand") -> bool:
-        assert self.is_valid and other.is_valid, \
-            "Bug: attempting to compare 1 or more invalid hands."
-        if other.is_bomb and not self.is_bomb:
-            return False
-        elif self.is_bomb or self._id == other._id:
-            return True
-        else:
-            return False
+    def to_bytes(self) -> bytes:
+        """
+        6 bytes: the 5 (zero-padded, sorted) cards and then the id
+        """
+        return self._cards.tobytes() + bytes((self._id,))
 
-    def _identify(self) -> None:
-        h = hash(self)
-        if h not in hand_table:
+    def _identify_by_table(self) -> None:
+        self._id, self._rank = lookup_hand(hash(self))
+        if self._id == 0:
             self._id = self._number_of_cards * 10
-        else:
-            self._id = hand_table[h]
+
+    def _identify_by_histogram(self) -> None:
+        self._id, self._rank = classify(
+            [card for card in self._cards.tolist() if card])
+
+    # replaced by use_identify_engine
+    _identify = _identify_by_table
 
     def _insert_pos(self, card: int, current_index: int) -> int:
         if current_index == 5:
@@ -286,6 +358,23 @@ class Hand(object):
         self._insertion_index -= 1
         self._identify()
 
+    def set_cards(self, cards: Iterable[int]) -> None:
+        """
+        replaces the cards of this hand with cards, identifying the hand
+        once instead of once per added or removed card
+        """
+        cards = sorted(set(map(int, cards)))
+        assert all(1 <= card <= 52 for card in cards), \
+            "Bug: attempting to add invalid card."
+        if len(cards) > 5:
+            raise FullHandError("Cannot add any more cards to this hand.")
+        self.reset()
+        if not cards:
+            return
+        self[5 - len(cards):] = cards
+        self._insertion_index = 4 - len(cards)
+        self._identify()
+
     def _card_index(self, card: int) -> int:
         assert card in self, \
                 f"Bug: attempting to find index of card ({card}) which is " + \
@@ -301,3 +390,16 @@ class Hand(object):
         self[ii + 1: ci + 1] = self[ii: ci]  # right shift lower cards
         self[ii] = 0
         self._identify()
+
+
+identify_engines = {
+    'table': Hand._identify_by_table,  # hand hash lookup in the hand table
+    'histogram': Hand._identify_by_histogram,  # hand_classifier.classify
+}
+
+
+def use_identify_engine(engine: str) -> None:
+    """
+    switches how every Hand identifies itself, see identify_engines
+    """
+    Hand._identify = identify_engines[engine]
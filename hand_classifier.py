@@ -0,0 +1,44 @@
+from typing import Iterable, List, Tuple
+
+
+# rank of every card from 0 (3's) to 12 (2's)
+rank_of: List[int] = [-1] + [(card - 1) // 4 for card in range(1, 53)]
+
+
+def classify(cards: Iterable[int]) -> Tuple[int, int]:
+    """
+    identifies a hand directly from the ranks of its cards instead of
+    looking it up in the hand table; cards must be in ascending order
+    (e.g. iter(hand)) and the returned id and rank are the same as the
+    ones in the hand table
+
+    since the cards are sorted, the cards of each rank are contiguous and
+    the rank counts only ever need to be compared at the run boundaries
+    """
+    cards = list(cards)
+    n = len(cards)
+    if n == 0:
+        return 0, 0
+    elif n == 1:
+        return 11, cards[0]
+    ranks = [rank_of[card] for card in cards]
+    if n == 2:
+        if ranks[0] == ranks[1]:
+            return 21, cards[1]
+        return 20, 0
+    elif n == 3:
+        if ranks[0] == ranks[2]:
+            return 31, cards[0]
+        return 30, 0
+    elif n == 4:  # quads have to be played with a single
+        return 40, 0
+    # 5 cards
+    if ranks[0] == ranks[3] or ranks[1] == ranks[4]:  # 4 + 1 or 1 + 4
+        return 53, cards[1]
+    elif ((ranks[0] == ranks[2] and ranks[3] == ranks[4]) or  # 3 + 2
+          (ranks[0] == ranks[1] and ranks[2] == ranks[4])):  # 2 + 3
+        return 51, cards[2]
+    elif (ranks[4] - ranks[0] == 4 and ranks[0] < ranks[1] < ranks[2] <
+          ranks[3] < ranks[4]):  # 5 distinct consecutive ranks
+        return 52, cards[4]
+    return 50, 0
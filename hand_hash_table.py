@@ -1,9 +1,12 @@
+import argparse
+import os
+import sys
 import numpy as np
-import deepdish as dd
 
 from itertools import combinations as comb
-from typing import Dict
-from utils.utils import hand_hash, cartesian_product_pp, main
+from multiprocessing import Pool
+from typing import Callable, Dict, Tuple
+from utils.utils import hand_hash_batch, cartesian_product_pp, main
 
 
 cards = np.arange(1, 53, dtype=np.uint8)
@@ -12,110 +15,191 @@ suits = cards.reshape(13, 4)
 
 # hash table for identifying combos
 hand_table: Dict[int, int] = {}
+# hash table for the strength of combos within their category
+hand_rank_table: Dict[int, int] = {}
 
+# index of the card that decides the strength of a hand of each id
+rank_index: Dict[int, int] = {
+    11: 4,  # single
+    21: 4,  # double: the higher card
+    31: 2,  # triple: the middle card
+    51: 2,  # fullhouse: the middle card is always part of the triple
+    52: 4,  # straight: the highest card
+    53: 1,  # bomb: the second card is always part of the quad
+}
 
-def _save_hand_table() -> None:
-    dd.io.save("hand_table.h5", hand_table)
 
-
-def _add_to_hand_table(hand, id: int) -> None:
-    hand_table[hand_hash(hand)] = id
-
-
-def _add_to_hand_table_iter(hands, id: int) -> None:
-    for hand in hands:
-        _add_to_hand_table(hand, id)
-
-
-def _add_all() -> None:
-    _add_singles()
-    _add_doubles()
-    _add_triples()
-    _add_fullhouses()
-    _add_straights()
-    _add_bombs()
-
-
-def _add_singles() -> None:
+def _singles() -> np.ndarray:
     """
-    adds all singles to the hand hash table
+    all singles, e.g. [0, 0, 0, 0, 1]
     """
     singles = np.zeros(shape=(52, 5), dtype=np.uint8)
-    singles[:, 4] = range(1, 53)
-    _add_to_hand_table_iter(singles, 11)
+    singles[:, 4] = cards
+    return singles
 
 
-def _add_doubles() -> None:
+def _doubles() -> np.ndarray:
     """
-    adds all doubles to the hand hash table
+    all doubles, e.g. [0, 0, 0, 1, 2]
     """
-    doubles = np.zeros(shape=(6, 5), dtype=np.uint8)  # (4 C 2) = 6
-    for suit in suits:
-        doubles[:, 3:5] = list(comb(suit, 2))
-        _add_to_hand_table_iter(doubles, 21)
+    pairs = suits[:, list(comb(range(4), 2))]  # (13, 4 C 2 = 6, 2)
+    doubles = np.zeros(shape=(13 * 6, 5), dtype=np.uint8)
+    doubles[:, 3:5] = pairs.reshape(-1, 2)
+    return doubles
 
 
-def _add_triples() -> None:
+def _triples() -> np.ndarray:
     """
-    adds all triples to the hand hash table
+    all triples, e.g. [0, 0, 1, 2, 3]
     """
-    triples = np.zeros(shape=(4, 5), dtype=np.uint8)  # (4 C 3) = 4
-    for suit in suits:
-        triples[:, 2:5] = list(comb(suit, 3))
-        _add_to_hand_table_iter(triples, 31)
+    trips = suits[:, list(comb(range(4), 3))]  # (13, 4 C 3 = 4, 3)
+    triples = np.zeros(shape=(13 * 4, 5), dtype=np.uint8)
+    triples[:, 2:5] = trips.reshape(-1, 3)
+    return triples
 
 
-def _add_fullhouses() -> None:
+def _fullhouses() -> np.ndarray:
     """
-    adds all fullhouses to the hand hash table
+    all fullhouses, both double triples, e.g. [1, 2, 50, 51, 52], and
+    triple doubles, e.g. [1, 2, 3, 51, 52]
     """
-    fullhouses = np.zeros(shape=(6, 5), dtype=np.uint8)
-    for suit1, suit2 in comb(suits, 2):
-        # double triples, e.g. [1, 2, 50, 51, 52]
-        doubles = list(comb(suit1, 2))
-        triples = comb(suit2, 3)
-        fullhouses[:, 0:2] = doubles
-        for triple in triples:
-            fullhouses[:, 2:5] = triple  # numpy array broadcasting
-            _add_to_hand_table_iter(fullhouses, 51)
-
-        # triple doubles, e.g. [1, 2, 3, 51, 52]
-        triples = comb(suit1, 3)
-        doubles = list(comb(suit2, 2))
-        fullhouses[:, 3:5] = doubles
-        for triple in triples:
-            fullhouses[:, 0:3] = triple  # numpy array broadcasting
-            _add_to_hand_table_iter(fullhouses, 51)
+    pairs = suits[:, list(comb(range(4), 2))]  # (13, 6, 2)
+    trips = suits[:, list(comb(range(4), 3))]  # (13, 4, 3)
+    # every triple rank with every other double rank
+    triple_ranks, double_ranks = np.nonzero(~np.eye(13, dtype=bool))
+    fullhouses = np.empty(shape=(len(triple_ranks), 4, 6, 5), dtype=np.uint8)
+    fullhouses[..., 0:3] = trips[triple_ranks][:, :, None, :]
+    fullhouses[..., 3:5] = pairs[double_ranks][:, None, :, :]
+    fullhouses = fullhouses.reshape(-1, 5)
+    fullhouses.sort(axis=1)
+    return fullhouses
+
+
+def _straights() -> np.ndarray:
+    """
+    all straights, e.g. [1, 5, 9, 13, 17]
+    """
+    # every choice of suit for each of the 5 cards, (4 ** 5 = 1024, 5)
+    suit_choices = cartesian_product_pp([np.arange(4, dtype=np.uint8)] * 5)
+    lowest_ranks = np.arange(9, dtype=np.uint8)
+    ranks = lowest_ranks[:, None] + np.arange(5, dtype=np.uint8)  # (9, 5)
+    straights = ranks[:, None, :] * 4 + suit_choices[None, :, :] + 1
+    return straights.reshape(-1, 5).astype(np.uint8)
 
 
-def _add_straights() -> None:
+def _bombs() -> np.ndarray:
+    """
+    all bombs, both single quads, e.g. [1, 49, 50, 51, 52], and quad
+    singles, e.g. [1, 2, 3, 4, 52]
+    """
+    # every quad with every card not in it
+    quad_ranks, singles = np.nonzero((cards[None, :] - 1) // 4 !=
+                                     np.arange(13)[:, None])
+    bombs = np.empty(shape=(len(quad_ranks), 5), dtype=np.uint8)
+    bombs[:, 0:4] = suits[quad_ranks]
+    bombs[:, 4] = cards[singles]
+    bombs.sort(axis=1)
+    return bombs
+
+
+# the hands of every id as (N, 5) blocks laid out like Hand._cards
+categories: Dict[int, Callable[[], np.ndarray]] = {
+    11: _singles,
+    21: _doubles,
+    31: _triples,
+    51: _fullhouses,
+    52: _straights,
+    53: _bombs,
+}
+
+
+def _build_category(id: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    hands = categories[id]()
+    hashes = hand_hash_batch(hands)
+    ids = np.full(shape=len(hands), fill_value=id, dtype=np.uint8)
+    ranks = hands[:, rank_index[id]].copy()
+    return hashes, ids, ranks
+
+
+def build(processes: int=None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
     """
-    adds all straights to the hand hash table
+    builds the hashes, ids, and ranks of every valid hand sorted by hash,
+    building the categories in a pool of processes if asked to
     """
-    for i in range(9):
-        group_of_5_suits = suits[i: i + 5]
-        straights = cartesian_product_pp(group_of_5_suits)
-        _add_to_hand_table_iter(straights, 52)
+    if processes:
+        with Pool(processes) as pool:
+            blocks = pool.map(_build_category, categories)
+    else:
+        blocks = list(map(_build_category, categories))
+    keys, ids, ranks = (np.concatenate(arrays) for arrays in zip(*blocks))
+    order = np.argsort(keys)
+    keys, ids, ranks = keys[order], ids[order], ranks[order]
+    collisions = np.flatnonzero(keys[1:] == keys[:-1])
+    if len(collisions) > 0:
+        raise AssertionError(f"Bug: {len(collisions)} hand hash collisions, " +
+                             f"e.g. {keys[collisions[0]]}.")
+    return keys, ids, ranks
+
+
+def _add_all(processes: int=None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    keys, ids, ranks = build(processes)
+    hand_table.update(zip(keys.tolist(), ids.tolist()))
+    hand_rank_table.update(zip(keys.tolist(), ranks.tolist()))
+    return keys, ids, ranks
+
+
+def _save_hand_table_bin(keys: np.ndarray, ids: np.ndarray,
+                         ranks: np.ndarray) -> None:
+    """
+    saves both tables in the format memory-mapped by hand.py: the number
+    of hands as a uint64, the sorted hashes as uint64s, and then the ids
+    and ranks of the hands as parallel uint8 arrays
+    """
+    with open("hand_table.bin", "wb") as f:
+        f.write(np.uint64(len(keys)).tobytes())
+        f.write(keys.astype(np.uint64).tobytes())
+        f.write(ids.astype(np.uint8).tobytes())
+        f.write(ranks.astype(np.uint8).tobytes())
 
 
-def _add_bombs() -> None:
+def _verify(keys: np.ndarray, ids: np.ndarray, ranks: np.ndarray) -> bool:
     """
-    adds all bombs to the hand hash table
+    diffs freshly built tables against the existing hand_table.bin and,
+    if it is still around, the legacy hand_table.h5 (which needs
+    deepdish); returns whether or not they are all identical
     """
-    bombs = np.zeros(shape=(4, 5), dtype=np.uint8)
-    for suit1, suit2 in comb(suits, 2):
-        # single quads, e.g. [1, 49, 50, 51, 52]
-        bombs[:, 0] = suit1
-        bombs[:, 1:5] = suit2  # numpy array broadcasting
-        _add_to_hand_table_iter(bombs, 53)
-
-        # quad singles, e.g. [1, 2, 3, 4, 52]
-        bombs[:, 0:4] = suit1  # numpy array broadcasting
-        bombs[:, 4] = suit2
-        _add_to_hand_table_iter(bombs, 53)
+    # hand maps hand_table.bin when imported, which generating doesn't need
+    from hand import _load_hand_table
+    old_keys, old_ids, old_ranks = _load_hand_table("hand_table.bin")
+    missing = np.setdiff1d(old_keys, keys)
+    extra = np.setdiff1d(keys, old_keys)
+    common, i, j = np.intersect1d(keys, old_keys, return_indices=True)
+    wrong_ids = np.count_nonzero(ids[i] != old_ids[j])
+    wrong_ranks = np.count_nonzero(ranks[i] != old_ranks[j])
+    print(f"hand_table.bin: {len(missing)} missing, {len(extra)} extra, " +
+          f"{wrong_ids} wrong ids, {wrong_ranks} wrong ranks")
+    wrong_h5 = 0
+    if os.path.exists("hand_table.h5"):
+        import deepdish as dd
+        old_hand_table = dd.io.load("hand_table.h5")
+        wrong_h5 = len(set(old_hand_table.items()) ^
+                       set(zip(keys.tolist(), ids.tolist())))
+        print(f"hand_table.h5: {wrong_h5} differing entries")
+    return (len(missing) == len(extra) == wrong_ids == wrong_ranks ==
+            wrong_h5 == 0)
 
 
 @main
-def generate():
-    _add_all()
-    _save_hand_table()
+def generate(*args):
+    parser = argparse.ArgumentParser(
+        description="generates (or verifies) the hand tables")
+    parser.add_argument('--processes', type=int, default=None,
+                        help="build the categories in a pool of processes")
+    parser.add_argument('--verify', action='store_true',
+                        help="diff against the existing tables instead of " +
+                             "overwriting them")
+    options = parser.parse_args(args)
+    keys, ids, ranks = _add_all(options.processes)
+    if options.verify:
+        sys.exit(0 if _verify(keys, ids, ranks) else 1)
+    _save_hand_table_bin(keys, ids, ranks)
@@ -1,6 +1,48 @@
-from typing import Set
+import numpy as np
+
+from typing import Iterable, List, Set, Union
 from hand import Hand
+from frozen_hand import FrozenHand, intern_table
 from json import dumps, loads
+from utils.utils import hand_hash_batch
+
+
+def pack_hands(hands: Iterable) -> bytes:
+    """
+    the 6 byte encodings of hands (see Hand.to_bytes) back to back
+    """
+    return b"".join([hand.to_bytes() for hand in hands])
+
+
+def unpack_hands(packed: Union[bytes, memoryview]) -> List[FrozenHand]:
+    """
+    decodes pack_hands without building any intermediate hands: all the
+    hashes are computed in one pass and every hand that has been seen
+    before is just looked up in the FrozenHand intern table
+    """
+    if len(packed) < 6 * 32:  # not worth the fixed cost of numpy
+        return _unpack_few_hands(bytes(packed))
+    rows = np.frombuffer(packed, dtype=np.uint8).reshape(-1, 6)
+    hands = list()
+    for i, h in enumerate(hand_hash_batch(rows[:, :5]).tolist()):
+        hand = intern_table.get(h)
+        if hand is None:
+            hand = FrozenHand.from_bytes(rows[i].tobytes())
+        hands.append(hand)
+    return hands
+
+
+def _unpack_few_hands(packed: bytes) -> List[FrozenHand]:
+    hands = list()
+    for start in range(0, len(packed), 6):
+        h = 0
+        for card in packed[start:start + 5]:
+            h = h * 53 + card
+        hand = intern_table.get(h * 53)
+        if hand is None:
+            hand = FrozenHand.from_bytes(packed[start:start + 6])
+        hands.append(hand)
+    return hands
 
 
 class HandList:
@@ -18,6 +60,10 @@ class HandList:
     def from_json(cls, json_hand_list: str):
         return cls(set(map(Hand.from_json, loads(json_hand_list))))
 
+    @classmethod
+    def from_bytes(cls, packed: Union[bytes, memoryview]):
+        return cls(set(unpack_hands(packed)))
+
     @classmethod
     def copy(cls, hand_list: "HandList") -> "HandList":
         return cls(set(hand_list._hands))
@@ -43,5 +89,8 @@ class HandList:
     def to_json(self) -> str:
         return dumps(list(self), default=lambda x: x.to_json())
 
+    def to_bytes(self) -> bytes:
+        return pack_hands(self)
+
 
     
@@ -0,0 +1,84 @@
+"""
+incremental hand identification over card bitmasks (card c is bit c - 1)
+
+every selection of cards that is part of at least one valid hand is a
+state with a precomputed id and rank; adding or removing a card is a
+single xor of the mask followed by a single dict lookup, and a mask that
+is not a state can never be extended into a valid hand. there are only
+~37k such states so this replaces hashing and searching the hand table
+on every click.
+"""
+import numpy as np
+
+from hand import hand_table_keys, hand_table_ids, hand_table_ranks
+from typing import Dict, Iterable, List, Tuple
+from utils.utils import hand_unhash_batch
+
+
+def _build_states() -> Dict[int, Tuple[int, int]]:
+    hands = hand_unhash_batch(hand_table_keys).astype(np.uint64)
+    bits = np.where(hands > 0, np.uint64(1) << (hands - np.uint64(1)),
+                    np.uint64(0))
+    valid_masks = np.bitwise_or.reduce(bits, axis=1)
+    # every subset of every valid hand, including the hands themselves
+    subsets = list()
+    for pattern in range(1, 32):
+        columns = [i for i in range(5) if pattern >> i & 1]
+        subsets.append(np.bitwise_or.reduce(bits[:, columns], axis=1))
+    states: Dict[int, Tuple[int, int]] = {0: (0, 0)}
+    for mask in np.unique(np.concatenate(subsets)).tolist():
+        if mask:
+            states[mask] = (bin(mask).count('1') * 10, 0)  # i.e. invalid
+    states.update(zip(valid_masks.tolist(),
+                      zip(hand_table_ids.tolist(), hand_table_ranks.tolist())))
+    return states
+
+
+# card mask -> (id, rank) of every selection that can still become valid
+states = _build_states()
+
+
+def mask_of(cards: Iterable[int]) -> int:
+    mask = 0
+    for card in cards:
+        mask |= 1 << (int(card) - 1)
+    return mask
+
+
+def cards_of(mask: int) -> List[int]:
+    cards = list()
+    while mask:
+        lowest_bit = mask & -mask
+        cards.append(lowest_bit.bit_length())
+        mask ^= lowest_bit
+    return cards
+
+
+def identify(mask: int, num_cards: int) -> Tuple[int, int]:
+    """
+    returns the same id and rank as the hand table for any mask
+    """
+    return states.get(mask) or (num_cards * 10, 0)
+
+
+def is_completable(mask: int) -> bool:
+    """
+    whether or not adding cards to the selection can make it a valid
+    hand (or it is one already)
+    """
+    return mask in states
+
+
+def completing_cards(mask: int, holding: int) -> List[int]:
+    """
+    the cards of a holding (itself a card mask) that can be added to the
+    selection while it stays completable
+    """
+    cards = list()
+    remaining = holding & ~mask
+    while remaining:
+        bit = remaining & -remaining
+        if mask | bit in states:
+            cards.append(bit.bit_length())
+        remaining ^= bit
+    return cards
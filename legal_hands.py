@@ -0,0 +1,213 @@
+"""
+enumerates the valid hands that can be made from a holding of cards
+
+holdings are handled as card masks (card c is bit c - 1) so that the 4
+cards of every rank are one 4 bit nibble of the mask: rank r is
+(mask >> 4 * r) & 0xF. every category is built from those nibbles
+instead of validating combinations of cards.
+"""
+from itertools import product
+from typing import Callable, Dict, Iterable, Iterator, List
+from frozen_hand import FrozenHand
+from hand import STRONGER
+from hand_trie import mask_of
+
+
+# the subsets of every nibble by number of cards, i.e.
+# nibble_subsets[nibble][k] are all k card subsets of nibble
+nibble_subsets: List[List[List[int]]] = [
+    [[subset for subset in range(16)
+      if subset & ~nibble == 0 and bin(subset).count('1') == k]
+     for k in range(5)]
+    for nibble in range(16)
+]
+
+
+def _nibbles(mask: int) -> List[int]:
+    return [(mask >> 4 * rank) & 0xF for rank in range(13)]
+
+
+def _bits(mask: int) -> List[int]:
+    bits = list()
+    while mask:
+        bit = mask & -mask
+        bits.append(bit)
+        mask ^= bit
+    return bits
+
+
+def _of_a_kind(mask: int, k: int) -> List[int]:
+    return [subset << 4 * rank
+            for rank, nibble in enumerate(_nibbles(mask))
+            for subset in nibble_subsets[nibble][k]]
+
+
+def single_masks(mask: int) -> List[int]:
+    return _bits(mask)
+
+
+def double_masks(mask: int) -> List[int]:
+    return _of_a_kind(mask, 2)
+
+
+def triple_masks(mask: int) -> List[int]:
+    return _of_a_kind(mask, 3)
+
+
+def fullhouse_masks(mask: int) -> List[int]:
+    nibbles = _nibbles(mask)
+    fullhouses = list()
+    for triple_rank, triple_nibble in enumerate(nibbles):
+        for triple in nibble_subsets[triple_nibble][3]:
+            triple <<= 4 * triple_rank
+            for double_rank, double_nibble in enumerate(nibbles):
+                if double_rank == triple_rank:
+                    continue
+                for double in nibble_subsets[double_nibble][2]:
+                    fullhouses.append(triple | double << 4 * double_rank)
+    return fullhouses
+
+
+def straight_masks(mask: int) -> List[int]:
+    nibbles = _nibbles(mask)
+    straights = list()
+    for lowest_rank in range(9):
+        if not all(nibbles[lowest_rank: lowest_rank + 5]):
+            continue
+        choices = [[bit << 4 * rank for bit in _bits(nibbles[rank])]
+                   for rank in range(lowest_rank, lowest_rank + 5)]
+        for cards in product(*choices):
+            straights.append(cards[0] | cards[1] | cards[2] | cards[3] |
+                             cards[4])
+    return straights
+
+
+def bomb_masks(mask: int) -> List[int]:
+    bombs = list()
+    for rank, nibble in enumerate(_nibbles(mask)):
+        if nibble == 0xF:
+            quad = 0xF << 4 * rank
+            bombs.extend(quad | bit for bit in _bits(mask & ~quad))
+    return bombs
+
+
+# the masks of every hand of each id that a holding mask contains
+hand_masks: Dict[int, Callable[[int], List[int]]] = {
+    11: single_masks,
+    21: double_masks,
+    31: triple_masks,
+    51: fullhouse_masks,
+    52: straight_masks,
+    53: bomb_masks,
+}
+
+
+def _of_a_kind_with(mask: int, card: int, k: int) -> List[int]:
+    rank = (card - 1) // 4
+    card_bit = 1 << (card - 1 - 4 * rank)
+    return [subset << 4 * rank
+            for subset in nibble_subsets[(mask >> 4 * rank) & 0xF][k]
+            if subset & card_bit]
+
+
+def single_masks_with(mask: int, card: int) -> List[int]:
+    return [1 << (card - 1)]
+
+
+def double_masks_with(mask: int, card: int) -> List[int]:
+    return _of_a_kind_with(mask, card, 2)
+
+
+def triple_masks_with(mask: int, card: int) -> List[int]:
+    return _of_a_kind_with(mask, card, 3)
+
+
+def fullhouse_masks_with(mask: int, card: int) -> List[int]:
+    rank = (card - 1) // 4
+    nibbles = _nibbles(mask)
+    fullhouses = list()
+    # card in the triple and then card in the double
+    for part, other_size in [(triple_masks_with(mask, card), 2),
+                             (double_masks_with(mask, card), 3)]:
+        for cards in part:
+            for other_rank, other_nibble in enumerate(nibbles):
+                if other_rank == rank:
+                    continue
+                for other in nibble_subsets[other_nibble][other_size]:
+                    fullhouses.append(cards | other << 4 * other_rank)
+    return fullhouses
+
+
+def straight_masks_with(mask: int, card: int) -> List[int]:
+    rank = (card - 1) // 4
+    nibbles = _nibbles(mask)
+    straights = list()
+    for lowest_rank in range(max(rank - 4, 0), min(rank, 8) + 1):
+        if not all(nibbles[lowest_rank: lowest_rank + 5]):
+            continue
+        choices = [[1 << (card - 1)] if other_rank == rank else
+                   [bit << 4 * other_rank for bit in _bits(nibbles[other_rank])]
+                   for other_rank in range(lowest_rank, lowest_rank + 5)]
+        for cards in product(*choices):
+            straights.append(cards[0] | cards[1] | cards[2] | cards[3] |
+                             cards[4])
+    return straights
+
+
+def bomb_masks_with(mask: int, card: int) -> List[int]:
+    rank = (card - 1) // 4
+    bombs = list()
+    # card in the quad and then card as the fifth card
+    quad = 0xF << 4 * rank
+    if mask & quad == quad:
+        bombs.extend(quad | bit for bit in _bits(mask & ~quad))
+    for other_rank, nibble in enumerate(_nibbles(mask)):
+        if nibble == 0xF and other_rank != rank:
+            bombs.append(0xF << 4 * other_rank | 1 << (card - 1))
+    return bombs
+
+
+# the masks of every hand of each id that a holding mask contains and
+# that has the given card in it
+hand_masks_with: Dict[int, Callable[[int, int], List[int]]] = {
+    11: single_masks_with,
+    21: double_masks_with,
+    31: triple_masks_with,
+    51: fullhouse_masks_with,
+    52: straight_masks_with,
+    53: bomb_masks_with,
+}
+
+
+def strength(hand) -> tuple:
+    """
+    sort key of hands that can be played on the same hand
+    """
+    return (hand._id == 53, hand._rank)
+
+
+def iter_hands(cards: Iterable[int]) -> Iterator[FrozenHand]:
+    """
+    yields every valid hand that can be made from cards, category by
+    category
+    """
+    mask = mask_of(cards)
+    for masks in hand_masks.values():
+        for hand_mask in masks(mask):
+            yield FrozenHand.from_mask(hand_mask)
+
+
+def hands_beating(cards: Iterable[int], hand) -> List[FrozenHand]:
+    """
+    every hand that can be made from cards and played on hand, from the
+    weakest to the strongest; only the hands of the same category and
+    bombs are ever built
+    """
+    mask = mask_of(cards)
+    ids = [hand._id, 53] if hand._id != 53 else [53]
+    beating = [FrozenHand.from_mask(hand_mask) for id in ids
+               for hand_mask in hand_masks[id](mask)]
+    beating = [candidate for candidate in beating
+               if candidate.compare(hand) == STRONGER]
+    beating.sort(key=strength)
+    return beating
@@ -0,0 +1,194 @@
+import numpy as np
+from typing import Dict, Generator, List
+from hand import Hand
+from frozen_hand import FrozenHand
+from card_hand_chamber import (BaseCardHandChamber, pack_snapshot,
+                               unpack_snapshot)
+from hand_trie import cards_of
+from emit_buffer import emit
+
+
+class MatrixCardHandChamber(BaseCardHandChamber):
+    """
+    drop-in alternative to CardHandChamber that replaces the web of
+    llist nodes with a card x hand incidence matrix: column i says which
+    cards the hand in slot i has and _num_cards_selected[i] how many of
+    them are currently selected, so selecting, deselecting, and removing
+    a card are row operations; stored hands are found by their hash
+
+    slots of removed hands are reused and the matrix doubles its number
+    of columns whenever it runs out of them
+    """
+    def __init__(self, cards: np.ndarray, player_sid: str,
+                 capacity: int=16) -> None:
+        super().__init__(cards, player_sid)
+        self._cards = np.zeros(shape=53, dtype=bool)
+        self._cards[np.asarray(cards, dtype=np.intp)] = True
+        self._num_cards = int(np.count_nonzero(self._cards))
+        self._incidence = np.zeros(shape=(53, capacity), dtype=bool)
+        self._num_cards_selected = np.zeros(shape=capacity, dtype=np.int8)
+        self._hand_sizes = np.zeros(shape=capacity, dtype=np.int8)
+        self._slot_hands: List[FrozenHand] = [None] * capacity
+        self._free_slots: List[int] = list(range(capacity - 1, -1, -1))
+        # hand hash -> the slot of the stored hand
+        self._slot_index: Dict[int, int] = dict()
+
+    def snapshot(self) -> bytes:
+        """
+        the cards, stored hands, and selected cards of the chamber (see
+        card_hand_chamber.pack_snapshot)
+        """
+        return pack_snapshot(self._card_mask, self._selected_mask,
+                             [hand for hand in self._slot_hands
+                              if hand is not None])
+
+    @classmethod
+    def restore(cls, snapshot: bytes,
+                player_sid: str) -> "MatrixCardHandChamber":
+        """
+        rebuilds a chamber from a snapshot without emitting anything
+        """
+        card_mask, selected_mask, hands = unpack_snapshot(snapshot)
+        num_hands = len(hands)
+        chamber = cls(cards_of(card_mask), player_sid,
+                      capacity=max(16, num_hands))
+        chamber._selected_mask = selected_mask
+        if num_hands == 0:
+            return chamber
+        # the hands go in slots 0 through num_hands - 1 all at once
+        rows = np.frombuffer(snapshot, dtype=np.uint8,
+                             offset=14).reshape(-1, 6)[:, :5]
+        slots = np.repeat(np.arange(num_hands), 5)
+        chamber._incidence[rows.ravel(), slots] = True
+        chamber._incidence[0] = False  # the padding of the hands
+        chamber._hand_sizes[:num_hands] = np.count_nonzero(rows, axis=1)
+        chamber._slot_hands[:num_hands] = hands
+        del chamber._free_slots[len(chamber._free_slots) - num_hands:]
+        for slot, hand in enumerate(hands):
+            chamber._slot_index[hash(hand)] = slot
+            for card in hand:
+                chamber._card_slots[card] |= 1 << slot
+        if selected_mask:
+            chamber._num_cards_selected[:] = chamber._incidence[
+                cards_of(selected_mask)].sum(axis=0)
+        return chamber
+
+    def _grow(self) -> None:
+        capacity = len(self._slot_hands)
+        self._incidence = np.concatenate(
+            [self._incidence, np.zeros(shape=(53, capacity), dtype=bool)],
+            axis=1)
+        self._num_cards_selected = np.concatenate(
+            [self._num_cards_selected, np.zeros(shape=capacity, dtype=np.int8)])
+        self._hand_sizes = np.concatenate(
+            [self._hand_sizes, np.zeros(shape=capacity, dtype=np.int8)])
+        self._slot_hands.extend([None] * capacity)
+        self._free_slots.extend(range(2 * capacity - 1, capacity - 1, -1))
+
+    def add_hand(self, hand: Hand) -> None:
+        hand = self._insert_hand(hand)
+        emit('store hand', {'hand': str(hand), 'cards': list(hand)},
+             broadcast=False)
+
+    def _insert_hand(self, hand: Hand) -> FrozenHand:
+        if not self._free_slots:
+            self._grow()
+        slot = self._free_slots.pop()
+        hand = FrozenHand.of(hand)
+        cards = list(hand)
+        self._incidence[cards, slot] = True
+        self._num_cards_selected[slot] = 0
+        self._hand_sizes[slot] = len(cards)
+        self._slot_hands[slot] = hand
+        self._slot_index[hash(hand)] = slot
+        for card in cards:
+            self._card_slots[card] |= 1 << slot
+        return hand
+
+    def select_card(self, card: int):
+        emit('select card', {'card': int(card)}, room=self._player_sid)
+        self._selected_mask |= 1 << (int(card) - 1)
+        slots = self._incidence[card]
+        self._num_cards_selected[slots] += 1
+        for slot in np.flatnonzero(slots & (self._num_cards_selected == 1)):
+            emit('select hand', {'hand': str(self._slot_hands[slot])},
+                 broadcast=False)
+
+    def deselect_card(self, card: int):
+        emit('deselect card', {'card': int(card)}, room=self._player_sid)
+        self._selected_mask &= ~(1 << (int(card) - 1))
+        slots = self._incidence[card]
+        self._num_cards_selected[slots] -= 1
+        for slot in np.flatnonzero(slots & (self._num_cards_selected == 0)):
+            emit('deselect hand', {'hand': str(self._slot_hands[slot])},
+                 broadcast=False)
+
+    def _remove_slots(self, slots: np.ndarray) -> None:
+        for slot in slots.tolist():
+            emit('remove hand', {'hand': str(self._slot_hands[slot])},
+                 broadcast=False)
+            del self._slot_index[hash(self._slot_hands[slot])]
+            for card in self._slot_hands[slot]:
+                self._card_slots[card] &= ~(1 << slot)
+            self._slot_hands[slot] = None
+            self._free_slots.append(slot)
+        self._incidence[:, slots] = False
+        self._hand_sizes[slots] = 0
+
+    def remove_hand(self, hand: Hand) -> bool:
+        """
+        removes a single stored hand; returns whether or not it was stored
+        """
+        slot = self._slot_index.get(hash(hand))
+        if slot is None:
+            return False
+        self._remove_slots(np.array([slot]))
+        return True
+
+    def remove_card(self, card: int) -> None:
+        self._remove_slots(np.flatnonzero(self._incidence[card]))
+        emit('remove card', {'card': int(card)}, room=self._player_sid)
+        self._cards[card] = False
+        self._card_mask ^= 1 << (int(card) - 1)
+        self._selected_mask &= ~(1 << (int(card) - 1))
+        if self._combos is not None:
+            self._combos.remove_card(int(card))
+        self._num_cards -= 1
+        if self._num_cards == 0:
+            emit('finished')
+
+    def add_card(self, card: int) -> None:
+        self._cards[card] = True
+        self._card_mask |= 1 << (int(card) - 1)
+        if self._combos is not None:
+            self._combos.add_card(int(card))
+        self._num_cards += 1
+        emit('add card', {'card': int(card)}, room=self._player_sid)
+
+    def clear_hands(self) -> None:
+        capacity = len(self._slot_hands)
+        self._incidence[:] = False
+        self._num_cards_selected[:] = 0
+        self._hand_sizes[:] = 0
+        self._slot_hands = [None] * capacity
+        self._free_slots = list(range(capacity - 1, -1, -1))
+        self._slot_index = dict()
+        self._card_slots = [0] * 53
+        emit('clear stored hands', broadcast=False)
+
+    def _count_selected_cards(self, deselected_mask: int,
+                              selected_mask: int) -> None:
+        for card in cards_of(deselected_mask):
+            self._num_cards_selected[self._incidence[card]] -= 1
+        for card in cards_of(selected_mask):
+            self._num_cards_selected[self._incidence[card]] += 1
+
+    def contains_card(self, card: int) -> bool:
+        return bool(self._cards[card])
+
+    def contains_hand(self, hand: Hand) -> bool:
+        return hash(hand) in self._slot_index
+
+    def iter_cards(self) -> Generator[int, None, None]:
+        for card in np.flatnonzero(self._cards).tolist():
+            yield card
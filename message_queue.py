@@ -0,0 +1,119 @@
+"""
+a message queue for the Socket.IO servers of several workers on one
+host that needs nothing but the standard library, standing in for Redis
+
+the broker (serve) relays every frame it gets from one connection to all
+the others; BrokerManager is the python-socketio client manager that
+publishes to it and listens on it, so an emit made in one worker reaches
+the clients of every worker
+
+frames are a 4 byte big endian length and then a pickle, so only let
+trusted processes connect; the broker listens on localhost by default
+"""
+import pickle
+import socket
+import struct
+import threading
+import socketio
+
+from typing import List, Tuple
+from urllib.parse import urlparse
+
+
+def _address(url: str) -> Tuple[str, int]:
+    # broker://host:port
+    parsed = urlparse(url)
+    return parsed.hostname or '127.0.0.1', parsed.port or 6380
+
+
+def _send_frame(sock: socket.socket, frame: bytes) -> None:
+    sock.sendall(struct.pack('!I', len(frame)) + frame)
+
+
+def _recv_exactly(reader, size: int) -> bytes:
+    data = reader.read(size)
+    if len(data) < size:
+        raise EOFError("Connection to the broker closed.")
+    return data
+
+
+def _recv_frame(reader) -> bytes:
+    size, = struct.unpack('!I', _recv_exactly(reader, 4))
+    return _recv_exactly(reader, size)
+
+
+def serve(url: str='broker://127.0.0.1:6380') -> None:
+    """
+    runs the broker until the process is killed
+    """
+    listener = socket.create_server(_address(url))
+    connections: List[socket.socket] = list()
+    lock = threading.Lock()
+
+    def relay(connection: socket.socket) -> None:
+        reader = connection.makefile('rb')
+        try:
+            while True:
+                frame = _recv_frame(reader)
+                with lock:
+                    for other in connections:
+                        if other is not connection:
+                            _send_frame(other, frame)
+        except (EOFError, OSError):
+            pass
+        finally:
+            with lock:
+                connections.remove(connection)
+            connection.close()
+
+    while True:
+        connection, _ = listener.accept()
+        connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with lock:
+            connections.append(connection)
+        threading.Thread(target=relay, args=(connection,), daemon=True).start()
+
+
+class BrokerManager(socketio.PubSubManager):
+    """
+    client manager for a broker started with serve, e.g.
+
+        SocketIO(app, client_manager=BrokerManager('broker://127.0.0.1:6380'))
+
+    its sockets block, so under eventlet the worker has to be monkey
+    patched, as the eventlet worker of gunicorn is
+    """
+    name = 'broker'
+
+    def __init__(self, url: str='broker://127.0.0.1:6380',
+                 channel: str='flask-socketio', write_only: bool=False,
+                 logger=None) -> None:
+        super().__init__(channel=channel, write_only=write_only,
+                         logger=logger)
+        self.address = _address(url)
+        self._publisher: socket.socket = None
+        self._publisher_lock = threading.Lock()
+
+    def _connect(self) -> socket.socket:
+        sock = socket.create_connection(self.address)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    def _publish(self, data) -> None:
+        frame = pickle.dumps((self.channel, data))
+        with self._publisher_lock:
+            if self._publisher is None:
+                self._publisher = self._connect()
+            _send_frame(self._publisher, frame)
+
+    def _listen(self):
+        reader = self._connect().makefile('rb')
+        while True:
+            channel, data = pickle.loads(_recv_frame(reader))
+            if channel == self.channel:
+                yield data
+
+
+if __name__ == '__main__':
+    import sys
+    serve(*sys.argv[1:])
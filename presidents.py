@@ -1,4 +1,12 @@
+import signal
+
 from app import socketio, app
+from app.main.events import save_snapshot
 
 if __name__ == '__main__':
-    socketio.run(app)
+    # stop on SIGTERM as on ctrl-c, saving the rooms on the way out
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        socketio.run(app)
+    finally:
+        save_snapshot()
@@ -0,0 +1,255 @@
+"""
+the state of a presidents room and of each player seated in it
+
+a Room is created when its first player joins and a Seat when a player
+joins; both are torn down as soon as they are no longer needed (the
+seat when its player leaves or disconnects, the room when its last seat
+goes), so a long running server only holds the rooms that are in use
+
+pack_room and unpack_room turn a room and its seats into bytes and back,
+for state stores (see state_store) and snapshots
+"""
+import struct
+
+from bidict import bidict
+from typing import Callable, Generator, List, Optional, Tuple
+from hand import Hand
+from frozen_hand import FrozenHand
+from hand_trie import mask_of, cards_of
+
+
+# TODO: don't really like this but like wut do
+class Start:  # for playing the 3 of clubs on
+    pass
+Start = Start()
+
+
+class Seat:
+    """
+    one player in one room, keyed by the player's session id
+    """
+
+    __slots__ = ('sid', 'name', 'room', 'current_hand', '_card_hand_chamber',
+                 '_chamber_snapshot', '_restore_card_hand_chamber',
+                 'takes_remaining', 'gives_remaining')
+
+    def __init__(self, sid: str, name: str, room: str) -> None:
+        self.sid = sid
+        self.name = name
+        self.room = room
+        self.current_hand = Hand()
+        # set when cards are dealt
+        self.card_hand_chamber = None
+        # set when the player finishes as president or vice president
+        self.takes_remaining = 0
+        self.gives_remaining = 0
+
+    @property
+    def card_hand_chamber(self):
+        # an unpacked chamber is restored the first time it is needed
+        if self._chamber_snapshot is not None:
+            self._card_hand_chamber = self._restore_card_hand_chamber(
+                self._chamber_snapshot, self.sid)
+            self._chamber_snapshot = None
+        return self._card_hand_chamber
+
+    @card_hand_chamber.setter
+    def card_hand_chamber(self, card_hand_chamber) -> None:
+        self._card_hand_chamber = card_hand_chamber
+        self._chamber_snapshot = None
+        self._restore_card_hand_chamber = None
+
+    def pack_card_hand_chamber(self) -> bytes:
+        """
+        the snapshot of the chamber, or b"" if no cards were dealt, without
+        restoring a chamber that was not needed yet
+        """
+        if self._chamber_snapshot is not None:
+            return self._chamber_snapshot
+        if self._card_hand_chamber is None:
+            return b""
+        return self._card_hand_chamber.snapshot()
+
+    def unpack_card_hand_chamber(self, snapshot: bytes,
+                                 restore_card_hand_chamber: Callable) -> None:
+        """
+        sets the chamber to be restored from a snapshot of
+        pack_card_hand_chamber, with restore_card_hand_chamber(snapshot,
+        sid) and the sid of the seat at the time, once it is needed
+        """
+        self.card_hand_chamber = None
+        if snapshot:
+            self._chamber_snapshot = snapshot
+            self._restore_card_hand_chamber = restore_card_hand_chamber
+
+    def __repr__(self) -> str:
+        return f"Seat({self.sid!r}, {self.name!r}, {self.room!r})"
+
+    def end_game(self) -> None:
+        """
+        drops everything about the player's part in the current game
+        """
+        self.current_hand.reset()
+        self.card_hand_chamber = None
+        self.takes_remaining = 0
+        self.gives_remaining = 0
+
+
+class Room:
+    """
+    the players of a room in their turn order and the state of the game
+    they are playing
+    """
+
+    __slots__ = ('name', 'player_sids', 'player_cycler', 'current_player',
+                 'hand_in_play', 'finished_player_sids',
+                 'num_unfinished_players', 'consecutive_passes',
+                 'positions', 'currently_trading', 'winning_last')
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.player_sids: List[str] = list()
+        self.end_game()
+
+    def __repr__(self) -> str:
+        return f"Room({self.name!r}, {len(self.player_sids)} players)"
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.player_sids
+
+    @property
+    def in_game(self) -> bool:
+        return self.player_cycler is not None
+
+    def end_game(self) -> None:
+        """
+        drops the state of the current game, keeping the players
+        """
+        self.player_cycler: Optional[Generator[str, None, None]] = None
+        self.current_player: Optional[str] = None
+        self.hand_in_play = None
+        self.finished_player_sids: List[str] = list()
+        self.num_unfinished_players = 4
+        self.consecutive_passes = 0
+        # player sid <-> position in the last round
+        self.positions = bidict()
+        self.currently_trading = False
+        self.winning_last = False
+
+
+# name length, number of seats, current seat (NO_SEAT if none), number of
+# finished seats, what is in play (one of the kinds below), unfinished
+# players, consecutive passes, flags, and the mask of the hand in play;
+# then the name and the finished seats in order of finishing
+_room_header = struct.Struct('<HBBBBBBB7s')
+# sid length, name length, position (0 if none), takes and gives
+# remaining, the mask of the current hand, and the chamber snapshot
+# length (0 if no cards were dealt); then the sid, name, and snapshot
+_seat_header = struct.Struct('<BHBBB7sH')
+NO_SEAT = 255
+NOTHING_IN_PLAY, START_IN_PLAY, HAND_IN_PLAY = range(3)
+CURRENTLY_TRADING, WINNING_LAST = 1, 2
+
+
+def pack_room(room: Room, seats: List[Seat]) -> bytes:
+    """
+    the room and the seats of its players, in turn order, as bytes; the
+    turn order is kept as the index of the current seat rather than the
+    generator behind it (see unpack_room)
+    """
+    sids = room.player_sids
+    if room.hand_in_play is None:
+        kind, hand_mask = NOTHING_IN_PLAY, 0
+    elif room.hand_in_play is Start:
+        kind, hand_mask = START_IN_PLAY, 0
+    else:
+        kind, hand_mask = HAND_IN_PLAY, mask_of(room.hand_in_play)
+    name = room.name.encode()
+    parts = [_room_header.pack(
+        len(name), len(sids),
+        NO_SEAT if room.current_player is None
+        else sids.index(room.current_player),
+        len(room.finished_player_sids), kind, room.num_unfinished_players,
+        room.consecutive_passes,
+        CURRENTLY_TRADING * room.currently_trading +
+        WINNING_LAST * room.winning_last,
+        hand_mask.to_bytes(7, 'little')),
+        name, bytes(map(sids.index, room.finished_player_sids))]
+    positions = dict(room.positions)
+    for seat in seats:
+        sid, name = seat.sid.encode(), seat.name.encode()
+        snapshot = seat.pack_card_hand_chamber()
+        current_hand_mask = (0 if seat.current_hand.is_empty
+                             else mask_of(seat.current_hand))
+        parts.append(_seat_header.pack(
+            len(sid), len(name), positions.get(seat.sid, 0),
+            seat.takes_remaining, seat.gives_remaining,
+            current_hand_mask.to_bytes(7, 'little'), len(snapshot)))
+        parts += (sid, name, snapshot)
+    return b"".join(parts)
+
+
+def packed_room_name(packed: bytes) -> str:
+    """
+    the name of a room packed by pack_room, without unpacking the rest
+    """
+    name_length = _room_header.unpack_from(packed)[0]
+    offset = _room_header.size
+    return bytes(packed[offset:offset + name_length]).decode()
+
+
+def unpack_room(packed: bytes, restore_card_hand_chamber: Callable
+                ) -> Tuple[Room, List[Seat]]:
+    """
+    the room and seats of pack_room, whose chambers are restored with
+    restore_card_hand_chamber(snapshot, player_sid) when first used; the
+    room's player_cycler is left for its owner to rebuild from
+    current_player
+    """
+    (name_length, num_seats, current, num_finished, kind,
+     num_unfinished_players, consecutive_passes, flags,
+     hand_mask) = _room_header.unpack_from(packed)
+    offset = _room_header.size
+    room = Room(packed[offset:offset + name_length].decode())
+    offset += name_length
+    finished = packed[offset:offset + num_finished]
+    offset += num_finished
+    seats = list()
+    for _ in range(num_seats):
+        (sid_length, name_length, position, takes_remaining,
+         gives_remaining, current_hand_mask,
+         snapshot_length) = _seat_header.unpack_from(packed, offset)
+        offset += _seat_header.size
+        sid = packed[offset:offset + sid_length].decode()
+        offset += sid_length
+        seat = Seat(sid, packed[offset:offset + name_length].decode(),
+                    room.name)
+        offset += name_length
+        seat.unpack_card_hand_chamber(
+            packed[offset:offset + snapshot_length],
+            restore_card_hand_chamber)
+        offset += snapshot_length
+        current_hand_mask = int.from_bytes(current_hand_mask, 'little')
+        if current_hand_mask:
+            seat.current_hand.set_cards(cards_of(current_hand_mask))
+        seat.takes_remaining = takes_remaining
+        seat.gives_remaining = gives_remaining
+        if position:
+            room.positions.put(sid, position)
+        room.player_sids.append(sid)
+        seats.append(seat)
+    sids = room.player_sids
+    if current != NO_SEAT:
+        room.current_player = sids[current]
+    room.finished_player_sids = [sids[index] for index in finished]
+    if kind == START_IN_PLAY:
+        room.hand_in_play = Start
+    elif kind == HAND_IN_PLAY:
+        room.hand_in_play = FrozenHand.from_mask(
+            int.from_bytes(hand_mask, 'little'))
+    room.num_unfinished_players = num_unfinished_players
+    room.consecutive_passes = consecutive_passes
+    room.currently_trading = bool(flags & CURRENTLY_TRADING)
+    room.winning_last = bool(flags & WINNING_LAST)
+    return room, seats
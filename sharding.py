@@ -0,0 +1,32 @@
+"""
+room-affine sharding: every room is owned by exactly one worker, which
+holds all of its state and the Socket.IO connections of its players
+
+workers are listed in app.config['SHARDS'] by the url their clients
+connect their sockets to, and a worker knows its own index from
+app.config['SHARD']; the presidents page points a client's socket at the
+owner of the client's room, and a worker refuses sockets for rooms it
+does not own, so the rules never need state from another worker
+"""
+import zlib
+
+from typing import List
+
+
+def shard_of(room: str, num_shards: int) -> int:
+    # crc32 rather than hash, which is salted differently in every process
+    return zlib.crc32(room.encode()) % num_shards
+
+
+def owner_url(room: str, shards: List[str]) -> str:
+    """
+    the socket url of the worker that owns room, or '' for the worker
+    that served the page when there is only one worker
+    """
+    if not shards:
+        return ''
+    return shards[shard_of(room, len(shards))]
+
+
+def owns(room: str, shards: List[str], shard: int) -> bool:
+    return not shards or shard_of(room, len(shards)) == shard
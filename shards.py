@@ -0,0 +1,78 @@
+"""
+starts the rooms sharded over several workers on this host (see
+sharding): one gunicorn worker per shard, each on its own port, and the
+message queue broker they share
+
+    python shards.py [number of shards, default one per core]
+
+shard i listens on port PORT + i (PORT defaults to 5000) and is told
+its place through the environment:
+
+    PRESIDENTS_SHARD          its index, 0 to the number of shards - 1
+    PRESIDENTS_SHARDS         the socket url of every shard in order,
+                              http://PRESIDENTS_HOST:port with
+                              PRESIDENTS_HOST defaulting to localhost;
+                              it has to be the name clients reach this
+                              host by
+    PRESIDENTS_MESSAGE_QUEUE  left as it is if set, e.g. to a redis://
+                              url; otherwise a broker (see message_queue)
+                              is started on BROKER_PORT, default 6380
+
+PRESIDENTS_STATE_STORE and PRESIDENTS_SNAPSHOT are passed on to every
+shard unchanged (see app/__init__.py); each shard writes its own snapshot
+
+SIGTERM or ctrl-c is passed on to the shards so they save their rooms,
+and if any shard dies the rest are stopped with it
+"""
+import os
+import signal
+import subprocess
+import sys
+import time
+
+from typing import Dict, List
+
+
+def _shard_environments(num_shards: int, host: str, port: int,
+                        message_queue: str) -> List[Dict[str, str]]:
+    shards = ','.join(f'http://{host}:{port + i}' for i in range(num_shards))
+    return [dict(os.environ, PRESIDENTS_SHARD=str(shard),
+                 PRESIDENTS_SHARDS=shards,
+                 PRESIDENTS_MESSAGE_QUEUE=message_queue)
+            for shard in range(num_shards)]
+
+
+def run(num_shards: int) -> int:
+    host = os.environ.get('PRESIDENTS_HOST', 'localhost')
+    port = int(os.environ.get('PORT', 5000))
+    processes: List[subprocess.Popen] = list()
+    message_queue = os.environ.get('PRESIDENTS_MESSAGE_QUEUE', '')
+    if not message_queue:
+        message_queue = \
+            f"broker://127.0.0.1:{os.environ.get('BROKER_PORT', 6380)}"
+        processes.append(subprocess.Popen(
+            [sys.executable, 'message_queue.py', message_queue]))
+    for shard, environment in enumerate(_shard_environments(
+            num_shards, host, port, message_queue)):
+        processes.append(subprocess.Popen(
+            ['gunicorn', '--worker-class', 'eventlet', '-w', '1',
+             '-b', f'0.0.0.0:{port + shard}', 'presidents:app'],
+            env=environment))
+    # stop on SIGTERM as on ctrl-c
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        while all(process.poll() is None for process in processes):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # the shards first, so none of them loses the broker while saving
+        for process in reversed(processes):
+            if process.poll() is None:
+                process.terminate()
+                process.wait()
+    return max(process.returncode for process in processes)
+
+
+if __name__ == '__main__':
+    sys.exit(run(int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count()))
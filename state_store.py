@@ -0,0 +1,387 @@
+"""
+where the GameEngine keeps the state of its rooms besides its own memory,
+as the bytes of room.pack_room keyed by room name
+
+every backend has the same four methods: commit writes and deletes any
+number of rooms in one round trip, which the engine calls once per action
+with the room the action touched, read and rooms read them back, and
+close lets go of the backend
+
+    MemoryStore        a dict in this process, the fastest
+    SharedMemoryStore  a multiprocessing.shared_memory table that every
+                       worker on the host can read
+    SQLiteStore        a SQLite database in WAL mode that outlives the
+                       workers
+
+open_store makes one from a url like the STATE_STORE config value
+"""
+import fcntl
+import os
+import sqlite3
+import struct
+import tempfile
+import time
+import zlib
+
+from multiprocessing import resource_tracker, shared_memory
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+
+# the longest room name in bytes that every backend can keep
+KEY_SIZE = 64
+
+
+class DoesNotFitError(Exception):
+    """
+    raised by commit when a room is too large for the store or the store
+    has no space left for it
+    """
+
+
+class StateStore:
+    """
+    the interface of the backends
+    """
+
+    def commit(self, puts: Dict[str, bytes], deletes: Iterable[str]=()
+               ) -> None:
+        raise NotImplementedError
+
+    def read(self, room: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def rooms(self) -> List[str]:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryStore(StateStore):
+
+    def __init__(self) -> None:
+        self._rooms: Dict[str, bytes] = dict()
+
+    def commit(self, puts: Dict[str, bytes], deletes: Iterable[str]=()
+               ) -> None:
+        self._rooms.update(puts)
+        for room in deletes:
+            self._rooms.pop(room, None)
+
+    def read(self, room: str) -> Optional[bytes]:
+        return self._rooms.get(room)
+
+    def rooms(self) -> List[str]:
+        return list(self._rooms)
+
+
+# version (odd while being written), state, key length, value length
+_slot_header = struct.Struct('<IBHI')
+EMPTY, USED, DELETED = range(3)
+# before the slots: the version of the layout (odd while the slots are
+# being compacted, see _compact), and the number of used and deleted slots
+_table_header = struct.Struct('<III')
+# the share of the slots that may be used or deleted before the deleted
+# ones are dropped; probes stop at an empty slot, so some must be left
+MAX_LOAD = 0.75
+# how long a reader waits for a slot or the layout to be written before
+# giving up on it, in seconds
+WRITE_TIMEOUT = 1.0
+
+
+class SharedMemoryStore(StateStore):
+    """
+    an open addressing hash table of fixed size slots in a shared memory
+    block, created by the first worker to open it and attached to by the
+    rest
+
+    writers take an flock on a file next to the block, so slots are never
+    claimed twice; readers take no lock and instead retry a slot whose
+    version changed while they copied it, and a lookup during which the
+    slots were compacted
+
+    deleted slots are left as tombstones for the probes of the keys after
+    them, and compacted away once there are too many of them
+    """
+
+    def __init__(self, name: str='presidents', num_slots: int=16384,
+                 slot_size: int=2048, key_size: int=KEY_SIZE) -> None:
+        self.num_slots = num_slots
+        self.slot_size = slot_size
+        self.key_size = key_size
+        try:
+            self._memory = shared_memory.SharedMemory(
+                name, create=True,
+                size=_table_header.size + num_slots * slot_size)
+            self.owner = True
+        except FileExistsError:
+            self._memory = shared_memory.SharedMemory(name)
+            # the resource tracker would unlink the block when this worker
+            # exits, under the workers still using it
+            resource_tracker.unregister(self._memory._name, 'shared_memory')
+            self.owner = False
+        self._buffer = self._memory.buf
+        self._lock_file = open(
+            os.path.join(tempfile.gettempdir(), f'{name}.lock'), 'a')
+
+    def _probe(self, key: bytes) -> Iterable[int]:
+        start = zlib.crc32(key) % self.num_slots
+        for i in range(self.num_slots):
+            yield self._offset((start + i) % self.num_slots)
+
+    def _offset(self, slot: int) -> int:
+        return _table_header.size + slot * self.slot_size
+
+    def _written_version(self, offset: int) -> int:
+        """
+        the version at offset once it is even, i.e. not being written
+        """
+        deadline = None
+        while True:
+            version, = struct.unpack_from('<I', self._buffer, offset)
+            if not version & 1:
+                return version
+            if deadline is None:
+                deadline = time.monotonic() + WRITE_TIMEOUT
+            elif time.monotonic() > deadline:
+                # a writer died halfway; the next write repairs it
+                raise TimeoutError(
+                    f"Shared memory at {offset} was left half written.")
+            # sleeps rather than spins, which under eventlet also lets the
+            # other green threads of the worker run
+            time.sleep(0.0001)
+
+    def _key_matches(self, offset: int, key_length: int, key: bytes) -> bool:
+        start = offset + _slot_header.size
+        return (key_length == len(key) and
+                self._buffer[start:start + key_length] == key)
+
+    def _read_slot(self, offset: int, key: bytes=None):
+        """
+        the state, key, and value of the slot at offset, where the value is
+        only copied if key is None or the slot's key, and is b"" otherwise
+        """
+        while True:
+            version = self._written_version(offset)
+            _, state, key_length, value_length = \
+                _slot_header.unpack_from(self._buffer, offset)
+            start = offset + _slot_header.size
+            slot_key = bytes(self._buffer[start:start + key_length])
+            value = b""
+            if key is None or slot_key == key:
+                start += self.key_size
+                value = bytes(self._buffer[start:start + value_length])
+            if _slot_header.unpack_from(self._buffer, offset)[0] == version:
+                return state, slot_key, value
+
+    def _consistent(self, lookup: Callable):
+        """
+        the result of lookup from a layout that did not change meanwhile
+        """
+        while True:
+            layout = self._written_version(0)
+            result = lookup()
+            if struct.unpack_from('<I', self._buffer, 0)[0] == layout:
+                return result
+
+    # the writers, which hold the lock and so read the slots directly
+
+    def _find(self, key: bytes) -> Optional[int]:
+        for offset in self._probe(key):
+            _, state, key_length, _ = \
+                _slot_header.unpack_from(self._buffer, offset)
+            if state == EMPTY:
+                return None
+            if state == USED and self._key_matches(offset, key_length, key):
+                return offset
+        return None
+
+    def _write_slot(self, offset: int, state: int, key: bytes,
+                    value: bytes) -> None:
+        # odd while being written, even if a writer died leaving it odd
+        version = _slot_header.unpack_from(self._buffer, offset)[0] | 1
+        struct.pack_into('<I', self._buffer, offset, version)
+        start = offset + _slot_header.size
+        self._buffer[start:start + len(key)] = key
+        start += self.key_size
+        self._buffer[start:start + len(value)] = value
+        _slot_header.pack_into(self._buffer, offset, version + 1, state,
+                               len(key), len(value))
+
+    def _put(self, key: bytes, value: bytes) -> None:
+        free = None
+        free_state = None
+        for offset in self._probe(key):
+            _, state, key_length, _ = \
+                _slot_header.unpack_from(self._buffer, offset)
+            if state == USED and self._key_matches(offset, key_length, key):
+                self._write_slot(offset, USED, key, value)
+                return
+            if state != USED and free is None:
+                free, free_state = offset, state
+            if state == EMPTY:
+                break
+        if free is None:
+            raise DoesNotFitError("The shared memory store is full.")
+        self._write_slot(free, USED, key, value)
+        layout, used, deleted = _table_header.unpack_from(self._buffer, 0)
+        _table_header.pack_into(self._buffer, 0, layout, used + 1,
+                                deleted - (free_state == DELETED))
+
+    def _delete(self, key: bytes) -> None:
+        offset = self._find(key)
+        if offset is not None:
+            self._write_slot(offset, DELETED, b"", b"")
+            layout, used, deleted = _table_header.unpack_from(self._buffer, 0)
+            _table_header.pack_into(self._buffer, 0, layout, used - 1,
+                                    deleted + 1)
+
+    def _compact(self) -> None:
+        """
+        puts every key again into a table without deleted slots, so probes
+        stop at an empty slot again; readers wait for it or retry
+        """
+        layout, used, _ = _table_header.unpack_from(self._buffer, 0)
+        layout |= 1
+        _table_header.pack_into(self._buffer, 0, layout, used, 0)
+        entries = list()
+        for slot in range(self.num_slots):
+            offset = self._offset(slot)
+            _, state, key_length, value_length = \
+                _slot_header.unpack_from(self._buffer, offset)
+            if state == EMPTY:
+                continue
+            if state == USED:
+                start = offset + _slot_header.size
+                entries.append((
+                    bytes(self._buffer[start:start + key_length]),
+                    bytes(self._buffer[start + self.key_size:
+                                       start + self.key_size + value_length])))
+            self._write_slot(offset, EMPTY, b"", b"")
+        _table_header.pack_into(self._buffer, 0, layout, 0, 0)
+        for key, value in entries:
+            self._put(key, value)
+        struct.pack_into('<I', self._buffer, 0, layout + 1)
+
+    def commit(self, puts: Dict[str, bytes], deletes: Iterable[str]=()
+               ) -> None:
+        max_value_size = self.slot_size - _slot_header.size - self.key_size
+        # checked before anything is written, so a commit that does not
+        # fit leaves the store as it was
+        for room, value in puts.items():
+            if len(room.encode()) > self.key_size or \
+                    len(value) > max_value_size:
+                raise DoesNotFitError(f"Room {room!r} does not fit in a slot.")
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        try:
+            for room, value in puts.items():
+                self._put(room.encode(), value)
+            for room in deletes:
+                self._delete(room.encode())
+            _, used, deleted = _table_header.unpack_from(self._buffer, 0)
+            # at least a sixteenth of the slots are deleted, so a table
+            # that is nearly full of used slots is not compacted after
+            # every delete
+            if (used + deleted > MAX_LOAD * self.num_slots and
+                    deleted > self.num_slots // 16):
+                self._compact()
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    # the readers, which take no lock
+
+    def read(self, room: str) -> Optional[bytes]:
+        key = room.encode()
+
+        def lookup() -> Optional[bytes]:
+            for offset in self._probe(key):
+                state, slot_key, value = self._read_slot(offset, key)
+                if state == EMPTY:
+                    return None
+                if state == USED and slot_key == key:
+                    return value
+            return None
+
+        return self._consistent(lookup)
+
+    def rooms(self) -> List[str]:
+
+        def lookup() -> List[str]:
+            rooms = list()
+            for slot in range(self.num_slots):
+                state, key, _ = self._read_slot(self._offset(slot), b"")
+                if state == USED:
+                    rooms.append(key.decode())
+            return rooms
+
+        return self._consistent(lookup)
+
+    def close(self) -> None:
+        self._lock_file.close()
+        self._buffer.release()
+        self._memory.close()
+
+    def unlink(self) -> None:
+        """
+        frees the block once no worker needs it, e.g. after a benchmark
+        """
+        self._memory.unlink()
+
+
+class SQLiteStore(StateStore):
+
+    def __init__(self, path: str='presidents.db') -> None:
+        # eventlet runs every green thread on the one os thread anyway
+        self._connection = sqlite3.connect(path, isolation_level=None,
+                                           check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        # WAL commits are durable across crashes of the worker, and only
+        # the last ones can be lost if the machine itself goes down
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute('CREATE TABLE IF NOT EXISTS rooms ('
+                                 'name TEXT PRIMARY KEY, state BLOB NOT NULL)')
+
+    def commit(self, puts: Dict[str, bytes], deletes: Iterable[str]=()
+               ) -> None:
+        connection = self._connection
+        connection.execute('BEGIN')
+        try:
+            connection.executemany(
+                'INSERT OR REPLACE INTO rooms (name, state) VALUES (?, ?)',
+                puts.items())
+            connection.executemany('DELETE FROM rooms WHERE name = ?',
+                                   [(room,) for room in deletes])
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    def read(self, room: str) -> Optional[bytes]:
+        row = self._connection.execute(
+            'SELECT state FROM rooms WHERE name = ?', (room,)).fetchone()
+        return None if row is None else row[0]
+
+    def rooms(self) -> List[str]:
+        return [name for name, in
+                self._connection.execute('SELECT name FROM rooms')]
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+def open_store(url: str) -> Optional[StateStore]:
+    """
+    '' for none, memory://, shm://name, or sqlite:///path/to.db (relative)
+    or sqlite:////path/to.db (absolute)
+    """
+    if not url:
+        return None
+    parsed = urlparse(url)
+    if parsed.scheme == 'memory':
+        return MemoryStore()
+    if parsed.scheme == 'shm':
+        return SharedMemoryStore(parsed.netloc or 'presidents')
+    if parsed.scheme == 'sqlite':
+        return SQLiteStore(parsed.path[1:])
+    raise ValueError(f"Unknown state store {url!r}.")
@@ -0,0 +1,89 @@
+"""
+checks that a ComboIndex kept up to date card by card holds the same
+hands, and finds the same hands beating a hand in play, as rescanning
+the holding with legal_hands and as trying every combination of at most
+5 of its cards
+
+random holdings of 13 to 20 cards lose and gain random cards, as they
+do when hands are played and cards traded; the index is checked after
+every change and queried with hands of every category; every other
+holding starts with the 4 cards of a value, so bombs are covered too
+
+run from the repository root:
+    python -m tests.differential_combo_index [number of holdings]
+"""
+import random
+
+from itertools import combinations
+from combo_index import ComboIndex
+from frozen_hand import FrozenHand
+from hand import STRONGER
+from hand_trie import mask_of
+from legal_hands import hands_beating, iter_hands, strength
+from utils.utils import main
+
+
+def _every_combination(cards: set) -> set:
+    return {hand_mask for n in range(1, 6)
+            for combination in combinations(cards, n)
+            for hand_mask in [mask_of(combination)]
+            if FrozenHand.from_mask(hand_mask).is_valid}
+
+
+def _check(index: ComboIndex, cards: set, hands_in_play: list) -> None:
+    indexed = {mask_of(hand) for hand in index}
+    assert len(indexed) == len(index), "a hand is indexed twice"
+    assert indexed == {mask_of(hand) for hand in iter_hands(cards)}, \
+        f"{sorted(cards)}: the index differs from a rescan"
+    assert indexed == _every_combination(cards), \
+        f"{sorted(cards)}: the index differs from every combination"
+    for hand_in_play in hands_in_play:
+        beating = index.hands_beating(hand_in_play)
+        # hands of the same strength can come in any order
+        assert {mask_of(hand) for hand in beating} == \
+            {mask_of(hand) for hand in hands_beating(cards, hand_in_play)}, \
+            f"{sorted(cards)}: hands beating {hand_in_play} differ from a rescan"
+        assert len(beating) == len(set(map(mask_of, beating)))
+        assert {mask_of(hand) for hand in beating} == \
+            {mask_of(hand) for hand in index
+             if hand.compare(hand_in_play) == STRONGER}, \
+            f"{sorted(cards)}: hands beating {hand_in_play} are missing"
+        assert [strength(hand) for hand in beating] == \
+            sorted(strength(hand) for hand in beating), \
+            f"{sorted(cards)}: hands beating {hand_in_play} are out of order"
+        assert index.can_beat(hand_in_play) == bool(beating)
+
+
+@main
+def run(num_holdings: str='5'):
+    random.seed(0)
+    # a few hands of every category to play on
+    by_id = dict()
+    for hand in iter_hands(range(1, 53)):
+        by_id.setdefault(hand._id, []).append(hand)
+    hands_in_play = [hand for hands in by_id.values()
+                     for hand in random.sample(hands, min(3, len(hands)))]
+    num_changes = 0
+    for holding in range(int(num_holdings)):
+        num_cards = random.randint(13, 20)
+        cards = set()
+        if holding % 2 == 0:
+            value = random.randint(1, 13)
+            cards = set(range(4 * value - 3, 4 * value + 1))
+        cards |= set(random.sample(sorted(set(range(1, 53)) - cards),
+                                   num_cards - len(cards)))
+        index = ComboIndex(cards)
+        _check(index, cards, hands_in_play)
+        for _ in range(20):
+            if random.random() < 0.5 and len(cards) > 1:
+                card = random.choice(sorted(cards))
+                index.remove_card(card)
+                cards.remove(card)
+            elif len(cards) < 20:
+                card = random.choice(sorted(set(range(1, 53)) - cards))
+                index.add_card(card)
+                cards.add(card)
+            _check(index, cards, hands_in_play)
+            num_changes += 1
+    print(f"{num_holdings} holdings, {num_changes} cards removed or " +
+          "added, the index agrees with rescans after every one")
@@ -0,0 +1,234 @@
+"""
+every packet the server sends in a few seeded games, compared with the
+packets recorded in tests/event_streams.json.gz
+
+the games are played through Socket.IO test clients by bots that only
+know what their client was sent: they store, select, and remove hands,
+play singles through a whole round, trade, start the next round, and
+leave, so the rules, the card hand chambers, the batching of emits, and
+the socket layer are all covered, with either card hand chamber; the
+recording was made before the rules moved into the GameEngine, and any
+change to what a client is sent shows up here as the first packet that
+differs
+
+run from the repository root: python -m tests.differential_event_stream
+and with 'write' to record the packets again after a deliberate change
+"""
+import gzip
+import json
+import os
+import random
+import re
+import numpy as np
+
+from app import app, socketio
+from frozen_hand import FrozenHand
+from utils.utils import main
+
+
+app.config['WTF_CSRF_ENABLED'] = False
+namespace = '/presidents'
+recording = os.path.join(os.path.dirname(__file__), 'event_streams.json.gz')
+turn = re.compile(r"SERVER: it's (.+)'s turn!")
+# the bots only ever play singles
+singles = {str(FrozenHand.from_mask(1 << card - 1)): card
+           for card in range(1, 53)}
+
+
+def _events(packets: list) -> list:
+    # the (name, data) of every event, batched into a 'state delta' or not
+    events = list()
+    for packet in packets:
+        if packet['name'] == 'state delta':
+            events += [(event[0], event[1] if len(event) > 1 else None)
+                       for event in packet['args'][0]['events']]
+        elif isinstance(packet['args'], dict):  # emitted with one argument
+            events.append((packet['name'], packet['args']))
+        else:
+            events.append((packet['name'],
+                           packet['args'][0] if packet['args'] else None))
+    return events
+
+
+class _Bot:
+
+    def __init__(self, name: str, room: str) -> None:
+        self.name = name
+        flask_client = app.test_client()
+        flask_client.post('/login', data={'name': name, 'room': room})
+        self.client = socketio.test_client(app, namespace=namespace,
+                                           flask_test_client=flask_client)
+        self.received = list()
+        self.cards = set()
+        self.trading = False
+        # whose turn it was when the server last said, which it doesn't
+        # when a round starts
+        self.turn = None
+        self.in_play = None  # the single in play
+
+    def emit(self, event: str, *args) -> None:
+        self.client.emit(event, *args, namespace=namespace)
+
+    def receive(self) -> list:
+        packets = self.client.get_received(namespace)
+        self.received += packets
+        events = _events(packets)
+        for name, data in events:
+            if name == 'assign cards':
+                self.cards = set(data['cards'])
+                self.turn = self.in_play = None
+            elif name == 'remove card':
+                self.cards.discard(data['card'])
+            elif name == 'add card':
+                self.cards.add(data['card'])
+            elif name == 'add trading options':
+                self.trading = True
+            elif name == 'remove trading options':
+                self.trading = False
+            elif name == 'hand in play':
+                self.in_play = singles[data['hand']]
+            elif name == 'clear hand in play':
+                self.in_play = None
+            elif name == 'message' and turn.match(data['msg']):
+                self.turn = turn.match(data['msg']).group(1)
+            elif name == 'message' and 'Trading has concluded' in data['msg']:
+                self.turn = None
+        return events
+
+    def pairs(self) -> list:
+        by_value = dict()
+        for card in sorted(self.cards):
+            by_value.setdefault((card - 1) // 4, []).append(card)
+        return [cards[:2] for cards in by_value.values() if len(cards) > 1]
+
+
+def _receive(bots: list) -> list:
+    # the events of the room, as every bot gets them
+    return [bot.receive() for bot in bots][0]
+
+
+def _store_hands(bots: list) -> None:
+    for bot in bots:
+        pairs = bot.pairs()
+        if pairs:
+            bot.emit('set selection', {'cards': pairs[0]})
+            bot.emit('store')
+            bot.emit('hand click', {'cards': pairs[0]})
+            bot.emit('clear current hand')
+        bot.emit('card click', {'card': min(bot.cards)})
+        bot.emit('card click', {'card': min(bot.cards)})
+    _receive(bots)
+    pairs = bots[0].pairs()
+    if pairs:
+        bots[0].emit('remove stored hand', {'cards': pairs[0]})
+    bots[1].emit('clear stored hands')
+    bots[2].emit('text', {'msg': 'good luck'})
+    _receive(bots)
+
+
+def _play(bots: list, max_turns: int) -> bool:
+    """
+    plays singles until trading starts or max_turns turns are over, and
+    says whether trading started; the bots go by what they were sent, so
+    this picks up wherever the game is
+    """
+    by_name = {bot.name: bot for bot in bots}
+    for _ in range(max_turns):
+        if bots[0].turn is None:  # a round starts on the 3 of clubs
+            bot = next(bot for bot in bots if 1 in bot.cards)
+            playable = [1]
+            # out of turn, which the server refuses
+            bots[(bots.index(bot) + 1) % 4].emit('play current hand')
+        else:
+            bot = by_name[bots[0].turn]
+            playable = sorted(card for card in bot.cards
+                              if bot.in_play is None or card > bot.in_play)
+        if playable:
+            bot.emit('set selection', {'cards': playable[:1]})
+            bot.emit('play current hand')
+        else:
+            bot.emit('pass current hand')
+        messages = [data['msg'] for name, data in _receive(bots)
+                    if name == 'message']
+        if playable and not bot.cards:
+            bot.emit('player finish')
+            messages += [data['msg'] for name, data in _receive(bots)
+                         if name == 'message']
+        if any('Trading starts now' in message for message in messages):
+            return True
+    return False
+
+
+def _trade(bots: list) -> None:
+    for bot in bots:
+        if bot.trading:
+            for value in range(13, 0, -1):
+                bot.emit('ask for card', {'value': value})
+            _receive(bots)
+            for _ in range(3):
+                bot.emit('card click', {'card': min(bot.cards)})
+                bot.emit('give current card')
+                _receive(bots)
+
+
+def _game(seed: int) -> list:
+    random.seed(seed)
+    np.random.seed(seed)
+    room = f'room {seed}'
+    bots = [_Bot(f'player {i}', room) for i in range(4)]
+    for bot in bots:
+        bot.emit('joined', {})
+    _receive(bots)
+    _store_hands(bots)
+    if _play(bots, 300):
+        _trade(bots)
+        _play(bots, 12)
+    bots[3].emit('left', {})
+    _receive(bots)
+    for bot in bots:
+        bot.client.disconnect(namespace=namespace)
+    return [bot.received for bot in bots]
+
+
+def _first_difference(recorded: list, played: list) -> str:
+    for game, (recorded_game, played_game) in enumerate(
+            zip(recorded, played)):
+        for bot, (recorded_packets, played_packets) in enumerate(
+                zip(recorded_game, played_game)):
+            for i, (recorded_packet, played_packet) in enumerate(
+                    zip(recorded_packets, played_packets)):
+                if recorded_packet != played_packet:
+                    return (f"game {game}, player {bot}, packet {i}:\n" +
+                            f"  recorded {recorded_packet}\n" +
+                            f"  sent     {played_packet}")
+            if len(recorded_packets) != len(played_packets):
+                return (f"game {game}, player {bot}: {len(recorded_packets)}" +
+                        f" packets recorded, {len(played_packets)} sent")
+    return "a different number of games"
+
+
+def _games(num_games: int) -> list:
+    # through json, so tuples and lists compare equal
+    return json.loads(json.dumps([_game(seed) for seed in range(num_games)]))
+
+
+@main
+def run(mode: str='check', num_games: str='4'):
+    if mode == 'write':
+        played = _games(int(num_games))
+        with gzip.open(recording, 'wt') as file:
+            json.dump(played, file)
+        print(f"recorded {sum(map(len, played[0]))} packets of game 0 " +
+              f"and {len(played)} games in all")
+        return
+    with gzip.open(recording, 'rt') as file:
+        recorded = json.load(file)
+    # either card hand chamber must send the same
+    for implementation in ('llist', 'matrix'):
+        app.config['CARD_HAND_CHAMBER'] = implementation
+        played = _games(int(num_games))
+        assert recorded == played, \
+            f"{implementation}: {_first_difference(recorded, played)}"
+        print(f"{implementation}: {len(played)} games, " +
+              f"{sum(len(packets) for game in played for packets in game)}" +
+              " packets, all as recorded")
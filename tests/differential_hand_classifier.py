@@ -0,0 +1,57 @@
+"""
+checks that hand_classifier.classify agrees with the hand table on every
+hand enumerated by hand_hash_table._add_all; pass exhaustive to also check
+every possible hand of 0 to 5 cards (about 3 million, invalid ones too)
+
+run from the repository root:
+    python -m tests.differential_hand_classifier [exhaustive]
+"""
+import numpy as np
+import hand_hash_table
+
+from itertools import chain, combinations
+from hand_classifier import classify
+from utils.utils import hand_hash_batch, main
+
+
+def _unhash(h: int):
+    cards = list()
+    for _ in range(5):
+        h //= 53
+        cards.append(h % 53)
+    return [card for card in reversed(cards) if card]
+
+
+def _check_enumerated() -> int:
+    hand_hash_table._add_all()
+    for h, id in hand_hash_table.hand_table.items():
+        cards = _unhash(h)
+        expected = (id, hand_hash_table.hand_rank_table[h])
+        assert classify(cards) == expected, \
+            f"{cards}: {classify(cards)} != {expected}"
+    return len(hand_hash_table.hand_table)
+
+
+def _check_exhaustive() -> int:
+    hand_table = hand_hash_table.hand_table
+    hand_rank_table = hand_hash_table.hand_rank_table
+    assert classify([]) == (0, 0)
+    checked = 1
+    for n in range(1, 6):
+        combos = np.fromiter(chain.from_iterable(combinations(range(1, 53), n)),
+                             dtype=np.uint8).reshape(-1, n)
+        hands = np.zeros(shape=(len(combos), 5), dtype=np.uint8)
+        hands[:, 5 - n:] = combos
+        for cards, h in zip(combos.tolist(), hand_hash_batch(hands).tolist()):
+            expected = (hand_table.get(h, n * 10), hand_rank_table.get(h, 0))
+            assert classify(cards) == expected, \
+                f"{cards}: {classify(cards)} != {expected}"
+        checked += len(combos)
+    return checked
+
+
+@main
+def run(*args):
+    print(f"{_check_enumerated()} enumerated hands agree")
+    if 'exhaustive' in args:
+        print(f"{_check_exhaustive()} possible hands agree")
@@ -0,0 +1,192 @@
+"""
+rooms brought back after a restart, from the snapshot and from the state
+store, compared with the rooms as they were and the game as it would
+have gone on without the restart
+
+a few seeded games (see tests.differential_event_stream) are played to a
+cut, some in the middle of a round and some when trading starts, by a
+worker that writes its rooms to a SQLite state store after every action
+and to the snapshot once it is done, like a worker that is stopped; then
+every game is played on from the cut:
+
+    through   by the same worker, without a restart
+    snapshot  by a worker started with the snapshot alone
+    store     by a worker started with the state store alone
+
+each of the restarted workers must have every room as it was at the cut,
+with every seat waiting for its player; its bots join again as new
+clients with the same names and must get their seats back, and from
+then on every packet they are sent must be what the bots of the worker
+that never stopped were sent
+
+every worker is its own process, since the rooms are restored when the
+app is made
+
+run from the repository root: python -m tests.differential_restart
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from utils.utils import main
+
+
+# the turns played in each game before the cut, or None for when trading
+# starts; game 0 is cut with two passes since the last play and game 2
+# also after the first player has finished
+cut_turns = [22, None, 58, None]
+num_games = len(cut_turns)
+
+
+def _cut(bots: list, seed: int) -> None:
+    from tests.differential_event_stream import _play
+    _play(bots, cut_turns[seed] or 300)
+
+
+def _play_on(bots: list) -> None:
+    from tests.differential_event_stream import _play, _trade
+    if any(bot.trading for bot in bots) or _play(bots, 300):
+        _trade(bots)
+        _play(bots, 12)
+
+
+def _state(room_name: str) -> dict:
+    # the room and its seats by player name, as sids don't survive
+    from app.main.events import engine
+    from card_hand_chamber import unpack_snapshot
+    from room import Start
+    room = engine.rooms[room_name]
+
+    def name(sid):
+        return engine.seats[sid].name
+
+    def seat(sid):
+        seat = engine.seats[sid]
+        # without restoring the chamber, which the rejoin does
+        card_mask, _, hands = unpack_snapshot(seat.pack_card_hand_chamber())
+        return [card_mask, sorted(map(str, hands)),
+                seat.takes_remaining, seat.gives_remaining]
+
+    return {
+        'players': [name(sid) for sid in room.player_sids],
+        'current player': room.current_player and name(room.current_player),
+        'hand in play': 'start' if room.hand_in_play is Start
+                        else str(room.hand_in_play),
+        'finished': [name(sid) for sid in room.finished_player_sids],
+        'positions': {name(sid): position
+                      for sid, position in room.positions.items()},
+        'unfinished': room.num_unfinished_players,
+        'passes': room.consecutive_passes,
+        'trading': room.currently_trading,
+        'winning last': room.winning_last,
+        'seats': {name(sid): seat(sid) for sid in room.player_sids},
+    }
+
+
+def _worker(mode: str) -> dict:
+    import numpy as np
+    import random
+    from app.main.events import engine, save_snapshot
+    from tests.differential_event_stream import (
+        _Bot, _receive, _store_hands)
+    rooms = [f'room {seed}' for seed in range(num_games)]
+    result = {'states': dict(), 'continuations': list()}
+    games = list()
+    if mode in ('cut', 'through'):
+        for seed in range(num_games):
+            random.seed(seed)
+            np.random.seed(seed)
+            bots = [_Bot(f'player {i}', rooms[seed]) for i in range(4)]
+            for bot in bots:
+                bot.emit('joined', {})
+            _receive(bots)
+            _store_hands(bots)
+            _cut(bots, seed)
+            games.append(bots)
+        if mode == 'cut':
+            result['states'] = {room: _state(room) for room in rooms}
+            save_snapshot()
+            return result
+    else:
+        assert sorted(engine.rooms) == rooms, \
+            f"{mode}: restored {sorted(engine.rooms)}"
+        result['states'] = {room: _state(room) for room in rooms}
+        assert len(engine.unclaimed_sids) == 4 * num_games, \
+            f"{mode}: {len(engine.unclaimed_sids)} seats wait for a player"
+        for room in rooms:
+            players = [engine.seats[sid].name
+                       for sid in engine.rooms[room].player_sids]
+            # in another order than they sat down in
+            bots = [_Bot(name, room) for name in reversed(players)]
+            for bot in bots:
+                bot.emit('joined', {})
+            _receive(bots)
+            assert [engine.seats[sid].name for sid in
+                    engine.rooms[room].player_sids] == players, \
+                f"{mode}: {room} did not give the seats back"
+            # the bots play in the order they first sat down in
+            bots.sort(key=lambda bot: bot.name)
+            games.append(bots)
+        assert not engine.unclaimed_sids, \
+            f"{mode}: {len(engine.unclaimed_sids)} seats were not taken back"
+    for seed, bots in enumerate(games):
+        _receive(bots)
+        for bot in bots:
+            bot.received = list()
+        # the next round is dealt as without a restart
+        random.seed(seed)
+        np.random.seed(seed)
+        _play_on(bots)
+        result['continuations'].append(
+            {bot.name: bot.received for bot in bots})
+    return result
+
+
+def _run_worker(mode: str, directory: str, **environment) -> dict:
+    path = os.path.join(directory, f'{mode}.json')
+    # only what the worker is given, and no shards
+    environment = dict(
+        {name: value for name, value in os.environ.items()
+         if name not in ('PRESIDENTS_SNAPSHOT', 'PRESIDENTS_STATE_STORE',
+                         'PRESIDENTS_SHARDS')}, **environment)
+    subprocess.run([sys.executable, '-W', 'ignore', '-m',
+                    'tests.differential_restart', mode, path],
+                   env=environment, check=True)
+    with open(path) as file:
+        return json.load(file)
+
+
+@main
+def run(mode: str='check', path: str=''):
+    if mode != 'check':
+        from app import app
+        app.config['WTF_CSRF_ENABLED'] = False
+        with open(path, 'w') as file:
+            # through json, so tuples and lists compare equal
+            json.dump(_worker(mode), file)
+        return
+    with tempfile.TemporaryDirectory() as directory:
+        snapshot = os.path.join(directory, 'rooms.snapshot')
+        store = 'sqlite:///' + os.path.join(directory, 'rooms.db')
+        cut = _run_worker('cut', directory, PRESIDENTS_SNAPSHOT=snapshot,
+                          PRESIDENTS_STATE_STORE=store)
+        through = _run_worker('through', directory)
+        for mode, environment in (
+                ('snapshot', {'PRESIDENTS_SNAPSHOT': snapshot}),
+                ('store', {'PRESIDENTS_STATE_STORE': store})):
+            restarted = _run_worker(mode, directory, **environment)
+            assert restarted['states'] == cut['states'], \
+                f"{mode}: the rooms were not restored as they were"
+            for game, (played, restarted_played) in enumerate(
+                    zip(through['continuations'],
+                        restarted['continuations'])):
+                assert played == restarted_played, \
+                    f"{mode}: game {game} went on differently"
+            num_packets = sum(len(packets)
+                              for game in restarted['continuations']
+                              for packets in game.values())
+            print(f"{mode}: {len(cut['states'])} rooms restored as they " +
+                  f"were, {num_packets} packets after the seats were " +
+                  "taken back, all as without a restart")
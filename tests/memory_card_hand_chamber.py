@@ -0,0 +1,56 @@
+"""
+bytes and allocations per stored hand of CardHandChamber, measured with
+tracemalloc while storing hands into a fresh chamber and then again
+after clear_hands, when the nodes of the cleared hands can be reused
+
+emit is replaced with a no-op since there is no socket to send to
+
+run from the repository root: python -m tests.memory_card_hand_chamber
+"""
+import gc
+import random
+import tracemalloc
+import numpy as np
+
+import card_hand_chamber
+
+from card_hand_chamber import CardHandChamber
+from legal_hands import iter_hands
+from utils.utils import main
+
+
+def _no_emit(*args, **kwargs) -> None:
+    pass
+
+
+card_hand_chamber.emit = _no_emit
+
+
+def _per_hand(chamber: CardHandChamber, hands: list) -> tuple:
+    gc.collect()
+    before = tracemalloc.take_snapshot()
+    for hand in hands:
+        chamber.add_hand(hand)
+    after = tracemalloc.take_snapshot()
+    stats = after.compare_to(before, 'lineno')
+    num_bytes = sum(stat.size_diff for stat in stats)
+    num_allocations = sum(stat.count_diff for stat in stats)
+    return num_bytes / len(hands), num_allocations / len(hands)
+
+
+@main
+def run(n: str='100'):
+    random.seed(0)
+    hands = [hand for hand in iter_hands(range(1, 53)) if not hand.is_single]
+    hands = random.sample(hands, int(n))
+    tracemalloc.start()
+    chamber = CardHandChamber(np.arange(1, 53), 'sid')
+    # warm up the FrozenHand intern table
+    for hand in hands:
+        chamber.add_hand(hand)
+    chamber = CardHandChamber(np.arange(1, 53), 'sid')
+    print(f"{'per stored hand':<28}{'bytes':>10}{'allocations':>14}")
+    print(f"{'fresh chamber':<28}{'%10.0f%14.1f' % _per_hand(chamber, hands)}")
+    chamber.clear_hands()
+    print(f"{'after clear_hands':<28}{'%10.0f%14.1f' % _per_hand(chamber, hands)}")
+    tracemalloc.stop()
@@ -0,0 +1,80 @@
+"""
+memory and allocations of the hand copies made over simulated games with
+Hand.copy vs. FrozenHand.of
+
+the copy sites are the ones the server has: store() and the
+ConsciousHandNode it creates copy every stored hand and play_hand()
+copies every played hand. each simulated player stores every double it
+holds on every turn (after clearing its stored hands) and plays its
+lowest single that beats the hand in play.
+
+run from the repository root: python -m tests.memory_frozen_hand
+"""
+import random
+import tracemalloc
+
+from hand import Hand
+from frozen_hand import FrozenHand, intern_table
+from utils.utils import main
+
+
+def _doubles(holding):
+    doubles = list()
+    for card in holding:
+        if card + 1 in holding and (card - 1) // 4 == card // 4:
+            doubles.append(Hand([0, 0, 0, card, card + 1]))
+    return doubles
+
+
+def _simulate_game(copy, seed: int, kept: list) -> int:
+    rng = random.Random(seed)
+    deck = list(range(1, 53))
+    rng.shuffle(deck)
+    holdings = [set(deck[i::4]) for i in range(4)]
+    copies = 0
+    hand_in_play = None
+    player = 0
+    while sum(map(bool, holdings)) > 1:
+        holding = holdings[player]
+        if holding:
+            stored = list()
+            for double in _doubles(holding):
+                stored.append(copy(copy(double)))  # store + ConsciousHandNode
+                copies += 2
+            kept.extend(stored)
+            beating = [card for card in sorted(holding) if hand_in_play is
+                       None or card > hand_in_play[4]]
+            if beating:
+                hand = Hand([0, 0, 0, 0, beating[0]])
+                hand_in_play = copy(hand)  # play_hand
+                kept.append(hand_in_play)
+                copies += 1
+                holding.remove(beating[0])
+            else:
+                hand_in_play = None
+        player = (player + 1) % 4
+    return copies
+
+
+def _measure(copy, games: int=50):
+    intern_table.clear()
+    kept: list = list()
+    tracemalloc.start()
+    copies = sum(_simulate_game(copy, seed, kept) for seed in range(games))
+    current, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count for stat in snapshot.statistics('filename'))
+    distinct = len(set(map(id, kept)))
+    return copies, distinct, current, peak, blocks
+
+
+@main
+def run():
+    print(f"{'copy':<16}{'copies':>8}{'objects':>9}{'bytes kept':>12}" +
+          f"{'peak bytes':>12}{'blocks kept':>13}")
+    for name, copy in [('Hand.copy', Hand.copy),
+                       ('FrozenHand.of', FrozenHand.of)]:
+        copies, distinct, current, peak, blocks = _measure(copy)
+        print(f"{name:<16}{copies:>8}{distinct:>9}{current:>12}{peak:>12}" +
+              f"{blocks:>13}")
@@ -0,0 +1,86 @@
+"""
+resident memory of the server while thousands of rooms are opened and
+closed: 4 test clients join a room, which deals the cards, store a hand
+and play a few turns, and then all close their connections; the rooms
+and seats still held by app.main.events and the resident set size are
+printed every so many rooms and should stay flat
+
+run from the repository root: python -m tests.memory_rooms
+"""
+import gc
+import os
+import random
+import numpy as np
+
+from flask_socketio.test_client import SocketIOTestClient
+from app import app, socketio
+from app.main import events
+from game_engine import Start
+from utils.utils import main
+
+
+app.config['WTF_CSRF_ENABLED'] = False
+namespace = '/presidents'
+
+
+def _rss_mb() -> float:
+    with open('/proc/self/statm') as statm:
+        resident_pages = int(statm.read().split()[1])
+    return resident_pages * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+
+
+def _open_and_close_room(room: str, turns: int=8) -> None:
+    clients = dict()
+    for i in range(4):
+        name = f'player {i}'
+        flask_client = app.test_client()
+        flask_client.post('/login', data={'name': name, 'room': room})
+        clients[name] = socketio.test_client(app, namespace=namespace,
+                                             flask_test_client=flask_client)
+        clients[name].emit('joined', {}, namespace=namespace)
+    for sid in events.engine.rooms[room].player_sids:
+        client = clients[events.engine.seats[sid].name]
+        cards = list(events.engine.seats[sid].card_hand_chamber.iter_cards())
+        client.emit('set selection', {'cards': cards[:2]}, namespace=namespace)
+        client.emit('store', namespace=namespace)
+    for _ in range(turns):
+        sid = events.engine.rooms[room].current_player
+        client = clients[events.engine.seats[sid].name]
+        hand_in_play = events.engine.rooms[room].hand_in_play
+        if hand_in_play is Start or hand_in_play is None:
+            lowest = 0
+        else:
+            lowest = max(hand_in_play)
+        playable = [card for card in
+                    events.engine.seats[sid].card_hand_chamber.iter_cards()
+                    if card > lowest]
+        if playable:
+            client.emit('set selection', {'cards': playable[:1]},
+                        namespace=namespace)
+            client.emit('play current hand', namespace=namespace)
+        else:
+            client.emit('pass current hand', namespace=namespace)
+    for client in clients.values():
+        _close(client)
+
+
+def _close(client: SocketIOTestClient) -> None:
+    # what closing the websocket does: disconnect every namespace and drop
+    # the environ of the connection, which client.disconnect does not,
+    # and what the test client itself never forgets
+    socketio.server._handle_eio_disconnect(client.eio_sid, 'transport close')
+    del SocketIOTestClient.clients[client.eio_sid]
+
+
+@main
+def run(num_rooms: str='5000', every: str='500'):
+    random.seed(0)
+    np.random.seed(0)
+    print(f"{'rooms opened':>12}{'rooms held':>12}{'seats held':>12}" +
+          f"{'rss (MB)':>10}")
+    for i in range(1, int(num_rooms) + 1):
+        _open_and_close_room(f'room {i}')
+        if i % int(every) == 0:
+            gc.collect()
+            print(f"{i:>12}{len(events.engine.rooms):>12}{len(events.engine.seats):>12}" +
+                  f"{_rss_mb():>10.1f}")
@@ -0,0 +1,57 @@
+"""
+per operation latency and bytes per hand of Hand vs. BitmaskHand
+
+run from the repository root: python -m tests.runtime_bitmask_hand
+"""
+import tracemalloc
+
+from timeit import Timer
+from hand import Hand
+from bitmask_hand import BitmaskHand
+from utils.utils import main
+
+
+fullhouse = [1, 2, 3, 51, 52]
+other = [5, 9, 13, 17, 21]
+
+
+def _latencies(cls) -> dict:
+    namespace = {'cls': cls, 'fullhouse': fullhouse, 'other': other}
+    results = dict()
+    for name, stmt, setup, number in [
+        ('add 5 + remove 5',
+         'for c in fullhouse: h.add(c)\nfor c in fullhouse: h.remove(c)',
+         'h = cls()', 2000),
+        ('__contains__', '52 in h', 'h = cls(fullhouse)', 20000),
+        ('intersects', 'h.intersects(o)',
+         'h = cls(fullhouse); o = cls(other)', 20000),
+        ('__iter__', 'for c in h: pass', 'h = cls(fullhouse)', 20000),
+        ('is_valid', 'h.is_valid', 'h = cls(fullhouse)', 20000),
+        ('copy', 'cls.copy(h)', 'h = cls(fullhouse)', 20000),
+        ('to_json', 'h.to_json()', 'h = cls(fullhouse)', 2000),
+    ]:
+        timer = Timer(stmt, setup, globals=namespace)
+        results[name] = min(timer.repeat(5, number)) / number * 1e9
+    return results
+
+
+def _bytes_per_hand(cls, n: int=10000) -> float:
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    hands = [cls(fullhouse) for _ in range(n)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    total = sum(stat.size_diff for stat in after.compare_to(before, 'lineno'))
+    del hands
+    return total / n
+
+
+@main
+def run():
+    results = {cls.__name__: _latencies(cls) for cls in (Hand, BitmaskHand)}
+    print(f"{'operation':<20}{'Hand (ns)':>14}{'BitmaskHand (ns)':>20}")
+    for op in results['Hand']:
+        print(f"{op:<20}{results['Hand'][op]:>14.0f}" +
+              f"{results['BitmaskHand'][op]:>20.0f}")
+    print(f"{'bytes per hand':<20}{_bytes_per_hand(Hand):>14.0f}" +
+          f"{_bytes_per_hand(BitmaskHand):>20.0f}")
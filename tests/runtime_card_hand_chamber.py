@@ -0,0 +1,103 @@
+"""
+latency of the card hand chamber operations for CardHandChamber vs.
+MatrixCardHandChamber with 10, 36, 100, and 1000 stored hands
+
+the chambers hold all 52 cards so that there are enough distinct hands
+to store; emit is replaced with a counter since there is no socket to
+send to
+
+run from the repository root: python -m tests.runtime_card_hand_chamber
+"""
+import random
+import time
+import numpy as np
+
+import card_hand_chamber
+import matrix_card_hand_chamber
+
+from card_hand_chamber import CardHandChamber
+from matrix_card_hand_chamber import MatrixCardHandChamber
+from legal_hands import iter_hands
+from utils.utils import main
+
+
+num_emits = 0
+
+
+def _count_emit(*args, **kwargs) -> None:
+    global num_emits
+    num_emits += 1
+
+
+card_hand_chamber.emit = _count_emit
+matrix_card_hand_chamber.emit = _count_emit
+
+random.seed(0)
+all_hands = [hand for hand in iter_hands(range(1, 53)) if not hand.is_single]
+random.shuffle(all_hands)
+
+
+def _chamber(cls, n: int):
+    chamber = cls(np.arange(1, 53), 'sid')
+    for hand in all_hands[:n]:
+        chamber.add_hand(hand)
+    return chamber
+
+
+def _us(f, runs: int=200) -> float:
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        f()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e6
+
+
+def _us_on_fresh(cls, n: int, f, runs: int=20) -> float:
+    # for operations that destroy the stored hands
+    best = float('inf')
+    for _ in range(runs):
+        chamber = _chamber(cls, n)
+        start = time.perf_counter()
+        f(chamber)
+        best = min(best, time.perf_counter() - start)
+    return best * 1e6
+
+
+def _latencies(cls, n: int) -> dict:
+    chamber = _chamber(cls, n)
+    missing = all_hands[-1]  # never stored, i.e. the slowest lookup
+
+    def select_and_deselect():
+        chamber.select_card(25)
+        chamber.deselect_card(25)
+
+    def emits_of(f) -> int:
+        chamber = _chamber(cls, n)
+        before = num_emits
+        f(chamber)
+        return num_emits - before
+
+    return {
+        'add_hand (per hand)': _us(lambda: _chamber(cls, n), runs=5) / n,
+        'select + deselect': _us(select_and_deselect),
+        'contains_hand': _us(lambda: chamber.contains_hand(missing)),
+        'remove_card': _us_on_fresh(
+            cls, n, lambda chamber: chamber.remove_card(25)),
+        'clear_hands': _us_on_fresh(
+            cls, n, lambda chamber: chamber.clear_hands()),
+        'clear_hands (emits)': emits_of(lambda chamber: chamber.clear_hands()),
+    }
+
+
+@main
+def run():
+    for n in (10, 36, 100, 1000):
+        results = {cls.__name__: _latencies(cls, n)
+                   for cls in (CardHandChamber, MatrixCardHandChamber)}
+        print(f"{n} stored hands")
+        print(f"{'operation (us)':<24}{'CardHandChamber':>18}" +
+              f"{'MatrixCardHandChamber':>24}")
+        for op in results['CardHandChamber']:
+            print(f"{op:<24}{results['CardHandChamber'][op]:>18.1f}" +
+                  f"{results['MatrixCardHandChamber'][op]:>24.1f}")
@@ -0,0 +1,64 @@
+"""
+snapshot and restore latency and snapshot size of both chambers holding
+a dealt hand of 13 cards with 0, 5, and 15 stored hands and 2 selected
+cards, and of the current hand itself (Hand.to_bytes / Hand.from_bytes)
+
+emit is replaced with a no-op since there is no socket to send to
+
+run from the repository root: python -m tests.runtime_chamber_snapshot
+"""
+import random
+
+import card_hand_chamber
+import matrix_card_hand_chamber
+
+from timeit import Timer
+from card_hand_chamber import CardHandChamber
+from matrix_card_hand_chamber import MatrixCardHandChamber
+from hand import Hand
+from legal_hands import iter_hands
+from utils.utils import main
+
+
+def _no_emit(*args, **kwargs) -> None:
+    pass
+
+
+card_hand_chamber.emit = _no_emit
+matrix_card_hand_chamber.emit = _no_emit
+
+
+def _us(f, number: int=2000) -> float:
+    return min(Timer(f).repeat(5, number)) / number * 1e6
+
+
+def _chamber(cls, num_hands: int):
+    random.seed(0)
+    # a holding with plenty of hands to store
+    cards = sorted(random.sample(range(1, 25), 13))
+    chamber = cls(cards, 'sid')
+    hands = [hand for hand in iter_hands(cards) if not hand.is_single]
+    for hand in random.sample(hands, num_hands):
+        chamber.add_hand(hand)
+    chamber.select_card(cards[0])
+    chamber.select_card(cards[1])
+    return chamber
+
+
+@main
+def run():
+    print(f"{'chamber':<24}{'hands':>6}{'bytes':>7}{'snapshot (us)':>15}" +
+          f"{'restore (us)':>14}")
+    for cls in (CardHandChamber, MatrixCardHandChamber):
+        for num_hands in (0, 5, 15):
+            chamber = _chamber(cls, num_hands)
+            snapshot = chamber.snapshot()
+            print(f"{cls.__name__:<24}{num_hands:>6}{len(snapshot):>7}" +
+                  f"{_us(chamber.snapshot):>15.1f}" +
+                  f"{_us(lambda: cls.restore(snapshot, 'sid')):>14.1f}")
+    hand = Hand()
+    for card in (1, 2, 3):
+        hand.add(card)
+    packed = hand.to_bytes()
+    print(f"{'Hand':<24}{'':>6}{len(packed):>7}{_us(hand.to_bytes):>15.1f}" +
+          f"{_us(lambda: Hand.from_bytes(packed)):>14.1f}")
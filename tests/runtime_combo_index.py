@@ -0,0 +1,60 @@
+"""
+latency of keeping and querying a ComboIndex vs. rescanning the holding
+with legal_hands for random 13 card holdings (a dealt hand) and 20 card
+holdings (the most a player can hold after trading and some bad luck)
+
+run from the repository root: python -m tests.runtime_combo_index
+"""
+import random
+
+from timeit import Timer
+from combo_index import ComboIndex
+from hand import Hand
+from legal_hands import iter_hands, hands_beating
+from utils.utils import main
+
+
+def _us(stmt: str, namespace: dict, number: int) -> float:
+    timer = Timer(stmt, globals=namespace)
+    return min(timer.repeat(5, number)) / number * 1e6
+
+
+def _latencies(num_cards: int, num_holdings: int=20) -> dict:
+    random.seed(num_cards)
+    totals = {'build': [0.0, 0.0], 'remove + add card': [0.0, 0.0],
+              'hands beating a double': [0.0, 0.0],
+              'can beat a double': [0.0, 0.0]}
+    double = Hand()
+    double.add(21)
+    double.add(22)
+    for _ in range(num_holdings):
+        cards = random.sample(range(1, 53), num_cards)
+        card = cards[0]
+        namespace = {'ComboIndex': ComboIndex, 'iter_hands': iter_hands,
+                     'hands_beating': hands_beating, 'cards': cards,
+                     'card': card, 'double': double,
+                     'index': ComboIndex(cards)}
+        for op, (indexed, rescanned) in {
+            'build': ('ComboIndex(cards)', 'list(iter_hands(cards))'),
+            # a rescan is the only way to update without an index
+            'remove + add card': (
+                'index.remove_card(card); index.add_card(card)',
+                'list(iter_hands(cards[1:])); list(iter_hands(cards))'),
+            'hands beating a double': ('index.hands_beating(double)',
+                                       'hands_beating(cards, double)'),
+            'can beat a double': ('index.can_beat(double)',
+                                  'bool(hands_beating(cards, double))'),
+        }.items():
+            totals[op][0] += _us(indexed, namespace, 20)
+            totals[op][1] += _us(rescanned, namespace, 20)
+    return {op: (indexed / num_holdings, rescanned / num_holdings)
+            for op, (indexed, rescanned) in totals.items()}
+
+
+@main
+def run():
+    for num_cards in (13, 20):
+        print(f"{num_cards} cards")
+        print(f"{'operation (us)':<26}{'ComboIndex':>12}{'rescan':>12}")
+        for op, (indexed, rescanned) in _latencies(num_cards).items():
+            print(f"{op:<26}{indexed:>12.1f}{rescanned:>12.1f}")
@@ -0,0 +1,71 @@
+"""
+latency of finding the stored hands that share a card with a selection
+through the chambers' slot bitmasks vs. walking the per card pointer
+lists of CardHandChamber, with 50, 100, and 200 stored hands
+
+the selection is every stored 5 card hand in turn; emit is replaced with
+a no-op since there is no socket to send to
+
+run from the repository root: python -m tests.runtime_conflicting_hands
+"""
+import random
+import numpy as np
+
+import card_hand_chamber
+import matrix_card_hand_chamber
+
+from timeit import Timer
+from card_hand_chamber import CardHandChamber
+from matrix_card_hand_chamber import MatrixCardHandChamber
+from legal_hands import iter_hands
+from utils.utils import main
+
+
+def _no_emit(*args, **kwargs) -> None:
+    pass
+
+
+card_hand_chamber.emit = _no_emit
+matrix_card_hand_chamber.emit = _no_emit
+
+random.seed(0)
+all_hands = [hand for hand in iter_hands(range(1, 53)) if not hand.is_single]
+random.shuffle(all_hands)
+
+
+def _by_pointer_walk(chamber: CardHandChamber, cards) -> list:
+    hands = dict()
+    for card in cards:
+        for hand_pointer_node in chamber._hand_pointers(card):
+            hand = hand_pointer_node.hand_dllnode.value.hand
+            hands[hash(hand)] = hand
+    return list(hands.values())
+
+
+def _us(f, selections, number: int=200) -> float:
+    def run_all():
+        for selection in selections:
+            f(selection)
+    timer = Timer(run_all)
+    return min(timer.repeat(5, number)) / number / len(selections) * 1e6
+
+
+@main
+def run():
+    print(f"{'stored hands':<14}{'conflicts':>11}{'pointer walk':>14}" +
+          f"{'CardHandChamber':>18}{'MatrixCardHandChamber':>24}  (us)")
+    for n in (50, 100, 200):
+        llist_chamber = CardHandChamber(np.arange(1, 53), 'sid')
+        matrix_chamber = MatrixCardHandChamber(np.arange(1, 53), 'sid')
+        for hand in all_hands[:n]:
+            llist_chamber.add_hand(hand)
+            matrix_chamber.add_hand(hand)
+        selections = [hand for hand in all_hands[:n] if hand.is_full]
+        conflicts = np.mean([len(llist_chamber.conflicting_hands(selection))
+                             for selection in selections])
+        walk = _us(lambda cards: _by_pointer_walk(llist_chamber, cards),
+                   selections)
+        llist = _us(llist_chamber.conflicting_hands, selections)
+        matrix = _us(matrix_chamber.conflicting_hands, selections)
+        print(f"{n:<14}{conflicts:>11.1f}{walk:>14.1f}{llist:>18.1f}" +
+              f"{matrix:>24.1f}")
@@ -0,0 +1,93 @@
+"""
+socket.io packets and bytes sent per played hand with and without the
+emit buffer (app.config['BUFFER_EMITS'])
+
+4 test clients join a room and store every double they hold, then the
+first rounds of turns are played by clicking the lowest single that
+beats the hand in play (or passing); every packet received by any client
+during those turns is counted and encoded to measure its size
+
+run from the repository root: python -m tests.runtime_emit_buffer
+"""
+import random
+import numpy as np
+
+from socketio import packet
+from app import app, socketio
+from app.main import events
+from game_engine import Start
+from utils.utils import main
+
+
+app.config['WTF_CSRF_ENABLED'] = False
+namespace = '/presidents'
+
+
+def _packet_bytes(received: dict) -> int:
+    args = received['args']
+    if not isinstance(args, list):
+        args = [args]
+    return len(packet.Packet(packet.EVENT, data=[received['name'], *args],
+                             namespace=namespace).encode())
+
+
+def _measure(room: str, turns: int) -> tuple:
+    random.seed(0)
+    np.random.seed(0)
+    clients = dict()
+    for i in range(4):
+        name = f'player {i}'
+        flask_client = app.test_client()
+        flask_client.post('/login', data={'name': name, 'room': room})
+        clients[name] = socketio.test_client(app, namespace=namespace,
+                                             flask_test_client=flask_client)
+        clients[name].emit('joined', {}, namespace=namespace)
+    for sid in events.engine.rooms[room].player_sids:
+        client = clients[events.engine.seats[sid].name]
+        cards = list(events.engine.seats[sid].card_hand_chamber.iter_cards())
+        for card, other in zip(cards, cards[1:]):
+            if (card - 1) // 4 == (other - 1) // 4:
+                client.emit('hand click', {'cards': [card, other]},
+                            namespace=namespace)
+                client.emit('store', namespace=namespace)
+    for client in clients.values():
+        client.get_received(namespace)
+
+    num_packets = num_bytes = num_plays = 0
+    for _ in range(turns):
+        sid = events.engine.rooms[room].current_player
+        client = clients[events.engine.seats[sid].name]
+        hand_in_play = events.engine.rooms[room].hand_in_play
+        # the start of the game and a won hand accept any single
+        if hand_in_play is Start or hand_in_play is None:
+            lowest = 0
+        else:
+            lowest = max(hand_in_play)
+        playable = [card for card in
+                    events.engine.seats[sid].card_hand_chamber.iter_cards()
+                    if card > lowest]
+        if playable:
+            client.emit('card click', {'card': playable[0]},
+                        namespace=namespace)
+            client.emit('play current hand', namespace=namespace)
+            num_plays += 1
+        else:
+            client.emit('pass current hand', namespace=namespace)
+        for client in clients.values():
+            received = client.get_received(namespace)
+            num_packets += len(received)
+            num_bytes += sum(map(_packet_bytes, received))
+    return num_packets / num_plays, num_bytes / num_plays
+
+
+@main
+def run(turns: str='30'):
+    results = dict()
+    for buffer_emits in (False, True):
+        app.config['BUFFER_EMITS'] = buffer_emits
+        results[buffer_emits] = _measure(f'emit buffer {buffer_emits}',
+                                         int(turns))
+    print(f"{'per played hand':<20}{'unbuffered':>12}{'buffered':>12}")
+    for i, quantity in enumerate(['packets', 'bytes']):
+        print(f"{quantity:<20}{results[False][i]:>12.1f}" +
+              f"{results[True][i]:>12.1f}")
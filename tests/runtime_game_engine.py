@@ -0,0 +1,87 @@
+"""
+actions per second of a GameEngine playing whole rounds headless, i.e.
+without Flask or Socket.IO, with either card hand chamber
+
+4 bots sit in one room; the current player selects and plays its lowest
+single that beats the hand in play or passes, a player whose last card
+is played finishes, and during trading the president and vice
+president ask for random values and give away their lowest card
+
+run from the repository root: python -m tests.runtime_game_engine
+"""
+import random
+import numpy as np
+
+from time import perf_counter
+from card_hand_chamber import CardHandChamber
+from matrix_card_hand_chamber import MatrixCardHandChamber
+from game_engine import GameEngine, Start
+from utils.utils import main
+
+
+def _lowest_beating(chamber, hand_in_play) -> list:
+    if hand_in_play is Start or hand_in_play is None:
+        lowest = 0
+    else:
+        lowest = max(hand_in_play)
+    for card in chamber.iter_cards():
+        if card > lowest:
+            return [card]
+    return []
+
+
+def _play(engine: GameEngine, rounds: int) -> tuple:
+    random.seed(0)
+    np.random.seed(0)
+    sids = [f'sid {i}' for i in range(4)]
+    num_actions = num_events = 0
+
+    def act(action, sid, *args):
+        nonlocal num_actions, num_events
+        events = getattr(engine, action)(sid, *args)
+        num_actions += 1
+        num_events += len(events)
+        return events
+
+    for i, sid in enumerate(sids):
+        act('join', sid, 'room', f'player {i}')
+    room = engine.rooms['room']
+    round_starts = 0
+    while round_starts < rounds:
+        if room.currently_trading:
+            for sid in room.player_sids:
+                seat = engine.seats[sid]
+                if seat.takes_remaining:
+                    act('ask_for_card', sid, random.randint(1, 13))
+                elif seat.gives_remaining:
+                    card = next(iter(seat.card_hand_chamber.iter_cards()))
+                    act('set_selection', sid, [card])
+                    act('give_current_card', sid)
+            continue
+        sid = room.current_player
+        cards = _lowest_beating(engine.seats[sid].card_hand_chamber,
+                                room.hand_in_play)
+        if not cards:
+            act('pass_current_hand', sid)
+            continue
+        act('set_selection', sid, cards)
+        events = act('play_current_hand', sid)
+        if any(event.name == 'finished' for event in events):
+            events = act('player_finish', sid)
+            if any(event.name == 'assign cards' for event in events):
+                round_starts += 1
+    return num_actions, num_events
+
+
+@main
+def run(rounds: str='20'):
+    print(f"{'chamber':<24}{'actions':>9}{'events':>9}{'actions/s':>11}" +
+          f"{'us/action':>11}")
+    for cls in (CardHandChamber, MatrixCardHandChamber):
+        engine = GameEngine(cls)
+        start = perf_counter()
+        num_actions, num_events = _play(engine, int(rounds))
+        elapsed = perf_counter() - start
+        print(f"{cls.__name__:<24}{num_actions:>9}{num_events:>9}" +
+              f"{num_actions / elapsed:>11.0f}" +
+              f"{elapsed / num_actions * 1e6:>11.1f}")
@@ -0,0 +1,43 @@
+"""
+round trip time and payload size of HandList.to_json/from_json vs.
+HandList.to_bytes/from_bytes
+
+run from the repository root: python -m tests.runtime_hand_list_codec
+"""
+import random
+import time
+
+from hand import Hand
+from hand_list import HandList
+from legal_hands import iter_hands
+from utils.utils import main
+
+
+def _hand_list(n: int) -> HandList:
+    hands = set()
+    while len(hands) < n:
+        holding = random.sample(range(1, 53), 13)
+        hands.update(Hand(list(hand._cards)) for hand in iter_hands(holding))
+    return HandList(set(list(hands)[:n]))
+
+
+def _us_per_round_trip(to, back, runs: int=20) -> float:
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        back(to())
+        best = min(best, time.perf_counter() - start)
+    return best * 1e6
+
+
+@main
+def run():
+    random.seed(0)
+    print(f"{'hands':>6}{'json (us)':>12}{'json (B)':>10}{'bytes (us)':>12}" +
+          f"{'bytes (B)':>11}")
+    for n in (10, 100, 1000):
+        hand_list = _hand_list(n)
+        json_us = _us_per_round_trip(hand_list.to_json, HandList.from_json)
+        bytes_us = _us_per_round_trip(hand_list.to_bytes, HandList.from_bytes)
+        print(f"{n:>6}{json_us:>12.0f}{len(hand_list.to_json()):>10}" +
+              f"{bytes_us:>12.0f}{len(hand_list.to_bytes()):>11}")
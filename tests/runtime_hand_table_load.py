@@ -0,0 +1,55 @@
+"""
+import time and memory of loading the hand table from hand_table.h5 with
+deepdish vs. memory-mapping hand_table.bin, which also holds the ranks
+
+every measurement runs in a fresh interpreter since both are import-time
+costs; private memory is what each additional worker would pay
+
+run from the repository root: python -m tests.runtime_hand_table_load
+"""
+import subprocess
+import sys
+
+from utils.utils import main
+
+
+loaders = {
+    'numpy only': "import numpy",
+    'deepdish .h5': "import numpy\n"
+                    "import deepdish as dd\n"
+                    "hand_table = dd.io.load('hand_table.h5')",
+    'mmap .bin': "import hand",
+}
+
+measure = """
+import resource
+import time
+start = time.perf_counter()
+{loader}
+elapsed = time.perf_counter() - start
+private = 0
+with open('/proc/self/smaps_rollup') as f:
+    for line in f:
+        if line.startswith(('Private_Clean', 'Private_Dirty')):
+            private += int(line.split()[1])
+max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(elapsed * 1000, max_rss / 1024, private / 1024)
+"""
+
+
+def _measure(loader: str, runs: int=5):
+    results = list()
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, '-c', measure.format(loader=loader)],
+                             stdout=subprocess.PIPE, check=True).stdout
+        results.append(tuple(map(float, out.split())))
+    return min(results)
+
+
+@main
+def run():
+    print(f"{'loader':<16}{'time (ms)':>12}{'max rss (MiB)':>16}" +
+          f"{'private (MiB)':>16}")
+    for name, loader in loaders.items():
+        ms, rss, private = _measure(loader)
+        print(f"{name:<16}{ms:>12.1f}{rss:>16.1f}{private:>16.1f}")
@@ -0,0 +1,63 @@
+"""
+latency per click (add or remove) of Hand with both _identify engines
+vs. BitmaskHand, which identifies itself through hand_trie, and of the
+bare identification steps
+
+run from the repository root: python -m tests.runtime_hand_trie
+"""
+import random
+import time
+
+from hand import Hand, lookup_hand, use_identify_engine
+from bitmask_hand import BitmaskHand
+from hand_trie import identify, mask_of
+from timeit import Timer
+from utils.utils import main
+
+
+def _click_sequences(n: int):
+    random.seed(0)
+    sequences = list()
+    for _ in range(n):
+        # mostly cards close to each other so that many clicks are valid
+        lowest = random.randrange(1, 33)
+        cards = random.sample(range(lowest, lowest + 20), 5)
+        sequences.append((cards, random.sample(cards, 5)))
+    return sequences
+
+
+def _ns_per_click(cls, sequences) -> float:
+    hand = cls()
+    start = time.perf_counter()
+    for adds, removes in sequences:
+        for card in adds:
+            hand.add(card)
+        for card in removes:
+            hand.remove(card)
+    return (time.perf_counter() - start) / (10 * len(sequences)) * 1e9
+
+
+def _ns(stmt: str, namespace: dict, number: int=20000) -> float:
+    timer = Timer(stmt, globals=namespace)
+    return min(timer.repeat(5, number)) / number * 1e9
+
+
+@main
+def run():
+    sequences = _click_sequences(5000)
+    print(f"{'per click':<34}{'ns':>8}")
+    for name, cls, engine in [('Hand (table)', Hand, 'table'),
+                              ('Hand (histogram)', Hand, 'histogram'),
+                              ('BitmaskHand (trie)', BitmaskHand, 'table')]:
+        use_identify_engine(engine)
+        ns = min(_ns_per_click(cls, sequences) for _ in range(3))
+        print(f"{name:<34}{ns:>8.0f}")
+    use_identify_engine('table')
+    hand = Hand([1, 2, 3, 51, 52])
+    namespace = {'lookup_hand': lookup_hand, 'identify': identify,
+                 'hand': hand, 'mask': mask_of(hand)}
+    print(f"{'per identification':<34}{'ns':>8}")
+    print(f"{'lookup_hand(hash(hand))':<34}" +
+          f"{_ns('lookup_hand(hash(hand))', namespace):>8.0f}")
+    print(f"{'hand_trie.identify(mask, 5)':<34}" +
+          f"{_ns('identify(mask, 5)', namespace):>8.0f}")
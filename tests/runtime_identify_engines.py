@@ -0,0 +1,52 @@
+"""
+latency of Hand._identify with the hand table engine vs. the histogram
+engine (hand_classifier.classify) over the same random click sequences
+
+run from the repository root: python -m tests.runtime_identify_engines
+"""
+import random
+import time
+
+from hand import Hand, use_identify_engine, identify_engines
+from utils.utils import main
+
+
+def _click_sequences(n: int):
+    random.seed(0)
+    sequences = list()
+    for _ in range(n):
+        # a hand of 5 cards built up and then torn back down
+        cards = random.sample(range(1, 53), 5)
+        sequences.append((cards, random.sample(cards, 5)))
+    return sequences
+
+
+def _ns_per_click(sequences) -> float:
+    hand = Hand()
+    start = time.perf_counter()
+    for adds, removes in sequences:
+        for card in adds:
+            hand.add(card)
+        for card in removes:
+            hand.remove(card)
+    return (time.perf_counter() - start) / (10 * len(sequences)) * 1e9
+
+
+def _ns_per_identify(hands) -> float:
+    start = time.perf_counter()
+    for hand in hands:
+        hand._identify()
+    return (time.perf_counter() - start) / len(hands) * 1e9
+
+
+@main
+def run():
+    sequences = _click_sequences(5000)
+    full_hands = [Hand(sorted(adds)) for adds, _ in sequences]
+    print(f"{'engine':<12}{'per click (ns)':>16}{'per _identify (ns)':>20}")
+    for engine in identify_engines:
+        use_identify_engine(engine)
+        click = min(_ns_per_click(sequences) for _ in range(3))
+        identify = min(_ns_per_identify(full_hands) for _ in range(3))
+        print(f"{engine:<12}{click:>16.0f}{identify:>20.0f}")
+    use_identify_engine('table')
@@ -0,0 +1,61 @@
+"""
+hands per second of the vectorized identify_hands vs. Hand._identify
+
+half of every batch are valid hands decoded from the hand table and the
+other half are random sorted hands (almost all invalid)
+
+run from the repository root: python -m tests.runtime_identify_hands
+"""
+import time
+import numpy as np
+
+from hand import Hand, identify_hands, hand_table_keys
+from utils.utils import hand_unhash_batch, main
+
+
+def _valid_hands(n: int, rng) -> np.ndarray:
+    return hand_unhash_batch(rng.choice(hand_table_keys, size=n))
+
+
+def _random_hands(n: int, rng) -> np.ndarray:
+    hands = rng.integers(1, 53, size=(n, 5), dtype=np.uint8)
+    hands.sort(axis=1)
+    return hands
+
+
+def _batch(n: int, rng) -> np.ndarray:
+    hands = np.concatenate([_valid_hands(n // 2, rng),
+                            _random_hands(n - n // 2, rng)])
+    rng.shuffle(hands)
+    return hands
+
+
+def _hands_per_second(f, hands: np.ndarray, runs: int=3) -> float:
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        f(hands)
+        best = min(best, time.perf_counter() - start)
+    return len(hands) / best
+
+
+def _identify_one_at_a_time(hands: np.ndarray) -> None:
+    hand = Hand()
+    for cards in hands:
+        hand._cards = cards
+        hand._insertion_index = 4 - np.count_nonzero(cards)
+        hand._identify()
+
+
+@main
+def run():
+    rng = np.random.default_rng(0)
+    print(f"{'N':>10}{'identify_hands (hands/s)':>28}" +
+          f"{'Hand._identify (hands/s)':>28}")
+    for exponent in range(3, 8):
+        n = 10 ** exponent
+        hands = _batch(n, rng)
+        batch = _hands_per_second(identify_hands, hands)
+        # one at a time is far too slow for the big batches
+        single = _hands_per_second(_identify_one_at_a_time, hands[:10000], 1)
+        print(f"{n:>10}{batch:>28,.0f}{single:>28,.0f}")
@@ -0,0 +1,48 @@
+"""
+latency of enumerating the valid hands of random 13 card holdings with
+legal_hands vs. brute forcing every combination of 1 to 5 cards
+
+run from the repository root: python -m tests.runtime_legal_hands
+"""
+import random
+import time
+
+from itertools import combinations
+from hand_classifier import classify
+from frozen_hand import FrozenHand
+from legal_hands import iter_hands, hands_beating
+from utils.utils import main
+
+
+def _brute_force(cards):
+    return [combo for k in range(1, 6) for combo in combinations(cards, k)
+            if classify(combo)[0] % 10]
+
+
+def _us_per_holding(f, holdings) -> float:
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        for holding in holdings:
+            f(holding)
+        best = min(best, time.perf_counter() - start)
+    return best / len(holdings) * 1e6
+
+
+@main
+def run():
+    random.seed(0)
+    holdings = [sorted(random.sample(range(1, 53), 13)) for _ in range(500)]
+    double = FrozenHand.from_mask(0b11)  # 3♣ 3♦
+    straight = FrozenHand.from_mask(1 | 1 << 4 | 1 << 8 | 1 << 12 | 1 << 16)
+    hands = sum(len(list(iter_hands(holding))) for holding in holdings)
+    print(f"{hands / len(holdings):.1f} valid hands per 13 card holding")
+    print(f"{'per holding':<32}{'us':>8}")
+    for name, f in [
+            ('iter_hands', lambda holding: list(iter_hands(holding))),
+            ('hands_beating(3♣ 3♦)',
+             lambda holding: hands_beating(holding, double)),
+            ('hands_beating(3♣-7♣ straight)',
+             lambda holding: hands_beating(holding, straight)),
+            ('brute force combinations', _brute_force)]:
+        print(f"{name:<32}{_us_per_holding(f, holdings):>8.0f}")
@@ -0,0 +1,98 @@
+"""
+emits relayed from one worker to the clients of another through the
+message queue broker (see message_queue)
+
+a broker and two more processes are started: the sender emits to a room
+through the BrokerManager of its Socket.IO server like a worker whose
+room is played on it, and the receiver, whose own BrokerManager-backed
+server has a client in that room, records every packet it would send to
+that client; all emits must arrive, in order, and emits/s from the first
+emit until the receiver has the last is printed
+
+run from the repository root: python -m tests.runtime_message_queue
+"""
+import multiprocessing
+import socket
+import time
+import socketio
+
+from socketio import packet
+from time import perf_counter
+from message_queue import BrokerManager, _address, serve
+from utils.utils import main
+
+
+namespace = '/presidents'
+
+
+def _server(url: str, write_only: bool=False) -> socketio.Server:
+    # threads rather than eventlet, so the blocking sockets of the manager
+    # need no monkey patching
+    return socketio.Server(
+        client_manager=BrokerManager(url, write_only=write_only),
+        async_mode='threading')
+
+
+def _wait_for_broker(url: str) -> None:
+    while True:
+        try:
+            socket.create_connection(_address(url)).close()
+            return
+        except ConnectionRefusedError:
+            time.sleep(0.05)
+
+
+def _receiver(url: str, num_emits: int, ready, received) -> None:
+    server = _server(url)
+    numbers = list()
+
+    def send_eio_packet(eio_sid, eio_packet):
+        event, data = packet.Packet(encoded_packet=eio_packet.data).data
+        if event == 'hello':
+            ready.set()
+        elif event == 'text':
+            numbers.append(data['i'])
+            if len(numbers) == num_emits:
+                received.put(numbers)
+
+    server._send_eio_packet = send_eio_packet
+    sid = server.manager.connect('client', namespace)
+    server.manager.enter_room(sid, namespace, 'room')
+    server.manager.initialize()
+    time.sleep(3600)
+
+
+def _emits_per_second(url: str, num_emits: int) -> float:
+    context = multiprocessing.get_context('spawn')
+    ready = context.Event()
+    received = context.Queue()
+    receiver = context.Process(target=_receiver,
+                               args=(url, num_emits, ready, received),
+                               daemon=True)
+    receiver.start()
+    server = _server(url, write_only=True)
+    # until the receiver is listening the broker has no one to relay to
+    while not ready.wait(0.05):
+        server.emit('hello', {}, room='room', namespace=namespace)
+    start = perf_counter()
+    for i in range(num_emits):
+        server.emit('text', {'i': i}, room='room', namespace=namespace)
+    numbers = received.get(timeout=60)
+    elapsed = perf_counter() - start
+    receiver.terminate()
+    assert numbers == list(range(num_emits)), "emits were lost or reordered"
+    return num_emits / elapsed
+
+
+@main
+def run(num_emits: str='10000', url: str='broker://127.0.0.1:6381'):
+    context = multiprocessing.get_context('spawn')
+    broker = context.Process(target=serve, args=(url,), daemon=True)
+    broker.start()
+    _wait_for_broker(url)
+    try:
+        print(f"{'emits':<10}{'emits/s':>10}")
+        print(f"{num_emits:<10}" +
+              f"{_emits_per_second(url, int(num_emits)):>10.0f}")
+    finally:
+        broker.terminate()
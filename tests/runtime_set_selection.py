@@ -0,0 +1,105 @@
+"""
+events and bytes a client receives per built hand when the hand is
+built with one 'card click' per card (and 'hand click' for a stored
+hand) vs. with 'set selection'
+
+a test client is dealt a hand, stores every double it holds, and then
+builds each of its doubles, triples, and 5 card hands card by card
+followed by clicking each stored hand, clearing the current hand in
+between; events are counted after unpacking the state deltas of the
+emit buffer, and bytes are those of the encoded packets (clearing the
+current hand is not counted)
+
+run from the repository root: python -m tests.runtime_set_selection
+"""
+import random
+import numpy as np
+
+from socketio import packet
+from app import app, socketio
+from app.main import events
+from legal_hands import iter_hands
+from utils.utils import main
+
+
+app.config['WTF_CSRF_ENABLED'] = False
+namespace = '/presidents'
+
+
+def _count(received: list) -> tuple:
+    num_events = num_bytes = 0
+    for packet_received in received:
+        args = packet_received['args']
+        if not isinstance(args, list):
+            args = [args]
+        num_bytes += len(packet.Packet(
+            packet.EVENT, data=[packet_received['name'], *args],
+            namespace=namespace).encode())
+        if packet_received['name'] == 'state delta':
+            num_events += len(args[0]['events'])
+        else:
+            num_events += 1
+    return num_events, num_bytes
+
+
+def _measure(room: str, bulk: bool) -> tuple:
+    random.seed(0)
+    np.random.seed(0)
+    clients = list()
+    for i in range(4):
+        flask_client = app.test_client()
+        flask_client.post('/login', data={'name': f'player {i}', 'room': room})
+        clients.append(socketio.test_client(app, namespace=namespace,
+                                            flask_test_client=flask_client))
+        clients[-1].emit('joined', {}, namespace=namespace)
+    client = clients[0]
+    chamber = events.engine.seats[events.engine.rooms[room].player_sids[0]].card_hand_chamber
+    cards = list(chamber.iter_cards())
+    hands = [hand for hand in iter_hands(cards) if not hand.is_single]
+    for hand in hands:
+        if hand.is_double:
+            client.emit('hand click', {'cards': list(map(int, hand))},
+                        namespace=namespace)
+            client.emit('store', namespace=namespace)
+    client.get_received(namespace)
+
+    num_events = num_bytes = 0
+    for hand in hands:
+        selection = list()
+        for card in map(int, hand):
+            selection.append(card)
+            if bulk:
+                client.emit('set selection', {'cards': selection},
+                            namespace=namespace)
+            else:
+                client.emit('card click', {'card': card}, namespace=namespace)
+        received_events, received_bytes = _count(client.get_received(namespace))
+        num_events += received_events
+        num_bytes += received_bytes
+        client.emit('clear current hand', namespace=namespace)
+        client.get_received(namespace)
+    stored = [hand for hand in hands if hand.is_double]
+    for hand in stored:
+        if bulk:
+            client.emit('set selection', {'cards': list(map(int, hand))},
+                        namespace=namespace)
+        else:
+            client.emit('hand click', {'cards': list(map(int, hand))},
+                        namespace=namespace)
+        received_events, received_bytes = _count(client.get_received(namespace))
+        num_events += received_events
+        num_bytes += received_bytes
+        client.emit('clear current hand', namespace=namespace)
+        client.get_received(namespace)
+    num_built = len(hands) + len(stored)
+    return num_events / num_built, num_bytes / num_built
+
+
+@main
+def run():
+    results = {bulk: _measure(f'set selection {bulk}', bulk)
+               for bulk in (False, True)}
+    print(f"{'per built hand':<20}{'card click':>12}{'set selection':>15}")
+    for i, quantity in enumerate(['events', 'bytes']):
+        print(f"{quantity:<20}{results[False][i]:>12.1f}" +
+              f"{results[True][i]:>15.1f}")
@@ -0,0 +1,113 @@
+"""
+room throughput of 1, 2, and 4 workers sharing the rooms by owner (see
+sharding)
+
+every worker is its own process with its own app, reads its shard from
+the environment like a deployed worker, and plays the rooms it owns
+through Socket.IO test clients (see tests.memory_rooms); the same total
+number of rooms is split between the workers, and each worker is pinned
+to a core of its own when there are enough of them
+
+two throughputs are printed: rooms/s over the wall time from when all
+workers are ready until the last one is done, which only grows with
+workers when they have cores to run on, and rooms/s over the cpu time of
+the busiest worker, which is what the wall time comes to with a core per
+worker and so shows the scaling even on one core; cpu ms per room, the
+mean over the workers, should stay flat as workers are added
+
+before playing, every worker checks that it refuses the socket of a
+player whose room another worker owns (see the connect event) and takes
+the socket of one whose room it owns
+
+the workers run without the message queue, which the test client does
+not support; every emit of a room goes to the room's own worker anyway
+(see emit_buffer.flush), and tests.runtime_message_queue covers the
+queue
+
+run from the repository root: python -m tests.runtime_sharding
+"""
+import multiprocessing
+import os
+
+from time import perf_counter, process_time
+from sharding import shard_of
+from utils.utils import main
+
+
+def _connects(room: str) -> bool:
+    from tests.memory_rooms import _close, app, namespace, socketio
+    flask_client = app.test_client()
+    flask_client.post('/login', data={'name': 'player', 'room': room})
+    client = socketio.test_client(app, namespace=namespace,
+                                  flask_test_client=flask_client)
+    connected = client.is_connected(namespace)
+    _close(client)
+    return connected
+
+
+def _worker(shard: int, num_shards: int, rooms: list, foreign_room: str,
+            barrier, done) -> None:
+    cores = sorted(os.sched_getaffinity(0))
+    if len(cores) >= num_shards:
+        os.sched_setaffinity(0, {cores[shard]})
+    os.environ['PRESIDENTS_SHARDS'] = ','.join(
+        f'http://127.0.0.1:{5000 + i}' for i in range(num_shards))
+    os.environ['PRESIDENTS_SHARD'] = str(shard)
+    from tests.memory_rooms import _open_and_close_room
+    assert _connects(rooms[0]), "refused a room it owns"
+    if foreign_room is not None:
+        assert not _connects(foreign_room), "took a room it does not own"
+    barrier.wait()
+    start = process_time()
+    for room in rooms:
+        _open_and_close_room(room)
+    done.put((len(rooms), process_time() - start))
+
+
+def _run_workers(num_workers: int, num_rooms: int):
+    """
+    rooms/s over the wall time, rooms/s over the cpu time of the busiest
+    worker, and the mean cpu seconds per room
+    """
+    context = multiprocessing.get_context('spawn')
+    rooms = [f'room {i}' for i in range(num_rooms)]
+    owned = [[room for room in rooms if shard_of(room, num_workers) == shard]
+             for shard in range(num_workers)]
+    # a worker that fails before it is ready breaks the barrier
+    barrier = context.Barrier(num_workers + 1, timeout=120)
+    done = context.Queue()
+    workers = [context.Process(target=_worker, args=(
+        shard, num_workers, owned[shard],
+        owned[(shard + 1) % num_workers][0] if num_workers > 1 else None,
+        barrier, done)) for shard in range(num_workers)]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    start = perf_counter()
+    results = [done.get() for _ in workers]
+    elapsed = perf_counter() - start
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0, "a worker failed"
+    busiest = max(cpu_seconds for _, cpu_seconds in results)
+    per_room = sum(cpu_seconds / rooms_played
+                   for rooms_played, cpu_seconds in results) / num_workers
+    return num_rooms / elapsed, num_rooms / busiest, per_room
+
+
+@main
+def run(num_rooms: str='400'):
+    print(f"{len(os.sched_getaffinity(0))} cores")
+    print(f"{'workers':<10}{'rooms/s':>10}{'speedup':>10}" +
+          f"{'cpu rooms/s':>14}{'speedup':>10}{'cpu ms/room':>14}")
+    base = base_cpu = None
+    for num_workers in (1, 2, 4):
+        rooms_per_second, rooms_per_cpu_second, cpu_per_room = \
+            _run_workers(num_workers, int(num_rooms))
+        base = base or rooms_per_second
+        base_cpu = base_cpu or rooms_per_cpu_second
+        print(f"{num_workers:<10}{rooms_per_second:>10.1f}" +
+              f"{rooms_per_second / base:>10.2f}" +
+              f"{rooms_per_cpu_second:>14.1f}" +
+              f"{rooms_per_cpu_second / base_cpu:>10.2f}" +
+              f"{1000 * cpu_per_room:>14.2f}")
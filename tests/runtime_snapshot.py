@@ -0,0 +1,73 @@
+"""
+time and size of GameEngine.snapshot and GameEngine.restore with 10,000
+rooms, i.e. what stopping and starting a worker costs in saving and
+bringing back every game in progress, with either card hand chamber
+
+in every room 4 bots join, which deals the cards, each stores a pair if
+it has one, and then a few turns are played as in
+tests.runtime_game_engine, so the rooms are mid round with hands in play
+and stored hands
+
+run from the repository root: python -m tests.runtime_snapshot
+"""
+import gc
+import random
+import numpy as np
+
+from time import perf_counter
+from card_hand_chamber import CardHandChamber
+from matrix_card_hand_chamber import MatrixCardHandChamber
+from game_engine import GameEngine
+from tests.runtime_game_engine import _lowest_beating
+from utils.utils import main
+
+
+def _open_rooms(engine: GameEngine, num_rooms: int, turns: int=6) -> None:
+    random.seed(0)
+    np.random.seed(0)
+    for i in range(num_rooms):
+        room = f'room {i}'
+        for j in range(4):
+            engine.join(f'sid {i} {j}', room, f'player {j}')
+        for sid in engine.rooms[room].player_sids:
+            cards = list(engine.seats[sid].card_hand_chamber.iter_cards())
+            for low, high in zip(cards, cards[1:]):
+                if (low - 1) // 4 == (high - 1) // 4:
+                    engine.set_selection(sid, [low, high])
+                    engine.store(sid)
+                    break
+        for _ in range(turns):
+            sid = engine.rooms[room].current_player
+            cards = _lowest_beating(engine.seats[sid].card_hand_chamber,
+                                    engine.rooms[room].hand_in_play)
+            if cards:
+                engine.set_selection(sid, cards)
+                engine.play_current_hand(sid)
+            else:
+                engine.pass_current_hand(sid)
+
+
+@main
+def run(num_rooms: str='10000'):
+    num_rooms = int(num_rooms)
+    print(f"{'chamber':<24}{'rooms':>7}{'snapshot (ms)':>15}" +
+          f"{'restore (ms)':>14}{'size (KB)':>11}{'B/room':>8}")
+    for cls in (CardHandChamber, MatrixCardHandChamber):
+        engine = GameEngine(cls, cls.restore)
+        _open_rooms(engine, num_rooms)
+        start = perf_counter()
+        snapshot = engine.snapshot()
+        snapshot_time = perf_counter() - start
+        # a worker restores right after starting, without the old rooms
+        del engine
+        gc.collect()
+        restored = GameEngine(cls, cls.restore)
+        start = perf_counter()
+        restored.restore(snapshot)
+        restore_time = perf_counter() - start
+        assert restored.snapshot() == snapshot
+        del restored
+        print(f"{cls.__name__:<24}{num_rooms:>7}" +
+              f"{snapshot_time * 1e3:>15.1f}{restore_time * 1e3:>14.1f}" +
+              f"{len(snapshot) / 1024:>11.1f}" +
+              f"{len(snapshot) / num_rooms:>8.1f}")
@@ -0,0 +1,80 @@
+"""
+latency of every state store backend under the GameEngine: the bots of
+tests.runtime_game_engine play whole rounds with the store behind the
+engine, and the time of every commit (one per action) is recorded, as
+well as the time to read the room back afterwards
+
+also prints actions per second against an engine without a store, i.e.
+what the store costs the hot path, packing the room included
+
+run from the repository root: python -m tests.runtime_state_store
+"""
+import os
+import tempfile
+import numpy as np
+
+from time import perf_counter
+from card_hand_chamber import CardHandChamber
+from game_engine import GameEngine
+from state_store import MemoryStore, SharedMemoryStore, SQLiteStore
+from tests.runtime_game_engine import _play
+from utils.utils import main
+
+
+class _Timed:
+    """
+    a store that times the commits of the store it wraps
+    """
+
+    def __init__(self, store) -> None:
+        self.store = store
+        self.latencies = list()
+
+    def commit(self, puts, deletes=()) -> None:
+        start = perf_counter()
+        self.store.commit(puts, deletes)
+        self.latencies.append(perf_counter() - start)
+
+
+def _read_latencies(store, num_reads: int=2000) -> np.ndarray:
+    latencies = np.empty(num_reads)
+    for i in range(num_reads):
+        start = perf_counter()
+        store.read('room')
+        latencies[i] = perf_counter() - start
+    return latencies
+
+
+def _run(rounds: int, directory: str) -> None:
+    shared_memory_store = SharedMemoryStore(f'presidents-{os.getpid()}')
+    stores = {
+        'none': None,
+        'memory': MemoryStore(),
+        'shared memory': shared_memory_store,
+        'sqlite (WAL)': SQLiteStore(os.path.join(directory, 'rooms.db')),
+    }
+    _play(GameEngine(CardHandChamber), 1)  # warms up the hand tables
+    print(f"{'store':<15}{'actions/s':>11}{'commit p50':>12}" +
+          f"{'commit p99':>12}{'read p50':>10}  (us)")
+    for name, store in stores.items():
+        timed = None if store is None else _Timed(store)
+        engine = GameEngine(CardHandChamber, state_store=timed)
+        start = perf_counter()
+        num_actions, _ = _play(engine, rounds)
+        elapsed = perf_counter() - start
+        line = f"{name:<15}{num_actions / elapsed:>11.0f}"
+        if store is not None:
+            commits = np.array(timed.latencies) * 1e6
+            reads = _read_latencies(store) * 1e6
+            line += (f"{np.percentile(commits, 50):>12.1f}" +
+                     f"{np.percentile(commits, 99):>12.1f}" +
+                     f"{np.percentile(reads, 50):>10.1f}")
+            store.close()
+        print(line)
+    shared_memory_store.unlink()
+
+
+@main
+def run(rounds: str='20'):
+    with tempfile.TemporaryDirectory() as directory:
+        _run(int(rounds), directory)
@@ -0,0 +1,59 @@
+"""
+latency of the trading lookups with the chamber's card mask vs. the
+contains_card loops and deck rebuild they replace
+
+run from the repository root: python -m tests.runtime_trading_lookups
+"""
+import numpy as np
+
+from timeit import Timer
+from card_hand_chamber import CardHandChamber
+from utils.utils import main
+
+
+def _ask_by_contains_card(chamber, card_value):
+    for card in range((card_value - 1) * 4 + 1, card_value * 4 + 1):
+        if chamber.contains_card(card):
+            return card
+    return 0
+
+
+def _count_by_contains_card(chamber, card_value):
+    return sum(chamber.contains_card(card)
+               for card in range((card_value - 1) * 4 + 1, card_value * 4 + 1))
+
+
+def _holder_by_rebuild(chambers):
+    decks = np.array([list(chamber.iter_cards()) for chamber in chambers])
+    return np.where(decks == 1)[0][0]
+
+
+def _holder_by_card_mask(chambers):
+    for index, chamber in enumerate(chambers):
+        if chamber.card_mask & 1:
+            return index
+
+
+@main
+def run():
+    np.random.seed(0)
+    decks = np.random.permutation(np.arange(1, 53)).reshape(4, 13)
+    decks.sort(axis=1)
+    chambers = [CardHandChamber(deck, 'sid') for deck in decks]
+    namespace = {'chamber': chambers[0], 'chambers': chambers,
+                 '_ask_by_contains_card': _ask_by_contains_card,
+                 '_count_by_contains_card': _count_by_contains_card,
+                 '_holder_by_rebuild': _holder_by_rebuild,
+                 '_holder_by_card_mask': _holder_by_card_mask}
+    print(f"{'lookup (us)':<24}{'before':>10}{'after':>10}")
+    for lookup, before, after in [
+        ('ask for a king', '_ask_by_contains_card(chamber, 11)',
+         'chamber.lowest_of_rank(10)'),
+        ('kings held', '_count_by_contains_card(chamber, 11)',
+         'chamber.count_rank(10)'),
+        ('who holds the 3 of clubs', '_holder_by_rebuild(chambers)',
+         '_holder_by_card_mask(chambers)'),
+    ]:
+        times = [min(Timer(stmt, globals=namespace).repeat(5, 2000)) / 2000
+                 * 1e6 for stmt in (before, after)]
+        print(f"{lookup:<24}{times[0]:>10.2f}{times[1]:>10.2f}")
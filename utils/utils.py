@@ -5,8 +5,34 @@ from itertools import accumulate, repeat, chain
 
 
 def hand_hash(hand: np.ndarray) -> int:
-    return sum([hand[i] * (53 ** (5 - i))  # type: ignore
-                for i in range(5)]).item()
+    # python ints are much faster than numpy scalars for 5 elements
+    a, b, c, d, e = hand.tolist()
+    return ((((a * 53 + b) * 53 + c) * 53 + d) * 53 + e) * 53
+
+
+def hand_hash_batch(hands: np.ndarray) -> np.ndarray:
+    """
+    vectorized hand_hash of every row of an (N, 5) array of hands;
+    accumulates column by column so no (N, 5) uint64 temporary is made
+    """
+    hashes = np.zeros(shape=len(hands), dtype=np.uint64)
+    for i in range(5):
+        hashes *= np.uint64(53)
+        hashes += hands[:, i]
+    hashes *= np.uint64(53)
+    return hashes
+
+
+def hand_unhash_batch(hashes: np.ndarray) -> np.ndarray:
+    """
+    inverse of hand_hash_batch: the (N, 5) uint8 hands of N hashes
+    """
+    hashes = hashes.astype(np.uint64)  # copy
+    hands = np.empty(shape=(len(hashes), 5), dtype=np.uint8)
+    for i in range(4, -1, -1):
+        hashes //= np.uint64(53)
+        hands[:, i] = hashes % np.uint64(53)
+    return hands
 
 
 def cartesian_product_pp(arrays):